@@ -3,6 +3,8 @@ import os
 from typing import List, Dict
 from datetime import datetime
 from anthropic import Anthropic
+# Extração do uso do cache compartilhada com o assistente (requer `src` no PYTHONPATH)
+from business_assistant.assistant.utils.prompt_cache import cache_usage
 
 class TestadorClaudeFiscal:
     def __init__(self, documentacao_path: str, api_key: str = None):
@@ -32,6 +34,41 @@ class TestadorClaudeFiscal:
         """
         return f"Documentação do sistema fiscal: {json.dumps(self.documentacao, ensure_ascii=False)}"
 
+    def _preparar_mensagem(self, contexto: str, pergunta: str) -> Dict:
+        """
+        Monta a requisição com system prompt e documentação como prefixo estável
+
+        A documentação é marcada com cache_control para que a Anthropic
+        reaproveite o prefixo entre as perguntas; a pergunta vai em um bloco
+        final separado.
+        """
+        return {
+            "model": "claude-3-sonnet-20240229",
+            "system": [
+                {"type": "text", "text": self.system_prompt},
+                {"type": "text", "text": contexto, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": f"Pergunta: {pergunta}"}]
+                }
+            ],
+            "max_tokens": 1000
+        }
+
+    def _extrair_uso_cache(self, resposta) -> Dict:
+        """
+        Resume o uso do cache de prompt com os nomes usados no relatório
+        """
+        uso = cache_usage(resposta)
+        return {
+            'cache_hit': uso['cache_hit'],
+            'tokens_cache_lidos': uso['cache_read_input_tokens'],
+            'tokens_cache_gravados': uso['cache_creation_input_tokens'],
+            'tokens_entrada': uso['input_tokens']
+        }
+
     def testar_alucinacoes(self, casos_teste: List[Dict]) -> Dict:
         """
         Testa o Claude para verificar alucinações usando casos de teste estruturados
@@ -41,22 +78,21 @@ class TestadorClaudeFiscal:
             'alucinacoes_detectadas': 0,
             'respostas_corretas': 0,
             'reconhecimento_limites': 0,
+            'cache_prompt': {
+                'acertos': 0,
+                'falhas': 0,
+                'tokens_cache_lidos': 0,
+                'tokens_cache_gravados': 0
+            },
             'detalhes_testes': []
         }
 
+        # A documentação é serializada uma única vez e reaproveitada como prefixo
+        contexto = self._preparar_contexto()
+
         for caso in casos_teste:
             # Prepara a mensagem para o Claude
-            mensagem = {
-                "model": "claude-3-sonnet-20240229",
-                "system": self.system_prompt,  # system prompt deve estar aqui
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"{self._preparar_contexto()}\n\nPergunta: {caso['pergunta']}"
-                    }
-                ],
-                "max_tokens": 1000
-            }
+            mensagem = self._preparar_mensagem(contexto, caso['pergunta'])
 
             # Obtém resposta do Claude
             try:
@@ -66,6 +102,12 @@ class TestadorClaudeFiscal:
                 print(f"Erro ao obter resposta do Claude: {e}")
                 continue
 
+            uso_cache = self._extrair_uso_cache(resposta)
+            cache_prompt = resultados['cache_prompt']
+            cache_prompt['acertos' if uso_cache['cache_hit'] else 'falhas'] += 1
+            cache_prompt['tokens_cache_lidos'] += uso_cache['tokens_cache_lidos']
+            cache_prompt['tokens_cache_gravados'] += uso_cache['tokens_cache_gravados']
+
             # Verifica se a informação existe na documentação
             info_existe = self._verificar_existencia_info(caso['pergunta'])
 
@@ -80,6 +122,7 @@ class TestadorClaudeFiscal:
                 'pergunta': caso['pergunta'],
                 'resposta_modelo': texto_resposta,
                 'resultado': resultado_caso,
+                'uso_cache': uso_cache,
                 'timestamp': datetime.now().isoformat()
             })
 
@@ -182,6 +225,7 @@ class TestadorClaudeFiscal:
         Taxa de acerto: {(resultados['respostas_corretas'] / total_testes * 100):.2f}%
         Taxa de alucinações: {(resultados['alucinacoes_detectadas'] / total_testes * 100):.2f}%
         Taxa de reconhecimento de limites: {(resultados['reconhecimento_limites'] / total_testes * 100):.2f}%
+        Cache de prompt: {resultados['cache_prompt']['acertos']} acertos, {resultados['cache_prompt']['falhas']} falhas, {resultados['cache_prompt']['tokens_cache_lidos']} tokens lidos do cache
 
         DETALHES DOS TESTES:
         """
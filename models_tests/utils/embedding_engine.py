@@ -0,0 +1,5 @@
+# Implementação única do embedder, compartilhada com a busca vetorial do
+# assistente (requer `src` no PYTHONPATH)
+from business_assistant.assistant.core.embeddings import EmbeddingCache, HashingEmbedder
+
+__all__ = ["EmbeddingCache", "HashingEmbedder"]
@@ -1,36 +1,44 @@
-from typing import List
+from typing import List, Optional
 import numpy as np
-from anthropic import Anthropic
+from models_tests.utils.embedding_engine import HashingEmbedder
 
 class SimilarityCalculator:
-    def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
-
-    def get_embedding(self, text: str) -> List[float]:
-        response = self.client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1024,
-            system="Retorne apenas o embedding do texto fornecido, sem explicações.",
-            messages=[{"role": "user", "content": text}]
-        )
-        return response.content[0].text
-
-    def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        vec1 = np.array(vec1)
-        vec2 = np.array(vec2)
-        return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    def __init__(self, dimensions: int = 1024, cache_dir: Optional[str] = None):
+        """
+        Calcula similaridade entre textos com embeddings gerados localmente
+
+        Args:
+            dimensions: Tamanho dos vetores de embedding
+            cache_dir: Diretório para cache em disco dos embeddings (opcional)
+        """
+        self.embedder = HashingEmbedder(dimensions=dimensions, char_ngrams=(3, 4, 5), cache_dir=cache_dir)
+
+    def get_embedding(self, text: str) -> np.ndarray:
+        return self.embedder.embed([text])[0]
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.embed(texts)
+
+    def cosine_similarity(self, vec1, vec2) -> float:
+        vec1 = np.asarray(vec1, dtype=np.float32)
+        vec2 = np.asarray(vec2, dtype=np.float32)
+        norm = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+        return float(np.dot(vec1, vec2) / norm) if norm else 0.0
+
+    def similarity_matrix(self, texts_a: List[str], texts_b: List[str]) -> np.ndarray:
+        """Matriz (len(texts_a), len(texts_b)) de similaridades de cosseno."""
+        # Os embeddings já saem normalizados, então o cosseno é o produto interno
+        return self.get_embeddings(texts_a) @ self.get_embeddings(texts_b).T
 
     def calcular_similaridade(self, texto1: str, texto2: str) -> float:
-        embedding1 = self.get_embedding(texto1)
-        embedding2 = self.get_embedding(texto2)
-        return self.cosine_similarity(embedding1, embedding2)
+        return float(self.similarity_matrix([texto1], [texto2])[0, 0])
 
 
 def exemplo_uso():
-    calculator = SimilarityCalculator("seu-api-key-aqui")
+    calculator = SimilarityCalculator()
 
     texto1 = "O gato está dormindo no sofá"
     texto2 = "Um felino descansa no mobiliário"
 
     similaridade = calculator.calcular_similaridade(texto1, texto2)
-    print(f"Similaridade entre os textos: {similaridade:.2f}")
\ No newline at end of file
+    print(f"Similaridade entre os textos: {similaridade:.2f}")
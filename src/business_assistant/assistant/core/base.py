@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional
+from ..utils.streaming import StreamTimer
 
 
 class AssistantBase(ABC):
@@ -7,12 +8,38 @@ class AssistantBase(ABC):
 
     def __init__(self, knowledge_base):
         self.knowledge_base = knowledge_base
+        # Métricas da última chamada a chat_stream (ttft e duração em segundos)
+        self.last_stream_metrics: Optional[Dict[str, Any]] = None
 
     @abstractmethod
     async def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Processa uma mensagem e retorna a resposta."""
         pass
 
+    async def chat_stream(self, message: str,
+                          context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Processa uma mensagem e produz a resposta em trechos conforme são gerados
+
+        Registra em `last_stream_metrics` o tempo até o primeiro trecho (ttft)
+        e a duração total da chamada.
+        """
+        timer = StreamTimer()
+        deltas = self._stream_response(message, context)
+        try:
+            async for delta in deltas:
+                timer.record(delta)
+                yield delta
+        finally:
+            # Se o consumidor parar antes do fim, fecha a fonte (e a conexão) já
+            await deltas.aclose()
+            self.last_stream_metrics = timer.finish()
+
+    async def _stream_response(self, message: str,
+                               context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Fonte dos trechos de `chat_stream`; por padrão, a resposta completa de `chat`."""
+        yield await self.chat(message, context)
+
     @abstractmethod
     async def load_context(self, context_id: str) -> Dict[str, Any]:
         """Carrega o contexto de uma conversa."""
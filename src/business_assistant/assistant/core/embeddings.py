@@ -0,0 +1,138 @@
+import hashlib
+import math
+import os
+import re
+import unicodedata
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class HashingEmbedder:
+    """
+    Gera embeddings localmente, sem rede, com o truque de hashing
+
+    Cada texto vira um vetor esparso de palavras, pares de palavras e
+    n-gramas de caracteres (robustos a flexões e erros de digitação), que são
+    espalhados em `dimensions` posições por hash, com sinal, peso sublinear
+    e normalização L2; o produto interno entre vetores é o cosseno.
+    """
+
+    _word_pattern = re.compile(r"\w+")
+
+    def __init__(self, dimensions: int = 256, char_ngrams: tuple = (3, 4),
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            dimensions: Tamanho dos vetores gerados
+            char_ngrams: Tamanhos de n-gramas de caracteres usados como atributos
+            cache_dir: Diretório para cache em disco dos embeddings (opcional)
+        """
+        self.dimensions = dimensions
+        self.char_ngrams = char_ngrams
+        self.cache = EmbeddingCache(cache_dir, self.signature) if cache_dir else None
+
+    @property
+    def signature(self) -> str:
+        """Identifica a configuração; muda a chave de cache se os parâmetros mudarem."""
+        return f"hashing-v1-{self.dimensions}-{'-'.join(map(str, self.char_ngrams))}"
+
+    def _features(self, text: str) -> Dict[str, int]:
+        normalized = unicodedata.normalize("NFKD", text.lower())
+        normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+        words = self._word_pattern.findall(normalized)
+
+        features: Dict[str, int] = {}
+        for i, word in enumerate(words):
+            features[f"w:{word}"] = features.get(f"w:{word}", 0) + 1
+            if i:
+                bigram = f"b:{words[i - 1]} {word}"
+                features[bigram] = features.get(bigram, 0) + 1
+
+            padded = f"<{word}>"
+            for n in self.char_ngrams:
+                for start in range(len(padded) - n + 1):
+                    ngram = f"c:{padded[start:start + n]}"
+                    features[ngram] = features.get(ngram, 0) + 1
+        return features
+
+    def _compute(self, texts: List[str]) -> np.ndarray:
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(hashed % self.dimensions)
+                # O bit mais alto do hash define o sinal, reduzindo o viés das colisões
+                values.append((1.0 + math.log(count)) * (1.0 if hashed & 0x80000000 else -1.0))
+
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+                  np.asarray(values, dtype=np.float32))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        """
+        Gera embeddings para uma lista de textos
+
+        Args:
+            texts: Textos a converter
+            batch_size: Quantos textos sem cache são vetorizados por vez
+
+        Returns:
+            Matriz float32 (len(texts), dimensions) com linhas normalizadas
+        """
+        result = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        missing = []
+        for position, text in enumerate(texts):
+            cached = self.cache.get(text) if self.cache else None
+            if cached is not None:
+                result[position] = cached
+            else:
+                missing.append(position)
+
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = self._compute([texts[position] for position in batch])
+            for position, vector in zip(batch, vectors):
+                result[position] = vector
+                if self.cache:
+                    self.cache.set(texts[position], vector)
+
+        return result
+
+
+class EmbeddingCache:
+    """Cache em disco de embeddings, indexado pelo hash do conteúdo do texto."""
+
+    def __init__(self, cache_dir: str, signature: str):
+        self.cache_dir = cache_dir
+        self.signature = signature
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, text: str) -> str:
+        digest = hashlib.sha256(f"{self.signature}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.npy")
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Retorna o embedding em cache ou None."""
+        path = self._path(text)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.load(path)
+
+    def set(self, text: str, vector: np.ndarray) -> None:
+        """Grava o embedding de um texto (escrita atômica via arquivo temporário)."""
+        path = self._path(text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, vector.astype(np.float32))
+        os.replace(temp_path, path)
@@ -0,0 +1,90 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import functools
+import os
+
+# Instância da base de conhecimento criada uma única vez em cada processo do pool
+_worker_target = None
+
+
+def _init_worker(factory: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+    global _worker_target
+    _worker_target = factory(**kwargs)
+
+
+def _call_worker(method: str, args: tuple) -> Any:
+    return getattr(_worker_target, method)(*args)
+
+
+class SearchExecutor:
+    """
+    Executa buscas locais (CPU-bound) fora do event loop
+
+    Tipos suportados:
+        'none': executa direto no chamador
+        'thread': pool de threads compartilhando a base em memória
+        'process': pool de processos; cada processo monta sua própria cópia
+            da base uma única vez na inicialização (a partir de `worker_spec`)
+            e cada chamada envia apenas o nome do método e os argumentos
+    """
+
+    KINDS = ('none', 'thread', 'process')
+
+    def __init__(self, kind: str = 'none', max_workers: Optional[int] = None,
+                 worker_spec: Optional[Callable[[], Tuple[Callable[..., Any], Dict[str, Any]]]] = None):
+        """
+        Args:
+            kind: 'none', 'thread' ou 'process'
+            max_workers: Tamanho do pool (padrão: número de CPUs)
+            worker_spec: Função que retorna (fábrica, kwargs) para montar a base
+                em cada processo; obrigatória para kind='process'
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de executor não suportado: {kind}")
+        if kind == 'process' and worker_spec is None:
+            raise ValueError("Executor de processos requer worker_spec")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.worker_spec = worker_spec
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == 'thread':
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='kb-search')
+            else:
+                factory, kwargs = self.worker_spec()
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(factory, kwargs))
+        return self._pool
+
+    async def run(self, target: Any, method: str, *args) -> Any:
+        """
+        Executa target.method(*args) de acordo com o tipo de executor
+
+        No pool de processos, `target` não é enviado: o método é chamado na
+        cópia da base mantida pelo processo.
+        """
+        if self.kind == 'none':
+            return getattr(target, method)(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.kind == 'thread':
+            return await loop.run_in_executor(self._get_pool(), functools.partial(getattr(target, method), *args))
+        return await loop.run_in_executor(self._get_pool(), _call_worker, method, args)
+
+    def reset(self) -> None:
+        """Descarta o pool atual; o próximo uso recria os processos com a base atualizada."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self) -> None:
+        """Encerra o pool aguardando as tarefas em andamento."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -1,22 +1,319 @@
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import heapq
 import json
-from anthropic import Anthropic
 import time
+import numpy as np
+from .embeddings import HashingEmbedder
+from .executor import SearchExecutor
+from .index_store import IndexFile, write_index
+from .knowledge import KnowledgeBase
+from .query_cache import QueryCache
+from .search_index import InvertedIndex
+from .scoring import Scorer, create_scorer
+from .vector_index import IVFIndex
+from ..utils.clients import ClientRegistry, get_client_registry
+from ..utils.exceptions import KnowledgeBaseError
+from ..utils.prompt_cache import cache_usage, is_cacheable_prefix, text_block
+from ..utils.scheduler import RequestScheduler, get_scheduler
+from ..utils.streaming import StreamTimer, anthropic_text_deltas
+from ..utils.tokens import estimate_tokens
 
 
 class HybridKnowledgeBase:
-    def __init__(self, documentation_path: str, api_key: str, max_local_results: int = 3,
-                 similarity_threshold: float = 0.3, use_api_threshold: float = 0.5):
-        self.documentacao = self._load_documentation(documentation_path)
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, documentation_path: Optional[str], api_key: str, max_local_results: int = 3,
+                 similarity_threshold: float = 0.3, use_api_threshold: float = 0.5,
+                 search_strategy: str = 'index', scorer: Union[str, Scorer] = 'overlap',
+                 context_mode: str = 'full', context_max_sections: int = 8,
+                 context_token_budget: int = 2000, cache_ttl: Optional[float] = 300.0,
+                 local_cache_size: int = 1024, api_cache_size: int = 256,
+                 index_path: Optional[str] = None, vector_index_path: Optional[str] = None,
+                 vector_n_probe: int = 8, api_timeout: float = 60.0,
+                 executor: str = 'none', executor_workers: Optional[int] = None,
+                 speculative: bool = False, hedge_delay_ms: float = 0.0,
+                 client_registry: Optional[ClientRegistry] = None,
+                 scheduler: Optional[RequestScheduler] = None, priority: str = 'interactive',
+                 api_base_url: Optional[str] = None, documentation: Optional[Dict] = None):
+        if search_strategy not in ('index', 'scan'):
+            raise ValueError(f"Estratégia de busca não suportada: {search_strategy}")
+        if context_mode not in ('full', 'retrieval'):
+            raise ValueError(f"Modo de contexto não suportado: {context_mode}")
+
+        self.documentation_path = documentation_path
+        self._documentacao: Optional[Dict] = None
+        self._index_file: Optional[IndexFile] = None
+        self.api_timeout = api_timeout
+        self.speculative = speculative
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
+        # Métricas do último streaming da API (ttft, duração e uso de tokens)
+        self.last_stream_metrics: Optional[Dict] = None
+        self.hedge_delay_ms = hedge_delay_ms
+        # Clientes compartilhados: o pool de conexões é o mesmo dos assistentes com a mesma chave
+        registry = client_registry or get_client_registry()
+        self.client = registry.get_client('anthropic', api_key, api_base_url,
+                                          asynchronous=False).with_options(timeout=api_timeout)
+        self.async_client = registry.get_client('anthropic', api_key, api_base_url).with_options(timeout=api_timeout)
         self.max_local_results = max_local_results
         self.similarity_threshold = similarity_threshold
         self.use_api_threshold = use_api_threshold
-        self.search_index = self._build_search_index()
+        self.search_strategy = search_strategy
+        self.scorer = create_scorer(scorer)
+        self.context_mode = context_mode
+        self.context_max_sections = context_max_sections
+        self.context_token_budget = context_token_budget
+        self.system_prompt = (
+            "Você é um assistente fiscal especializado. Use apenas as informações contidas "
+            "na documentação fornecida para responder às perguntas. Se a informação não "
+            "estiver na documentação, indique isso claramente."
+        )
+        self.query_cache = QueryCache(local_cache_size, api_cache_size, cache_ttl)
+        self.embedder = HashingEmbedder()
+        self.vector_n_probe = vector_n_probe
+        self.vector_index_path = vector_index_path
+        self.vector_index: Optional[IVFIndex] = None
+
+        if index_path is not None:
+            self.search_index = self._open_index(index_path)
+        else:
+            # Documentação já carregada dispensa a leitura de documentation_path
+            self._documentacao = (documentation if documentation is not None
+                                  else self._load_documentation(documentation_path))
+            self.search_index = self._build_search_index()
+        self._build_context_sections()
+        if vector_index_path:
+            self.vector_index = self._load_vector_index(vector_index_path)
+        self.executor = SearchExecutor(executor, executor_workers, self._worker_spec)
+
+    def _worker_spec(self) -> Tuple[type, Dict]:
+        """
+        Como montar, em outro processo, uma cópia desta base apenas para busca local
+
+        Sem índice pré-compilado, a documentação em memória vai junto (e não o
+        caminho), para que os processos vejam o mesmo conteúdo que esta base
+        mesmo se o arquivo mudar em disco depois de carregado.
+        """
+        index_path = self._index_file.path if self._index_file is not None else None
+        return HybridKnowledgeBase, {
+            'documentation_path': None,
+            'documentation': self._documentacao if index_path is None else None,
+            'api_key': None,
+            'max_local_results': self.max_local_results,
+            'similarity_threshold': self.similarity_threshold,
+            'use_api_threshold': self.use_api_threshold,
+            'search_strategy': self.search_strategy,
+            'scorer': self.scorer,
+            'local_cache_size': 0,
+            'api_cache_size': 0,
+            'index_path': index_path,
+            'vector_index_path': self.vector_index_path,
+            'vector_n_probe': self.vector_n_probe
+        }
+
+    @property
+    def documentacao(self) -> Dict:
+        """Documentação; com índice pré-compilado só é decodificada quando usada."""
+        if self._documentacao is None and self._index_file is not None:
+            self._documentacao = json.loads(self._index_file.documentation)
+        return self._documentacao
+
+    @staticmethod
+    def compile_index(documentation_path: str, output_path: str,
+                      scorer: Union[str, Scorer] = 'overlap') -> None:
+        """
+        Compila offline o índice de busca local em um arquivo binário
+
+        O arquivo pode ser aberto depois com `index_path`, evitando o parse do
+        JSON e a reconstrução dos índices a cada processo.
+
+        Args:
+            documentation_path: JSON da documentação
+            output_path: Arquivo de índice a gerar
+            scorer: Scorer cuja tokenização será usada (deve ser o mesmo na abertura)
+        """
+        scorer = create_scorer(scorer)
+        with open(documentation_path, 'r', encoding='utf-8') as f:
+            documentacao = json.load(f)
+
+        write_index(
+            output_path,
+            {str(k): str(v) for k, v in documentacao.items()},
+            {
+                'key': lambda key, value: scorer.tokenize(key),
+                'value': lambda key, value: scorer.tokenize(value)
+            },
+            documentacao,
+            {'kind': 'hybrid', 'scorer': scorer.name}
+        )
+
+    def _open_index(self, index_path: str):
+        """Abre um índice pré-compilado com mmap; nada é decodificado até ser usado."""
+        index_file = IndexFile(index_path)
+        if index_file.metadata.get('kind') != 'hybrid' or index_file.metadata.get('scorer') != self.scorer.name:
+            index_file.close()
+            raise KnowledgeBaseError(
+                f"Índice {index_path} foi compilado para {index_file.metadata}, "
+                f"mas a base usa o scorer '{self.scorer.name}'"
+            )
+
+        if self._index_file is not None:
+            self._index_file.close()
+        self._index_file = index_file
+        self._doc_keys = index_file.keys
+        self._doc_values = index_file.values
+        self._key_index = index_file.field('key')
+        self._value_index = index_file.field('value')
+        return index_file.documents
+
+    def reload_documentation(self, documentation_path: Optional[str] = None) -> None:
+        """
+        Recarrega a documentação, reconstrói os índices e invalida o cache de consultas
+
+        Sem caminho de documentação (base aberta só com index_path), reabre o
+        arquivo de índice, que pode ter sido recompilado.
+
+        Args:
+            documentation_path: Novo caminho (padrão: o caminho atual)
+        """
+        if documentation_path is not None:
+            self.documentation_path = documentation_path
+
+        if self.documentation_path is None:
+            if self._index_file is None:
+                raise KnowledgeBaseError("Base sem documentation_path nem índice para recarregar")
+            self._documentacao = None
+            self.search_index = self._open_index(self._index_file.path)
+        else:
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+            self._documentacao = self._load_documentation(self.documentation_path)
+            self.search_index = self._build_search_index()
+        self._build_context_sections()
+        self.vector_index = None
+        self.vector_index_path = None
+        self.query_cache.clear()
+        self.executor.reset()
+
+    def build_vector_index(self) -> None:
+        """Gera embeddings das entradas do search_index e monta o índice vetorial."""
+        texts = [f"{key} {value}" for key, value in zip(self._doc_keys, self._doc_values)]
+        self.vector_index = IVFIndex(self.embedder.dimensions, n_probe=self.vector_n_probe)
+        self.vector_index.build(self.embedder.embed(texts))
+
+    def _load_vector_index(self, path: str) -> IVFIndex:
+        """Abre um índice vetorial gravado, conferindo se foi gerado para esta documentação."""
+        vector_index = IVFIndex.load(path)
+        if vector_index.dimensions != self.embedder.dimensions:
+            raise KnowledgeBaseError(
+                f"Índice vetorial {path} tem dimensão {vector_index.dimensions}, "
+                f"mas o embedder gera vetores de dimensão {self.embedder.dimensions}"
+            )
+        ids = vector_index.ids()
+        if len(ids) != len(self._doc_keys) or not np.array_equal(ids, np.arange(len(self._doc_keys))):
+            raise KnowledgeBaseError(
+                f"Índice vetorial {path} tem {len(ids)} vetores que não correspondem às "
+                f"{len(self._doc_keys)} entradas da documentação"
+            )
+        # O n_probe configurado na base prevalece sobre o gravado no arquivo
+        vector_index.n_probe = self.vector_n_probe
+        return vector_index
+
+    def save_vector_index(self, path: str) -> None:
+        """Grava o índice vetorial (montando-o se necessário) para uso com vector_index_path."""
+        if self.vector_index is None:
+            self.build_vector_index()
+        self.vector_index.save(path)
+
+    def _vector_search(self, query: str) -> List[Dict]:
+        """Busca local pelos vizinhos mais próximos do embedding da query"""
+        if self.vector_index is None:
+            self.build_vector_index()
+
+        ids, scores = self.vector_index.search(self.embedder.embed([query])[0], k=self.max_local_results)
+        return [{
+            'key': self._doc_keys[doc_id],
+            'value': self._doc_values[doc_id],
+            'score': float(score)
+        } for doc_id, score in zip(ids, scores)]
 
     def _build_search_index(self) -> Dict:
-        """Constrói índice de busca local"""
-        return {str(k): str(v) for k, v in self.documentacao.items()}
+        """
+        Constrói índice de busca local
+
+        Além do dicionário chave -> valor, monta índices invertidos separados
+        para chaves e valores, de forma que cada consulta visite apenas os
+        documentos que compartilham algum termo com ela. A tokenização é a do
+        scorer configurado.
+        """
+        search_index = {str(k): str(v) for k, v in self.documentacao.items()}
+
+        self._doc_keys = list(search_index.keys())
+        self._doc_values = list(search_index.values())
+        self._key_index = InvertedIndex()
+        self._value_index = InvertedIndex()
+        for doc_id, (key, value) in enumerate(search_index.items()):
+            self._key_index.add_document(doc_id, self.scorer.tokenize(key))
+            self._value_index.add_document(doc_id, self.scorer.tokenize(value))
+
+        return search_index
+
+    def _build_context_sections(self) -> None:
+        """
+        Prepara as seções usadas como contexto da API
+
+        No modo 'retrieval' a documentação é achatada em seções (uma por
+        folha) ranqueadas com BM25, montadas na primeira requisição à API. O
+        texto serializado de cada seção e o da documentação completa ficam em
+        cache para não serem refeitos a cada requisição.
+        """
+        self._full_context: Optional[str] = None
+        self._section_cache: Dict[str, Tuple[str, int]] = {}
+        self._sections: Optional[KnowledgeBase] = None
+
+    def _serialize_section(self, key: str, value) -> Tuple[str, int]:
+        """Retorna (texto, tokens estimados) de uma seção, usando o cache."""
+        cached = self._section_cache.get(key)
+        if cached is None:
+            text = f"[{key}]: {value}"
+            cached = self._section_cache[key] = (text, estimate_tokens(text))
+        return cached
+
+    def _build_api_context(self, query: str) -> Tuple[str, Dict]:
+        """
+        Monta o contexto enviado à API e as métricas de quanto foi enviado
+
+        Returns:
+            Tupla (texto do contexto, metadados com modo, seções e tokens)
+        """
+        if self.context_mode == 'full':
+            context = self._get_context_documentation()
+            return context, {
+                'mode': 'full',
+                'sections': None,
+                'tokens': estimate_tokens(context),
+                'chars': len(context)
+            }
+
+        if self._sections is None:
+            self._sections = KnowledgeBase(self.documentacao, scorer='bm25')
+
+        selected = []
+        used_tokens = 0
+        for section in self._sections.search(query, threshold=0.0, limit=self.context_max_sections):
+            text, tokens = self._serialize_section(section['key'], section['value'])
+            if used_tokens + tokens > self.context_token_budget:
+                continue
+            selected.append(text)
+            used_tokens += tokens
+
+        context = "Trechos relevantes da documentação do sistema fiscal:\n" + "\n".join(selected)
+        return context, {
+            'mode': 'retrieval',
+            'sections': len(selected),
+            'tokens': estimate_tokens(context),
+            'chars': len(context)
+        }
 
     def _calculate_similarity(self, query: str, text: str) -> float:
         """Calcula similaridade entre query e texto"""
@@ -31,38 +328,234 @@ class HybridKnowledgeBase:
 
         Args:
             query: Pergunta do usuário
-            force_mode: 'local' ou 'api' para forçar um modo específico
+            force_mode: 'local', 'api' ou 'vector' (vizinhos mais próximos no
+                índice vetorial) para forçar um modo específico
 
         Returns:
             Dict com resultados e metadados da busca
+
+        Raises:
+            RuntimeError: Se a API for necessária e houver um event loop em
+                execução nesta thread (use `get_info_async`)
         """
         start_time = time.time()
 
-        # Primeiro tenta busca local
-        local_results = self._local_search(query) if force_mode != 'api' else None
+        if force_mode == 'vector':
+            return self._info_result(start_time, self._vector_search(query), 'vector', False, None)
+
+        # Primeiro tenta busca local (reaproveitando o cache quando possível)
+        local_results, local_cache_hit = (self._cached_local_search(query)
+                                          if force_mode != 'api' else (None, False))
 
         # Decide se usa API baseado na qualidade dos resultados locais
-        use_api = force_mode == 'api' or (
+        if not self.needs_api(local_results, force_mode):
+            return self._info_result(start_time, local_results, 'local', local_cache_hit, None)
+
+        cached = self.query_cache.get('api', query)
+        if cached is not None:
+            results, context_info = cached
+            return self._info_result(start_time, results, 'api', True, context_info)
+
+        context, context_info = self._build_api_context(query)
+        results = self._api_search(query, context)
+        self._store_api_result(query, results, context_info)
+        return self._info_result(start_time, results, 'api', False, context_info)
+
+    async def get_info_async(self, query: str, force_mode: Optional[str] = None,
+                             timeout: Optional[float] = None) -> Dict:
+        """
+        Versão assíncrona de `get_info`: a chamada à API não bloqueia o event loop
+
+        Com `speculative=True` e sem force_mode, busca local e API correm em
+        paralelo (ver `_speculative_search`).
+
+        Args:
+            query: Pergunta do usuário
+            force_mode: 'local', 'api' ou 'vector' para forçar um modo específico
+            timeout: Tempo limite da chamada à API em segundos (padrão: api_timeout)
+
+        Returns:
+            Dict com resultados e metadados da busca
+        """
+        start_time = time.time()
+
+        if force_mode == 'vector':
+            results = await self.executor.run(self, '_vector_search', query)
+            return self._info_result(start_time, results, 'vector', False, None)
+
+        if self.speculative and force_mode is None:
+            return await self._speculative_search(query, start_time, timeout)
+
+        local_results, local_cache_hit = (await self._cached_local_search_async(query)
+                                          if force_mode != 'api' else (None, False))
+
+        if not self.needs_api(local_results, force_mode):
+            return self._info_result(start_time, local_results, 'local', local_cache_hit, None)
+
+        cached = self.query_cache.get('api', query)
+        if cached is not None:
+            results, context_info = cached
+            return self._info_result(start_time, results, 'api', True, context_info)
+
+        context, context_info = self._build_api_context(query)
+        results = await self._api_search_async(query, context, timeout)
+        self._store_api_result(query, results, context_info)
+        return self._info_result(start_time, results, 'api', False, context_info)
+
+    async def _speculative_search(self, query: str, start_time: float,
+                                  timeout: Optional[float] = None) -> Dict:
+        """
+        Modo especulativo: corre a busca local e a chamada à API em paralelo
+
+        A API só é disparada se a busca local não terminar em `hedge_delay_ms`
+        (0 dispara junto com a busca local). Se o melhor resultado local
+        atingir `use_api_threshold`, a chamada em andamento é cancelada; caso
+        contrário a resposta já em voo é usada. Para haver sobreposição real a
+        busca local deve rodar fora do event loop (executor 'thread' ou 'process').
+
+        Os metadados em 'speculative' indicam o caminho vencedor ('local' ou
+        'api'), se a API foi disparada/cancelada e o tempo economizado em
+        relação a executar busca local e API em série.
+        """
+        local_task = asyncio.ensure_future(self._cached_local_search_async(query))
+        done, _ = await asyncio.wait({local_task}, timeout=self.hedge_delay_ms / 1000)
+
+        api_task = None
+        api_start = api_end = None
+        context_info = None
+        api_cached = self.query_cache.get('api', query) if not done else None
+        if not done and api_cached is None:
+            context, context_info = self._build_api_context(query)
+            api_start = time.time()
+            api_task = asyncio.ensure_future(self._api_search_async(query, context, timeout))
+
+        try:
+            local_results, local_cache_hit = await local_task
+        except BaseException:
+            if api_task is not None:
+                api_task.cancel()
+            raise
+        local_end = time.time()
+
+        metadata = {
+            'winner': 'local',
+            'api_started': api_task is not None,
+            'api_cancelled': False,
+            'local_time': local_end - start_time,
+            'time_saved': 0.0
+        }
+
+        if not self.needs_api(local_results):
+            if api_task is not None:
+                metadata['api_cancelled'] = api_task.cancel()
+            return self._info_result(start_time, local_results, 'local', local_cache_hit, None, metadata)
+
+        metadata['winner'] = 'api'
+        if api_task is None:
+            # Busca local terminou dentro do hedge: segue o caminho em série
+            cached = api_cached or self.query_cache.get('api', query)
+            if cached is not None:
+                results, context_info = cached
+                return self._info_result(start_time, results, 'api', True, context_info, metadata)
+            context, context_info = self._build_api_context(query)
+            results = await self._api_search_async(query, context, timeout)
+        else:
+            results = await api_task
+            api_end = time.time()
+            # Em série, a API começaria só depois da busca local
+            metadata['time_saved'] = max(0.0, min(local_end, api_end) - api_start)
+
+        self._store_api_result(query, results, context_info)
+        return self._info_result(start_time, results, 'api', False, context_info, metadata)
+
+    def _cached_local_search(self, query: str) -> Tuple[List[Dict], bool]:
+        """Busca local usando o cache de consultas; retorna (resultados, cache_hit)."""
+        local_results = self.query_cache.get('local', query)
+        if local_results is not None:
+            return local_results, True
+
+        local_results = self._local_search(query)
+        self.query_cache.set('local', query, local_results)
+        return local_results, False
+
+    async def _cached_local_search_async(self, query: str) -> Tuple[List[Dict], bool]:
+        """Como `_cached_local_search`, mas executando a busca no executor configurado."""
+        local_results = self.query_cache.get('local', query)
+        if local_results is not None:
+            return local_results, True
+
+        local_results = await self.executor.run(self, '_local_search', query)
+        self.query_cache.set('local', query, local_results)
+        return local_results, False
+
+    def needs_api(self, local_results: Optional[List[Dict]], force_mode: Optional[str] = None) -> bool:
+        """
+        Indica se a pergunta deve ir para a API dado o resultado local
+
+        Args:
+            local_results: Resultados da busca local
+            force_mode: 'local' ou 'api' para ignorar o limiar de confiança
+        """
+        return force_mode == 'api' or (
                 force_mode != 'local' and
                 (not local_results or
                  max(r['score'] for r in local_results) < self.use_api_threshold)
         )
 
-        if use_api:
-            results = self._api_search(query)
-            mode_used = 'api'
-        else:
-            results = local_results
-            mode_used = 'local'
+    def _store_api_result(self, query: str, results: Dict, context_info: Dict) -> None:
+        """Guarda no cache apenas respostas da API sem erro."""
+        if 'error' not in results:
+            self.query_cache.set('api', query, (results, context_info))
 
+    def _info_result(self, start_time: float, results, mode_used: str,
+                     cache_hit: bool, context_info: Optional[Dict],
+                     speculative: Optional[Dict] = None) -> Dict:
+        """Monta o retorno de `get_info` com os metadados da busca."""
+        if mode_used == 'api' and cache_hit:
+            # Resposta reaproveitada: nenhuma chamada foi feita, então não há uso de tokens a reportar
+            results = {key: value for key, value in results.items() if key != 'usage'}
+            results['cached'] = True
         return {
             'results': results,
             'mode_used': mode_used,
-            'processing_time': time.time() - start_time
+            'processing_time': time.time() - start_time,
+            'cache_hit': cache_hit,
+            'context': context_info,
+            'prompt_cache': results.get('usage') if mode_used == 'api' else None,
+            'speculative': speculative
         }
 
     def _local_search(self, query: str) -> List[Dict]:
         """Realiza busca local na base de conhecimento"""
+        if self.search_strategy == 'scan':
+            return self._scan_search(query)
+        return self._indexed_search(query)
+
+    def _indexed_search(self, query: str) -> List[Dict]:
+        """
+        Busca local via índice invertido
+
+        Chaves e valores são pontuados separadamente pelo scorer configurado
+        e vale o maior dos dois, como na busca original.
+        """
+        query_tokens = self.scorer.tokenize(query)
+        key_scores = self.scorer.score(self._key_index, query_tokens)
+        value_scores = self.scorer.score(self._value_index, query_tokens)
+
+        candidates = []
+        for doc_id in key_scores.keys() | value_scores.keys():
+            max_score = max(key_scores.get(doc_id, 0.0), value_scores.get(doc_id, 0.0))
+            if max_score >= self.similarity_threshold:
+                candidates.append((doc_id, max_score))
+
+        # Top-k sem ordenar todos os candidatos; empates ficam com o menor doc_id
+        top = heapq.nlargest(self.max_local_results, candidates,
+                             key=lambda candidate: (candidate[1], -candidate[0]))
+        return [{'key': self._doc_keys[doc_id], 'value': self._doc_values[doc_id], 'score': score}
+                for doc_id, score in top]
+
+    def _scan_search(self, query: str) -> List[Dict]:
+        """Busca local original, percorrendo todas as entradas (útil para comparação com o scorer 'overlap')"""
         results = []
 
         for key, value in self.search_index.items():
@@ -83,22 +576,124 @@ class HybridKnowledgeBase:
                       key=lambda x: x['score'],
                       reverse=True)[:self.max_local_results]
 
-    def _api_search(self, query: str) -> Dict:
+    def _api_search(self, query: str, context: Optional[str] = None) -> Dict:
         """Realiza busca usando a API do Claude"""
+        if context is None:
+            context, _ = self._build_api_context(query)
+
+        request = self._build_api_request(query, context)
+        # A vaga fica fora do try: chamar a versão síncrona dentro do event loop
+        # levanta RuntimeError (use get_info_async), não vira um erro da API
+        with self._api_slot(request, query, context):
+            try:
+                response = self.client.messages.create(**request)
+                return {'response': response.content[0].text, 'usage': cache_usage(response)}
+            except Exception as e:
+                return {'error': str(e)}
+
+    async def _api_search_async(self, query: str, context: Optional[str] = None,
+                                timeout: Optional[float] = None) -> Dict:
+        """
+        Realiza busca usando a API do Claude sem bloquear o event loop
+
+        Um cancelamento da tarefa chamadora cancela a requisição em andamento.
+        """
+        if context is None:
+            context, _ = self._build_api_context(query)
+        timeout = self.api_timeout if timeout is None else timeout
+        request = self._build_api_request(query, context)
+
         try:
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                messages=[{
-                    "role": "user",
-                    "content": (f"{self._get_context_documentation()}\n\n"
-                                f"Pergunta: {query}")
-                }],
-                max_tokens=1000
-            )
-            return {'response': response.content[0].text}
+            async with self._api_slot(request, query, context):
+                response = await asyncio.wait_for(self.async_client.messages.create(**request), timeout)
+            return {'response': response.content[0].text, 'usage': cache_usage(response)}
+        except asyncio.TimeoutError:
+            return {'error': f"Tempo limite de {timeout}s excedido na chamada à API"}
         except Exception as e:
             return {'error': str(e)}
 
+    async def stream_api_search(self, query: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Busca pela API em streaming: produz os trechos da resposta conforme chegam
+
+        Respostas já em cache são produzidas de uma vez (com `cached` nas métricas). Ao final a resposta
+        completa vai para o cache e `last_stream_metrics` recebe ttft, duração
+        e uso de tokens. O timeout vale para a chamada inteira; erros são
+        levantados como KnowledgeBaseError.
+        """
+        cached = self.query_cache.get('api', query)
+        if cached is not None:
+            # Sem chamada à API: métricas da resposta em cache, não as do streaming anterior
+            self.last_stream_metrics = {'ttft': 0.0, 'duration': 0.0, 'chunks': 1,
+                                        'chars': len(cached[0]['response']), 'usage': None, 'cached': True}
+            yield cached[0]['response']
+            return
+
+        context, context_info = self._build_api_context(query)
+        timeout = self.api_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        timer = StreamTimer()
+        usage = cache_usage(None)
+        parts = []
+
+        request = self._build_api_request(query, context)
+
+        try:
+            async with self._api_slot(request, query, context):
+                events = await asyncio.wait_for(self.async_client.messages.create(**request, stream=True), timeout)
+                async with events:
+                    deltas = anthropic_text_deltas(events, usage)
+                    try:
+                        while True:
+                            try:
+                                delta = await asyncio.wait_for(deltas.__anext__(), deadline - time.monotonic())
+                            except StopAsyncIteration:
+                                break
+                            timer.record(delta)
+                            parts.append(delta)
+                            yield delta
+                    finally:
+                        await deltas.aclose()
+        except asyncio.TimeoutError:
+            raise KnowledgeBaseError(f"Tempo limite de {timeout}s excedido na chamada à API")
+        except Exception as e:
+            raise KnowledgeBaseError(str(e)) from e
+        finally:
+            self.last_stream_metrics = {**timer.finish(), 'usage': usage, 'cached': False}
+
+        self._store_api_result(query, {'response': ''.join(parts), 'usage': usage}, context_info)
+
+    def _api_slot(self, request: Dict, query: str, context: str):
+        """Vaga no agendador para a requisição (tokens estimados: entrada + saída máxima)."""
+        tokens = estimate_tokens(self.system_prompt) + estimate_tokens(context) + estimate_tokens(query)
+        return self.scheduler.acquire('anthropic', request['model'], tokens + request['max_tokens'], self.priority)
+
+    def _build_api_request(self, query: str, context: str) -> Dict:
+        """
+        Monta a requisição da API com prefixo estável marcado para cache
+
+        No modo 'full' o system prompt e a documentação formam o prefixo
+        cacheável e a pergunta vai em um bloco final separado. No modo
+        'retrieval' o contexto varia por pergunta, então só o system prompt
+        é estável. O cache_control só é enviado quando o prefixo atinge o
+        mínimo da API (MIN_CACHEABLE_TOKENS); abaixo disso nada é marcado.
+        """
+        if self.context_mode == 'full':
+            cacheable = is_cacheable_prefix(self.system_prompt, context)
+            system = [text_block(self.system_prompt), text_block(context, cacheable=cacheable)]
+            content = [text_block(f"Pergunta: {query}")]
+        else:
+            cacheable = is_cacheable_prefix(self.system_prompt)
+            system = [text_block(self.system_prompt, cacheable=cacheable)]
+            content = [text_block(context), text_block(f"Pergunta: {query}")]
+
+        return {
+            'model': "claude-3-sonnet-20240229",
+            'system': system,
+            'messages': [{"role": "user", "content": content}],
+            'max_tokens': 1000
+        }
+
     def _load_documentation(self, path: str) -> Dict:
         """
         Carrega a documentação do sistema que será usada como referência
@@ -110,4 +705,9 @@ class HybridKnowledgeBase:
         """
         Obtem o contexto da documentação para envio ao Claude
         """
-        return f"Documentação do sistema fiscal: {json.dumps(self.documentacao, ensure_ascii=False)}"
\ No newline at end of file
+        if self._full_context is None:
+            # O índice pré-compilado já guarda a documentação serializada
+            serialized = (self._index_file.documentation if self._index_file is not None
+                          else json.dumps(self.documentacao, ensure_ascii=False))
+            self._full_context = f"Documentação do sistema fiscal: {serialized}"
+        return self._full_context
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Índice de busca pré-compilado em arquivo binário, lido via mmap
+
+Formato do arquivo (versão 1):
+
+    MAGIC (8 bytes) | versão (u32) | tamanho do cabeçalho (u32) | cabeçalho JSON
+    seções binárias alinhadas em 8 bytes, descritas no cabeçalho
+
+O cabeçalho guarda metadados (scorer, número de documentos, ordem dos bytes)
+e a posição de cada seção: offsets e textos das chaves e valores, a
+documentação serializada e, para cada campo indexado, o dicionário de termos
+ordenado, os postings (doc_id, frequência) e os comprimentos por documento.
+Nada é decodificado na abertura; termos, postings e documentos são lidos sob
+demanda, e processos que abrem o mesmo arquivo compartilham as páginas pelo
+cache do sistema operacional.
+"""
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from .search_index import InvertedIndex
+from ..utils.exceptions import KnowledgeBaseError
+
+MAGIC = b"IAVIDX\x00\x00"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 8
+
+
+class _SectionWriter:
+    """Acumula seções binárias alinhadas e registra seus offsets."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.sections: Dict[str, List[int]] = {}
+        self.size = 0
+
+    def add(self, name: str, data: bytes) -> None:
+        self.sections[name] = [self.size, len(data)]
+        padding = -len(data) % _ALIGNMENT
+        self.chunks.append(data + b"\x00" * padding)
+        self.size += len(data) + padding
+
+
+def _encode_strings(writer: _SectionWriter, name: str, strings: List[str]) -> None:
+    """Grava uma lista de textos como offsets (u64) + blob UTF-8."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    writer.add(f"{name}.offsets", offsets.tobytes())
+    writer.add(f"{name}.blob", bytes(blob))
+
+
+def write_index(output_path: str, documents: Dict[str, Any],
+                field_tokenizers: Dict[str, Callable[[str, Any], List[str]]],
+                documentation: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Compila documentos em um arquivo de índice binário
+
+    Args:
+        output_path: Caminho do arquivo gerado
+        documents: Dicionário chave -> valor (o índice plano da base)
+        field_tokenizers: Nome do campo -> função (chave, valor) -> tokens
+        documentation: Documentação original, guardada serializada no arquivo
+        metadata: Metadados extras gravados no cabeçalho (ex.: scorer)
+    """
+    writer = _SectionWriter()
+    keys = list(documents.keys())
+    _encode_strings(writer, "keys", keys)
+    _encode_strings(writer, "values", [json.dumps(documents[key], ensure_ascii=False) for key in keys])
+    writer.add("documentation", json.dumps(documentation, ensure_ascii=False).encode("utf-8"))
+
+    fields = {}
+    for field, tokenizer in field_tokenizers.items():
+        index = InvertedIndex()
+        for doc_id, key in enumerate(keys):
+            index.add_document(doc_id, tokenizer(key, documents[key]))
+
+        terms = sorted(index.postings, key=lambda term: term.encode("utf-8"))
+        _encode_strings(writer, f"{field}.terms", terms)
+
+        postings_offsets = array("Q", [0])
+        postings = array("I")
+        for term in terms:
+            for doc_id, frequency in sorted(index.postings[term].items()):
+                postings.append(doc_id)
+                postings.append(frequency)
+            postings_offsets.append(len(postings) // 2)
+
+        writer.add(f"{field}.postings.offsets", postings_offsets.tobytes())
+        writer.add(f"{field}.postings", postings.tobytes())
+        writer.add(f"{field}.doc_lengths", array("I", (index.doc_lengths[i] for i in range(len(keys)))).tobytes())
+        writer.add(f"{field}.doc_unique_counts",
+                   array("I", (index.doc_unique_counts[i] for i in range(len(keys)))).tobytes())
+        fields[field] = {"num_terms": len(terms), "total_length": index.total_length}
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "num_documents": len(keys),
+        "fields": fields,
+        "sections": writer.sections,
+        "metadata": metadata or {}
+    }).encode("utf-8")
+    data_start = _PREAMBLE.size + len(header)
+    data_start += -data_start % _ALIGNMENT
+
+    # Grava ao lado e troca o arquivo de uma vez: bases com o índice antigo
+    # mapeado continuam lendo a versão anterior até recarregarem
+    partial_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(partial_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b"\x00" * (data_start - _PREAMBLE.size - len(header)))
+        for chunk in writer.chunks:
+            f.write(chunk)
+    os.replace(partial_path, output_path)
+
+
+class _MappedStrings(Sequence):
+    """Sequência de textos lida sob demanda do arquivo mapeado."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview, decoder: Callable[[str], Any] = None):
+        self._offsets = offsets
+        self._blob = blob
+        self._decoder = decoder
+
+    def raw(self, position: int) -> bytes:
+        return bytes(self._blob[self._offsets[position]:self._offsets[position + 1]])
+
+    def __getitem__(self, position: int) -> Any:
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        text = self.raw(position).decode("utf-8")
+        return self._decoder(text) if self._decoder else text
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class MappedDocuments(Mapping):
+    """Índice plano chave -> valor apoiado no arquivo mapeado."""
+
+    def __init__(self, keys: _MappedStrings, values: _MappedStrings):
+        self.keys_sequence = keys
+        self.values_sequence = values
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        # O mapa chave -> posição só é montado se alguém buscar por chave
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self.keys_sequence)}
+        return self.values_sequence[self._positions[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys_sequence)
+
+    def __len__(self) -> int:
+        return len(self.keys_sequence)
+
+
+class MappedInvertedIndex:
+    """
+    Versão somente leitura de InvertedIndex apoiada no arquivo mapeado
+
+    Oferece a mesma interface usada pelos scorers; termos são localizados por
+    busca binária no dicionário ordenado e os postings decodificados sob demanda.
+    """
+
+    def __init__(self, terms: _MappedStrings, postings_offsets: memoryview, postings: memoryview,
+                 doc_lengths: memoryview, doc_unique_counts: memoryview, total_length: int):
+        self._terms = terms
+        self._postings_offsets = postings_offsets
+        self._postings = postings
+        self.doc_lengths = doc_lengths
+        self.doc_unique_counts = doc_unique_counts
+        self.total_length = total_length
+
+    def _find(self, token: str) -> int:
+        target = token.encode("utf-8")
+        low, high = 0, len(self._terms)
+        while low < high:
+            middle = (low + high) // 2
+            if self._terms.raw(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._terms) and self._terms.raw(low) == target:
+            return low
+        return -1
+
+    def get_postings(self, token: str) -> Dict[int, int]:
+        position = self._find(token)
+        if position < 0:
+            return {}
+        start = self._postings_offsets[position] * 2
+        end = self._postings_offsets[position + 1] * 2
+        entries = self._postings[start:end]
+        return dict(zip(entries[0::2], entries[1::2]))
+
+    def document_frequency(self, token: str) -> int:
+        position = self._find(token)
+        if position < 0:
+            return 0
+        return self._postings_offsets[position + 1] - self._postings_offsets[position]
+
+    def matching_documents(self, tokens) -> Set[int]:
+        documents: Set[int] = set()
+        for token in tokens:
+            documents.update(self.get_postings(token))
+        return documents
+
+    def terms(self) -> Iterator[str]:
+        """Percorre o vocabulário do campo em ordem."""
+        return iter(self._terms)
+
+    @property
+    def num_documents(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def average_document_length(self) -> float:
+        if not len(self.doc_lengths):
+            return 0.0
+        return self.total_length / len(self.doc_lengths)
+
+
+class IndexFile:
+    """
+    Arquivo de índice aberto com mmap (somente leitura)
+
+    Feche com `close()` (ou use como context manager) ao trocar de índice;
+    depois disso as visões entregues (chaves, valores, campos) deixam de
+    poder ser lidas.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Visões sobre o mapeamento, liberadas em close()
+        self._views: List[memoryview] = []
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_size = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise KnowledgeBaseError(f"Arquivo de índice inválido: {path}")
+        if version != FORMAT_VERSION:
+            raise KnowledgeBaseError(f"Versão de índice não suportada: {version}")
+
+        header_end = _PREAMBLE.size + header_size
+        self.header = json.loads(self._mmap[_PREAMBLE.size:header_end].decode("utf-8"))
+        if self.header["byteorder"] != sys.byteorder:
+            raise KnowledgeBaseError("Índice gerado em máquina com ordem de bytes diferente")
+
+        self._data_start = header_end + (-header_end % _ALIGNMENT)
+        self._view = memoryview(self._mmap)
+        self.metadata: Dict[str, Any] = self.header["metadata"]
+        self.keys = self._strings("keys")
+        self.values = self._strings("values", json.loads)
+        self.documents = MappedDocuments(self.keys, self.values)
+
+    def _section(self, name: str, fmt: Optional[str] = None) -> memoryview:
+        offset, size = self.header["sections"][name]
+        start = self._data_start + offset
+        view = self._view[start:start + size]
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    @property
+    def closed(self) -> bool:
+        return self._mmap.closed
+
+    def close(self) -> None:
+        """Libera as visões e o mapeamento do arquivo; chamadas repetidas não fazem nada."""
+        if self._mmap.closed:
+            return
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Alguma fatia temporária ainda em uso: o mapeamento é desfeito quando ela for coletada
+            pass
+
+    def __enter__(self) -> 'IndexFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _strings(self, name: str, decoder: Callable[[str], Any] = None) -> _MappedStrings:
+        return _MappedStrings(self._section(f"{name}.offsets", "Q"), self._section(f"{name}.blob"), decoder)
+
+    @property
+    def documentation(self) -> str:
+        """Documentação original serializada em JSON."""
+        return bytes(self._section("documentation")).decode("utf-8")
+
+    def field(self, name: str) -> MappedInvertedIndex:
+        """Retorna o índice invertido de um campo compilado."""
+        if name not in self.header["fields"]:
+            raise KnowledgeBaseError(f"Campo não compilado no índice: {name}")
+        return MappedInvertedIndex(
+            terms=self._strings(f"{name}.terms"),
+            postings_offsets=self._section(f"{name}.postings.offsets", "Q"),
+            postings=self._section(f"{name}.postings", "I"),
+            doc_lengths=self._section(f"{name}.doc_lengths", "I"),
+            doc_unique_counts=self._section(f"{name}.doc_unique_counts", "I"),
+            total_length=self.header["fields"][name]["total_length"]
+        )
+
+
+def main() -> None:
+    """Compila um índice a partir de um JSON de documentação (uso offline)."""
+    parser = argparse.ArgumentParser(description="Compila o índice de busca da base de conhecimento")
+    parser.add_argument("documentation", help="Arquivo JSON da documentação")
+    parser.add_argument("output", help="Arquivo de índice a gerar")
+    parser.add_argument("--kind", choices=["hybrid", "knowledge"], default="hybrid",
+                        help="Base que vai abrir o índice (HybridKnowledgeBase ou KnowledgeBase)")
+    parser.add_argument("--scorer", default=None, help="Scorer usado na tokenização")
+    args = parser.parse_args()
+
+    if args.kind == "hybrid":
+        from .hydbrid_knowledge import HybridKnowledgeBase
+        HybridKnowledgeBase.compile_index(args.documentation, args.output, scorer=args.scorer or "overlap")
+    else:
+        from .knowledge import KnowledgeBase
+        with open(args.documentation, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        KnowledgeBase(data, scorer=args.scorer or "trigram").compile_index(args.output)
+
+    print(f"Índice gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
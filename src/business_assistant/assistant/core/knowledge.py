@@ -1,27 +1,174 @@
 # src/assistant/core/knowledge.py
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 from difflib import SequenceMatcher
+import heapq
 import json
+import threading
+from .executor import SearchExecutor
+from .index_store import IndexFile, write_index
+from .search_index import InvertedIndex, word_tokens
+from .scoring import Scorer, create_scorer
+from .trigram_index import TrigramIndex, VocabularyTrigramIndex
+from ..utils.exceptions import KnowledgeBaseError
+
+# Scorers de correspondência aproximada, que não usam o índice invertido
+FUZZY_SCORERS = ('trigram', 'sequence')
+
+# Marca um caminho removido durante uma atualização incremental
+_REMOVED = object()
+
+
+def _flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Gera pares (caminho, valor) das folhas de um dicionário aninhado."""
+    if not isinstance(value, dict):
+        yield prefix, value
+        return
+
+    for key, child in value.items():
+        yield from _flatten(child, f"{prefix}.{key}" if prefix else key)
 
 
 class KnowledgeBase:
-    def __init__(self, data_source: Dict[str, Any]):
-        self.data = data_source
-        self._create_search_index()
+    def __init__(self, data_source: Optional[Dict[str, Any]], scorer: Union[str, Scorer] = 'trigram',
+                 fuzzy_rerank: bool = True, fuzzy_min_similarity: float = 0.6,
+                 index_path: Optional[str] = None, executor: str = 'none',
+                 executor_workers: Optional[int] = None):
+        """
+        Args:
+            data_source: Dicionário com a base de conhecimento (pode ser None
+                quando index_path é informado)
+            scorer: 'trigram' (índice de trigramas), 'sequence' (SequenceMatcher
+                original), 'overlap', 'bm25' ou uma instância de Scorer
+            fuzzy_rerank: Reordena os candidatos do índice de trigramas pela
+                distância de edição exata
+            fuzzy_min_similarity: Similaridade mínima entre uma palavra da
+                consulta e um token para contar como correspondência
+            index_path: Índice pré-compilado (ver `compile_index`), aberto com
+                mmap em vez de reconstruir o índice a partir de data_source
+            executor: Onde rodar as buscas assíncronas: 'none', 'thread' ou 'process'
+            executor_workers: Tamanho do pool do executor (padrão: número de CPUs)
+        """
+        self._data = data_source
+        self._index_file: Optional[IndexFile] = None
+        self.scorer_name = scorer if isinstance(scorer, str) else scorer.name
+        self.scorer: Optional[Scorer] = None if scorer in FUZZY_SCORERS else create_scorer(scorer)
+        self.fuzzy_rerank = fuzzy_rerank
+        self.fuzzy_min_similarity = fuzzy_min_similarity
+        # Buscas no executor de threads e atualizações não podem ver o índice pela metade
+        self._lock = threading.RLock()
+
+        if index_path is not None:
+            self._open_index(index_path)
+        else:
+            self._create_search_index()
+        self.executor = SearchExecutor(executor, executor_workers, self._worker_spec)
+
+    def _worker_spec(self) -> Tuple[type, Dict[str, Any]]:
+        """Como montar, em outro processo, uma cópia desta base para busca."""
+        index_path = self._index_file.path if self._index_file is not None else None
+        return KnowledgeBase, {
+            'data_source': self.data if index_path is None else None,
+            'scorer': self.scorer if self.scorer is not None else self.scorer_name,
+            'fuzzy_rerank': self.fuzzy_rerank,
+            'fuzzy_min_similarity': self.fuzzy_min_similarity,
+            'index_path': index_path
+        }
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Base de conhecimento; com índice pré-compilado é carregada só quando usada."""
+        if self._data is None and self._index_file is not None:
+            self._data = json.loads(self._index_file.documentation)
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict[str, Any]) -> None:
+        self._data = value
 
     def _create_search_index(self) -> None:
         """Cria um índice plano para facilitar a busca."""
-        self.search_index = {}
+        self.search_index = dict(_flatten(self.data))
+        self._close_index()
+        self._build_inverted_index()
+
+    def _close_index(self) -> None:
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def _open_index(self, index_path: str) -> None:
+        """Usa um índice pré-compilado, lido sob demanda do arquivo mapeado."""
+        index_file = IndexFile(index_path)
+        compiled_scorer = index_file.metadata.get('scorer')
+        if index_file.metadata.get('kind') != 'knowledge' or compiled_scorer != self.scorer_name:
+            index_file.close()
+            raise KnowledgeBaseError(
+                f"Índice {index_path} foi compilado para {index_file.metadata}, "
+                f"mas a base usa o scorer '{self.scorer_name}'"
+            )
+
+        self._close_index()
+        self._index_file = index_file
+        self.search_index = index_file.documents
+        self._doc_keys = index_file.keys
+        self._doc_values = index_file.values
+        self._doc_ids = None
+        self._key_index = self._value_index = None
+        self._trigram_index = None
+
+        if self.scorer is not None:
+            self._key_index = index_file.field('key')
+            self._value_index = index_file.field('value')
+        elif self.scorer_name == 'trigram':
+            self._trigram_index = VocabularyTrigramIndex(index_file.field('text'))
+
+    def compile_index(self, output_path: str) -> None:
+        """
+        Grava o índice atual em um arquivo binário para abertura rápida via mmap.
+
+        Args:
+            output_path: Caminho do arquivo de índice
+        """
+        if self.scorer is not None:
+            fields = {
+                'key': lambda key, value: self.scorer.tokenize(key),
+                'value': lambda key, value: self.scorer.tokenize(str(value))
+            }
+        elif self.scorer_name == 'trigram':
+            fields = {'text': lambda key, value: word_tokens(f"{key} {value}")}
+        else:
+            fields = {}
+
+        write_index(output_path, dict(self.search_index.items()), fields, self.data,
+                    {'kind': 'knowledge', 'scorer': self.scorer_name})
+
+    def _build_inverted_index(self) -> None:
+        """Monta os índices (invertidos ou de trigramas) usados pelo scorer."""
+        self._doc_keys: List[Optional[str]] = list(self.search_index.keys())
+        self._doc_values: List[Any] = list(self.search_index.values())
+        self._doc_ids: Dict[str, int] = {key: doc_id for doc_id, key in enumerate(self._doc_keys)}
+        self._key_index = InvertedIndex()
+        self._value_index = InvertedIndex()
+        self._trigram_index = TrigramIndex()
 
-        def flatten_dict(d: Dict[str, Any], prefix: str = "") -> None:
-            for key, value in d.items():
-                new_key = f"{prefix}.{key}" if prefix else key
-                if isinstance(value, dict):
-                    flatten_dict(value, new_key)
-                else:
-                    self.search_index[new_key] = value
+        for doc_id, (key, value) in enumerate(self.search_index.items()):
+            self._index_document(doc_id, key, value)
 
-        flatten_dict(self.data)
+    def _index_document(self, doc_id: int, key: str, value: Any) -> None:
+        """Adiciona uma entrada do índice plano às estruturas do scorer."""
+        if self.scorer is not None:
+            self._key_index.add_document(doc_id, self.scorer.tokenize(key))
+            self._value_index.add_document(doc_id, self.scorer.tokenize(str(value)))
+        elif self.scorer_name == 'trigram':
+            self._trigram_index.add_document(doc_id, word_tokens(f"{key} {value}"))
+
+    def _unindex_document(self, doc_id: int, key: str, value: Any) -> None:
+        """Remove uma entrada do índice plano das estruturas do scorer."""
+        if self.scorer is not None:
+            self._key_index.remove_document(doc_id, self.scorer.tokenize(key))
+            self._value_index.remove_document(doc_id, self.scorer.tokenize(str(value)))
+        elif self.scorer_name == 'trigram':
+            self._trigram_index.remove_document(doc_id, word_tokens(f"{key} {value}"))
 
     def _calculate_similarity(self, query: str, text: str) -> float:
         """Calcula a similaridade entre a query e um texto."""
@@ -38,6 +185,47 @@ class KnowledgeBase:
         Returns:
             String contendo informações relevantes encontradas
         """
+        relevant_info = self.search(query, threshold)
+
+        if not relevant_info:
+            return "Não foram encontradas informações relevantes na base de conhecimento."
+
+        # Formata as informações encontradas
+        formatted_info = []
+        for info in relevant_info:
+            formatted_info.append(f"[{info['key']}]: {info['value']}")
+
+        return "\n".join(formatted_info)
+
+    async def get_relevant_info_async(self, query: str, threshold: float = 0.3) -> str:
+        """Versão assíncrona de `get_relevant_info`, executada no executor configurado."""
+        return await self.executor.run(self, 'get_relevant_info', query, threshold)
+
+    async def search_async(self, query: str, threshold: float = 0.3, limit: int = 3) -> List[Dict[str, Any]]:
+        """Versão assíncrona de `search`, executada no executor configurado."""
+        return await self.executor.run(self, 'search', query, threshold, limit)
+
+    def search(self, query: str, threshold: float = 0.3, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retorna as entradas mais relevantes para a query com o scorer configurado.
+
+        Args:
+            query: Texto da pergunta do usuário
+            threshold: Limiar mínimo de similaridade (0 a 1)
+            limit: Número máximo de entradas retornadas
+
+        Returns:
+            Lista de dicts com 'key', 'value' e 'score', do mais ao menos relevante
+        """
+        with self._lock:
+            if self.scorer_name == 'trigram':
+                return self._trigram_search(query, threshold, limit)
+            if self.scorer_name == 'sequence':
+                return self._sequence_search(query, threshold, limit)
+            return self._scored_search(query, threshold, limit)
+
+    def _sequence_search(self, query: str, threshold: float, limit: int = 3) -> List[Dict[str, Any]]:
+        """Busca original com SequenceMatcher sobre todas as entradas do índice."""
         relevant_info = []
 
         # Divide a query em palavras-chave
@@ -49,7 +237,7 @@ class KnowledgeBase:
             key_score = max(self._calculate_similarity(kw, key) for kw in keywords)
 
             # Verifica similaridade com o valor
-            value_score = max(self._calculate_similarity(kw, value) for kw in keywords)
+            value_score = max(self._calculate_similarity(kw, str(value)) for kw in keywords)
 
             # Usa o maior score entre chave e valor
             max_score = max(key_score, value_score)
@@ -64,33 +252,151 @@ class KnowledgeBase:
         # Ordena por relevância e formata a resposta
         relevant_info.sort(key=lambda x: x['score'], reverse=True)
 
-        if not relevant_info:
-            return "Não foram encontradas informações relevantes na base de conhecimento."
+        return relevant_info[:limit]
 
-        # Formata as informações encontradas
-        formatted_info = []
-        for info in relevant_info[:3]:  # Limita a 3 resultados mais relevantes
-            formatted_info.append(f"[{info['key']}]: {info['value']}")
+    def _trigram_search(self, query: str, threshold: float, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Busca aproximada via índice de trigramas
 
-        return "\n".join(formatted_info)
+        Cada palavra da consulta é comparada apenas com os tokens que
+        compartilham trigramas com ela. Como na busca original, o score de uma
+        entrada é o maior, entre as palavras da consulta, da melhor similaridade
+        encontrada na chave ou no valor, tolerando erros de digitação
+        ("cofp" -> "cfop").
+        """
+        keywords = word_tokens(query)
+        if not keywords:
+            return []
+
+        best: Dict[int, float] = {}
+        for keyword in keywords:
+            matches = self._trigram_index.search(keyword, self.fuzzy_min_similarity, self.fuzzy_rerank)
+            for doc_id, similarity in matches.items():
+                if similarity > best.get(doc_id, 0.0):
+                    best[doc_id] = similarity
+
+        candidates = ((doc_id, score) for doc_id, score in best.items() if score >= threshold)
+        return self._top_results(candidates, limit)
+
+    def _scored_search(self, query: str, threshold: float, limit: int = 3) -> List[Dict[str, Any]]:
+        """Busca via índice invertido usando o scorer configurado."""
+        query_tokens = self.scorer.tokenize(query)
+        key_scores = self.scorer.score(self._key_index, query_tokens)
+        value_scores = self.scorer.score(self._value_index, query_tokens)
+
+        candidates = []
+        for doc_id in key_scores.keys() | value_scores.keys():
+            max_score = max(key_scores.get(doc_id, 0.0), value_scores.get(doc_id, 0.0))
+            if max_score >= threshold:
+                candidates.append((doc_id, max_score))
+
+        return self._top_results(candidates, limit)
+
+    def _top_results(self, candidates: Iterable[Tuple[int, float]], limit: int) -> List[Dict[str, Any]]:
+        """
+        As `limit` entradas de maior score, sem ordenar todos os candidatos
+
+        Empates ficam com o menor doc_id (ordem de inserção), como na busca
+        original; só as entradas escolhidas viram dicts de resultado.
+        """
+        top = heapq.nlargest(limit, candidates, key=lambda candidate: (candidate[1], -candidate[0]))
+        return [{'key': self._doc_keys[doc_id], 'value': self._doc_values[doc_id], 'score': score}
+                for doc_id, score in top]
 
     def update_knowledge(self, new_data: Dict[str, Any]) -> None:
         """
         Atualiza a base de conhecimento com novas informações.
 
+        Apenas os caminhos alterados pela mesclagem são reindexados, então o
+        custo depende do tamanho da atualização e não da base inteira.
+
         Args:
             new_data: Dicionário com novos dados para adicionar/atualizar
         """
+        self.update_many([new_data])
+
+    def update_many(self, updates: List[Dict[str, Any]]) -> None:
+        """
+        Aplica várias atualizações em sequência com uma única mutação do índice.
+
+        Buscas concorrentes (executor 'thread') esperam a atualização terminar.
+
+        Args:
+            updates: Lista de dicionários, aplicados na ordem recebida
+
+        Raises:
+            KnowledgeBaseError: Se a base usa um índice pré-compilado (somente leitura)
+        """
+        if self._index_file is not None:
+            raise KnowledgeBaseError(
+                f"Índice pré-compilado {self._index_file.path} é somente leitura; "
+                "use import_knowledge ou recompile o índice para atualizar a base"
+            )
+
+        with self._lock:
+            changes: Dict[str, Any] = {}
+            for new_data in updates:
+                self._deep_update(self.data, new_data, "", changes)
+            self._apply_index_changes(changes)
+        # Processos do executor guardam uma cópia da base: recria-os na próxima busca
+        if self.executor.kind == 'process':
+            self.executor.reset()
+
+    @staticmethod
+    def _deep_update(source: Dict[str, Any], update_data: Dict[str, Any],
+                     prefix: str, changes: Dict[str, Any]) -> None:
+        """
+        Mescla update_data em source registrando os caminhos planos alterados
+
+        changes recebe caminho -> novo valor, ou _REMOVED para caminhos que
+        deixaram de existir.
+        """
+        for key, value in update_data.items():
+            path = f"{prefix}.{key}" if prefix else key
+            if key in source and isinstance(source[key], dict) and isinstance(value, dict):
+                KnowledgeBase._deep_update(source[key], value, path, changes)
+                continue
+
+            if key in source:
+                for old_path, _ in _flatten(source[key], path):
+                    changes[old_path] = _REMOVED
+            for new_path, new_value in _flatten(value, path):
+                changes[new_path] = new_value
+            source[key] = value
+
+    def _apply_index_changes(self, changes: Dict[str, Any]) -> None:
+        """
+        Atualiza índice plano e estruturas do scorer apenas nos caminhos alterados
+
+        Entradas removidas deixam posições vazias nas listas de documentos;
+        quando elas passam da metade, os índices são reconstruídos com doc_ids
+        contíguos (custo amortizado constante por remoção).
+        """
+        for path, new_value in changes.items():
+            doc_id = self._doc_ids.get(path)
+            if doc_id is not None:
+                self._unindex_document(doc_id, path, self.search_index[path])
+
+            if new_value is _REMOVED:
+                if doc_id is not None:
+                    del self.search_index[path]
+                    del self._doc_ids[path]
+                    self._doc_keys[doc_id] = None
+                    self._doc_values[doc_id] = None
+                continue
 
-        def deep_update(source: Dict[str, Any], update_data: Dict[str, Any]) -> None:
-            for key, value in update_data.items():
-                if key in source and isinstance(source[key], dict) and isinstance(value, dict):
-                    deep_update(source[key], value)
-                else:
-                    source[key] = value
+            if doc_id is None:
+                doc_id = len(self._doc_keys)
+                self._doc_keys.append(path)
+                self._doc_values.append(new_value)
+                self._doc_ids[path] = doc_id
+            self._doc_values[doc_id] = new_value
+            self.search_index[path] = new_value
+            self._index_document(doc_id, path, new_value)
 
-        deep_update(self.data, new_data)
-        self._create_search_index()  # Atualiza o índice de busca
+        removed = len(self._doc_keys) - len(self._doc_ids)
+        if removed * 2 > len(self._doc_keys):
+            self._build_inverted_index()
 
     def export_knowledge(self, file_path: str) -> None:
         """
@@ -111,8 +417,10 @@ class KnowledgeBase:
         """
         with open(file_path, 'r', encoding='utf-8') as f:
             new_data = json.load(f)
+        with self._lock:
             self.data = new_data
             self._create_search_index()
+        self.executor.reset()
 
     def get_categories(self) -> List[str]:
         """Retorna lista de categorias disponíveis na base de conhecimento."""
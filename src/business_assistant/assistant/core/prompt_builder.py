@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+from ..utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+class PromptBuilder:
+    """
+    Monta o prompt do assistente dentro de um orçamento de tokens
+
+    A mensagem entra sempre e o contexto é cortado ao que sobrar dela; os
+    trechos da base de conhecimento que couberem vêm em seguida e o histórico
+    ocupa o restante, das mensagens mais recentes para as mais antigas.
+    Mensagens que não cabem são resumidas (início de cada pergunta) e trechos
+    da base já presentes no histórico mantido não são repetidos. Os
+    resultados da base entram apenas como "[chave]: valor".
+    """
+
+    def __init__(self, token_budget: int = 3000, summary_budget: int = 200,
+                 summary_chars_per_turn: int = 120):
+        """
+        Args:
+            token_budget: Máximo de tokens (estimados) do prompt
+            summary_budget: Tokens reservados ao resumo das mensagens descartadas
+            summary_chars_per_turn: Caracteres de cada pergunta descartada no resumo
+        """
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summary_chars_per_turn = summary_chars_per_turn
+
+    @staticmethod
+    def snippets(results: Any) -> Dict[str, str]:
+        """Converte resultados da base (lista de dicts com 'key'/'value') em trechos por chave."""
+        if not isinstance(results, list):
+            return {}
+        return {str(r['key']): f"[{r['key']}]: {r['value']}" for r in results if 'key' in r}
+
+    @staticmethod
+    def _render_turn(turn: Dict[str, Any]) -> str:
+        if turn['role'] == 'assistant':
+            return f"Assistant: {turn['content']}"
+        knowledge = "".join(f"{text}\n" for text in turn.get('snippets', {}).values())
+        return f"{knowledge}User: {turn['content']}"
+
+    def build(self, message: str, context: Optional[Dict[str, Any]] = None,
+              snippets: Optional[Dict[str, str]] = None,
+              history: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Monta o prompt
+
+        Args:
+            message: Mensagem do usuário
+            context: Contexto da conversa (serializado em JSON compacto)
+            snippets: Trechos da base por chave (ver `snippets`), do mais ao menos relevante
+            history: Turnos anteriores: dicts com 'role' ('user'/'assistant'),
+                'content' e, nos turnos do usuário, 'snippets' enviados
+
+        Returns:
+            Tupla (prompt, estatísticas com tokens por seção, turnos
+            descartados e trechos deduplicados)
+        """
+        snippets = dict(snippets or {})
+        history = history or []
+        message_text = f"User message: {message}"
+        context_text, context_trimmed = self._context_text(context, self.token_budget - estimate_tokens(message_text))
+        fixed = estimate_tokens(context_text) + estimate_tokens(message_text)
+
+        # Sem histórico, descarta os trechos menos relevantes até caber no orçamento
+        while snippets and fixed + self._knowledge_tokens(snippets.values()) > self.token_budget:
+            snippets.popitem()
+
+        # Histórico: das mais recentes para as mais antigas, enquanto couber
+        available = self.token_budget - fixed
+        kept: List[Dict[str, Any]] = []
+        kept_keys = set()
+        history_tokens = 0
+        for position in range(len(history) - 1, -1, -1):
+            turn = history[position]
+            turn_tokens = estimate_tokens(self._render_turn(turn)) + 1
+            keys = kept_keys | set(turn.get('snippets', {}))
+            knowledge_tokens = self._knowledge_tokens(text for key, text in snippets.items() if key not in keys)
+            reserve = self.summary_budget if position > 0 else 0
+            if history_tokens + turn_tokens + knowledge_tokens + reserve > available:
+                break
+            kept.insert(0, turn)
+            kept_keys = keys
+            history_tokens += turn_tokens
+        if kept and kept[0]['role'] == 'assistant':
+            # Não começa o histórico por uma resposta sem a pergunta correspondente
+            kept.pop(0)
+        dropped = history[:len(history) - len(kept)]
+
+        new_snippets = [text for key, text in snippets.items() if key not in kept_keys]
+        knowledge_text = ("Knowledge base information:\n" + "\n".join(new_snippets) + "\n\n"
+                          if new_snippets else "")
+        history_text = ("Conversation history:\n" + "\n".join(self._render_turn(t) for t in kept) + "\n\n"
+                        if kept else "")
+        summary_text = self._summarize(dropped)
+
+        prompt = f"{context_text}{summary_text}{history_text}{knowledge_text}{message_text}"
+        sections = {
+            'context': estimate_tokens(context_text),
+            'summary': estimate_tokens(summary_text),
+            'history': estimate_tokens(history_text),
+            'knowledge': estimate_tokens(knowledge_text),
+            'message': estimate_tokens(message_text)
+        }
+        return prompt, {
+            'sections': sections,
+            'total_tokens': estimate_tokens(prompt),
+            'token_budget': self.token_budget,
+            'context_trimmed': context_trimmed,
+            'history_turns': len(kept),
+            'dropped_turns': len(dropped),
+            'deduplicated_snippets': len(snippets) - len(new_snippets)
+        }
+
+    @staticmethod
+    def _context_text(context: Optional[Dict[str, Any]], max_tokens: int) -> Tuple[str, bool]:
+        """Seção do contexto, cortada para caber em max_tokens; retorna (texto, se foi cortado)."""
+        if not context:
+            return "", False
+        serialized = json.dumps(context, ensure_ascii=False, default=str)
+        text = f"Previous context: {serialized}\n\n"
+        if estimate_tokens(text) <= max_tokens:
+            return text, False
+
+        # Mantém o início do JSON; sem espaço nem para o rótulo, omite o contexto
+        room = max_tokens * CHARS_PER_TOKEN - len("Previous context: ...\n\n")
+        if room <= 0:
+            return "", True
+        return f"Previous context: {serialized[:room]}...\n\n", True
+
+    @staticmethod
+    def _knowledge_tokens(texts) -> int:
+        texts = list(texts)
+        if not texts:
+            return 0
+        return estimate_tokens("Knowledge base information:\n" + "\n".join(texts) + "\n\n")
+
+    def _summarize(self, dropped: List[Dict[str, Any]]) -> str:
+        """Resumo extrativo local: o início de cada pergunta descartada, dentro do orçamento."""
+        questions = [turn['content'] for turn in dropped if turn['role'] == 'user']
+        if not questions:
+            return ""
+
+        max_chars = self.summary_budget * CHARS_PER_TOKEN
+        lines = []
+        for question in reversed(questions):
+            line = f"- {question[:self.summary_chars_per_turn]}"
+            if sum(len(l) + 1 for l in lines) + len(line) > max_chars:
+                break
+            lines.insert(0, line)
+        if not lines:
+            return ""
+        return "Earlier questions (summary):\n" + "\n".join(lines) + "\n\n"
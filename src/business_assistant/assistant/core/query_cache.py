@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import copy
+import re
+import time
+import unicodedata
+
+_punctuation_pattern = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza uma pergunta para uso como chave de cache
+
+    Remove acentos, pontuação, diferenças de caixa e espaços extras, de forma
+    que "Qual o CFOP para venda?" e "qual o cfop  para venda" coincidam.
+    """
+    decomposed = unicodedata.normalize("NFKD", query.lower())
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_punctuation_pattern.sub(" ", without_accents).split())
+
+
+class LRUCache:
+    """Cache LRU com expiração por TTL e estatísticas de uso."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Args:
+            max_size: Número máximo de entradas antes de descartar a menos usada
+            ttl: Tempo de vida de cada entrada em segundos (None para não expirar)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None se ausente/expirado."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando as entradas menos usadas se necessário."""
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas (as estatísticas são mantidas)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class QueryCache:
+    """
+    Cache de resultados de consultas do HybridKnowledgeBase
+
+    Resultados locais e da API ficam em caches LRU separados, cada um com seu
+    limite de tamanho, e as chaves são as perguntas normalizadas. Os valores
+    são copiados na entrada e na saída: quem altera um resultado recebido não
+    altera o cache nem o que os outros chamadores recebem.
+    """
+
+    def __init__(self, local_max_size: int = 1024, api_max_size: int = 256,
+                 ttl: Optional[float] = 300.0):
+        self.local = LRUCache(local_max_size, ttl)
+        self.api = LRUCache(api_max_size, ttl)
+
+    def get(self, mode: str, query: str) -> Optional[Any]:
+        """Busca o resultado de uma pergunta no cache do modo ('local' ou 'api')."""
+        value = self._cache_for(mode).get(normalize_query(query))
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, mode: str, query: str, value: Any) -> None:
+        """Armazena o resultado de uma pergunta no cache do modo ('local' ou 'api')."""
+        self._cache_for(mode).set(normalize_query(query), copy.deepcopy(value))
+
+    def clear(self) -> None:
+        """Invalida todos os resultados (ex.: quando a documentação muda)."""
+        self.local.clear()
+        self.api.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna as estatísticas dos caches local e da API."""
+        return {
+            "local": self.local.get_stats(),
+            "api": self.api.get_stats()
+        }
+
+    def _cache_for(self, mode: str) -> LRUCache:
+        if mode == 'local':
+            return self.local
+        if mode == 'api':
+            return self.api
+        raise ValueError(f"Modo de cache não suportado: {mode}")
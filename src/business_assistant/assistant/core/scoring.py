@@ -0,0 +1,113 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Union
+import math
+
+from .search_index import InvertedIndex, tokenize, word_tokens
+
+
+class Scorer(ABC):
+    """Classe base para estratégias de pontuação sobre um índice invertido."""
+
+    name = ""
+
+    def tokenize(self, text: str) -> List[str]:
+        """Tokenização usada tanto na construção do índice quanto nas consultas."""
+        return tokenize(text)
+
+    @abstractmethod
+    def score(self, index: InvertedIndex, query_tokens: List[str]) -> Dict[int, float]:
+        """
+        Pontua os documentos que compartilham termos com a consulta
+
+        Returns:
+            Dict doc_id -> score normalizado entre 0 e 1
+        """
+        pass
+
+
+class OverlapScorer(Scorer):
+    """
+    Pontuação original por sobreposição de palavras
+
+    Para cada palavra da consulta presente no documento o score é
+    1 / número de palavras distintas do documento.
+    """
+
+    name = "overlap"
+
+    def score(self, index: InvertedIndex, query_tokens: List[str]) -> Dict[int, float]:
+        return {
+            doc_id: 1 / max(1, index.doc_unique_counts[doc_id])
+            for doc_id in index.matching_documents(set(query_tokens))
+        }
+
+
+class BM25Scorer(Scorer):
+    """
+    Pontuação BM25 normalizada
+
+    Frequências de documento e comprimentos vêm do índice. O score bruto é
+    dividido pelo score de um documento de tamanho médio que contém uma vez
+    cada termo conhecido da consulta (limitado a 1), de modo que os limiares
+    de similaridade continuem comparáveis.
+    """
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def tokenize(self, text: str) -> List[str]:
+        return word_tokens(text)
+
+    def idf(self, index: InvertedIndex, token: str) -> float:
+        """IDF com suavização (sempre positivo)."""
+        df = index.document_frequency(token)
+        return math.log(1 + (index.num_documents - df + 0.5) / (df + 0.5))
+
+    def score(self, index: InvertedIndex, query_tokens: List[str]) -> Dict[int, float]:
+        average_length = index.average_document_length or 1.0
+        scores: Dict[int, float] = {}
+        max_score = 0.0
+
+        for token in dict.fromkeys(query_tokens):
+            postings = index.get_postings(token)
+            if not postings:
+                continue
+
+            idf = self.idf(index, token)
+            max_score += idf
+            for doc_id, frequency in postings.items():
+                length_norm = self.k1 * (1 - self.b + self.b * index.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = (scores.get(doc_id, 0.0) +
+                                  idf * frequency * (self.k1 + 1) / (frequency + length_norm))
+
+        if not max_score:
+            return {}
+        return {doc_id: min(1.0, score / max_score) for doc_id, score in scores.items()}
+
+
+_SCORERS = {
+    "overlap": OverlapScorer,
+    "bm25": BM25Scorer
+}
+
+
+def create_scorer(scorer: Union[str, Scorer]) -> Scorer:
+    """
+    Cria um scorer a partir do nome ou retorna a instância recebida
+
+    Args:
+        scorer: 'overlap', 'bm25' ou uma instância de Scorer
+
+    Returns:
+        Scorer pronto para uso
+    """
+    if isinstance(scorer, Scorer):
+        return scorer
+
+    if scorer not in _SCORERS:
+        raise ValueError(f"Scorer não suportado: {scorer}")
+
+    return _SCORERS[scorer]()
@@ -0,0 +1,78 @@
+from typing import Dict, List, Iterable, Set
+import re
+
+_word_pattern = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Quebra o texto em tokens (minúsculas separadas por espaço), como na busca original."""
+    return text.lower().split()
+
+
+def word_tokens(text: str) -> List[str]:
+    """Extrai palavras (minúsculas) de um texto, ignorando pontuação."""
+    return _word_pattern.findall(text.lower())
+
+
+class InvertedIndex:
+    """Índice invertido token -> postings (doc_id -> frequência do token no documento)."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_unique_counts: Dict[int, int] = {}
+        self.total_length = 0
+
+    def add_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Adiciona um documento já tokenizado ao índice."""
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for token, frequency in frequencies.items():
+            self.postings.setdefault(token, {})[doc_id] = frequency
+
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_unique_counts[doc_id] = len(frequencies)
+        self.total_length += len(tokens)
+
+    def remove_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Remove um documento do índice a partir dos mesmos tokens usados na inserção."""
+        if doc_id not in self.doc_lengths:
+            return
+
+        for token in set(tokens):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[token]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.doc_unique_counts[doc_id]
+
+    def get_postings(self, token: str) -> Dict[int, int]:
+        """Retorna os postings de um token (vazio se o token não existir)."""
+        return self.postings.get(token, {})
+
+    def document_frequency(self, token: str) -> int:
+        """Número de documentos que contêm o token."""
+        return len(self.postings.get(token, ()))
+
+    def matching_documents(self, tokens: Iterable[str]) -> Set[int]:
+        """Documentos que compartilham ao menos um token com a consulta."""
+        documents: Set[int] = set()
+        for token in tokens:
+            documents.update(self.postings.get(token, ()))
+        return documents
+
+    @property
+    def num_documents(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def average_document_length(self) -> float:
+        if not self.doc_lengths:
+            return 0.0
+        return self.total_length / len(self.doc_lengths)
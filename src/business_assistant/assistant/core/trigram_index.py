@@ -0,0 +1,204 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Set
+
+from ..utils.exceptions import KnowledgeBaseError
+
+
+def trigrams(token: str) -> Set[str]:
+    """Trigramas de caracteres de um token, com preenchimento nas bordas."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(source: str, target: str, max_distance: Optional[int] = None) -> int:
+    """
+    Distância de edição com transposições (Damerau-Levenshtein restrita)
+
+    Com `max_distance`, para assim que a distância certamente o excede e
+    retorna max_distance + 1.
+    """
+    if max_distance is not None and abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_row = None
+    row = list(range(len(target) + 1))
+
+    for i in range(1, len(source) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1,
+                         row[j - 1] + 1,
+                         previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+
+        # As próximas linhas só crescem a partir destas duas
+        if max_distance is not None and min(row) > max_distance and min(previous_row) > max_distance:
+            return max_distance + 1
+
+    if max_distance is not None:
+        return min(row[-1], max_distance + 1)
+    return row[-1]
+
+
+class TrigramIndex:
+    """
+    Índice de trigramas sobre o vocabulário dos documentos
+
+    Guarda trigrama -> tokens e token -> documentos, de forma que uma palavra
+    da consulta (mesmo com erro de digitação) só é comparada com os tokens
+    que compartilham algum trigrama com ela.
+    """
+
+    def __init__(self):
+        self.trigram_tokens: Dict[str, Set[str]] = {}
+        self.token_documents: Dict[str, Set[int]] = {}
+        self.token_trigram_counts: Dict[str, int] = {}
+
+    def add_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Adiciona os tokens de um documento ao índice."""
+        for token in set(tokens):
+            documents = self.token_documents.get(token)
+            if documents is None:
+                documents = self.token_documents[token] = set()
+                token_trigrams = trigrams(token)
+                self.token_trigram_counts[token] = len(token_trigrams)
+                for trigram in token_trigrams:
+                    self.trigram_tokens.setdefault(trigram, set()).add(token)
+            documents.add(doc_id)
+
+    def remove_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Remove um documento; tokens que ficam sem documentos saem do vocabulário."""
+        for token in set(tokens):
+            documents = self.token_documents.get(token)
+            if documents is None:
+                continue
+            documents.discard(doc_id)
+            if documents:
+                continue
+
+            del self.token_documents[token]
+            del self.token_trigram_counts[token]
+            for trigram in trigrams(token):
+                trigram_tokens = self.trigram_tokens.get(trigram)
+                if trigram_tokens is None:
+                    continue
+                trigram_tokens.discard(token)
+                if not trigram_tokens:
+                    del self.trigram_tokens[trigram]
+
+    def similar_tokens(self, keyword: str, min_similarity: float = 0.3,
+                       rerank: bool = True) -> Dict[str, float]:
+        """
+        Encontra tokens do vocabulário parecidos com a palavra
+
+        Args:
+            keyword: Palavra da consulta
+            min_similarity: Similaridade mínima (0 a 1) para manter um token
+            rerank: Se True, recalcula a similaridade dos candidatos pela
+                distância de edição exata; caso contrário usa o coeficiente
+                de Dice dos trigramas
+
+        Returns:
+            Dict token -> similaridade
+        """
+        keyword_trigrams = trigrams(keyword)
+        shared_counts: Dict[str, int] = {}
+        for trigram in keyword_trigrams:
+            for token in self.trigram_tokens.get(trigram, ()):
+                shared_counts[token] = shared_counts.get(token, 0) + 1
+
+        similar = {}
+        for token, shared in shared_counts.items():
+            if rerank:
+                longest = max(len(keyword), len(token))
+                # A diferença de tamanho é um limite inferior da distância de edição
+                if 1 - abs(len(keyword) - len(token)) / longest < min_similarity:
+                    continue
+                # Cada edição destrói no máximo 3 trigramas da palavra (4 numa
+                # transposição): com poucos trigramas em comum, a distância
+                # permitida é impossível e o token nem chega à distância de edição
+                max_distance = int((1 - min_similarity) * longest + 1e-9)
+                if shared < len(keyword_trigrams) - 4 * max_distance:
+                    continue
+                distance = edit_distance(keyword, token, max_distance)
+                if distance > max_distance:
+                    continue
+                similarity = 1 - distance / longest
+            else:
+                similarity = 2 * shared / (len(keyword_trigrams) + self.token_trigram_counts[token])
+
+            if similarity >= min_similarity:
+                similar[token] = similarity
+
+        return similar
+
+    def search(self, keyword: str, min_similarity: float = 0.3,
+               rerank: bool = True) -> Dict[int, float]:
+        """Retorna doc_id -> melhor similaridade entre a palavra e os tokens do documento."""
+        scores: Dict[int, float] = {}
+        for token, similarity in self.similar_tokens(keyword, min_similarity, rerank).items():
+            for doc_id in self.token_documents[token]:
+                if similarity > scores.get(doc_id, 0.0):
+                    scores[doc_id] = similarity
+        return scores
+
+
+class _PostingsDocuments(Mapping):
+    """Visão token -> documentos sobre os postings de um índice invertido."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __getitem__(self, token: str) -> Set[int]:
+        postings = self._index.get_postings(token)
+        if not postings:
+            raise KeyError(token)
+        return set(postings)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._index.terms()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._index.terms())
+
+
+class VocabularyTrigramIndex(TrigramIndex):
+    """
+    Índice de trigramas somente leitura sobre um índice invertido existente
+
+    Usado com índices pré-compilados: os documentos de cada token vêm dos
+    postings do índice e os trigramas do vocabulário só são montados na
+    primeira consulta.
+    """
+
+    def __init__(self, index):
+        super().__init__()
+        self._index = index
+        self._vocabulary_loaded = False
+        self.token_documents = _PostingsDocuments(index)
+
+    def _load_vocabulary(self) -> None:
+        for token in self._index.terms():
+            token_trigrams = trigrams(token)
+            self.token_trigram_counts[token] = len(token_trigrams)
+            for trigram in token_trigrams:
+                self.trigram_tokens.setdefault(trigram, set()).add(token)
+        self._vocabulary_loaded = True
+
+    def add_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Não suportado: o índice pré-compilado é somente leitura."""
+        raise KnowledgeBaseError("Índice de trigramas pré-compilado é somente leitura; recompile o índice")
+
+    def remove_document(self, doc_id: int, tokens: List[str]) -> None:
+        """Não suportado: o índice pré-compilado é somente leitura."""
+        raise KnowledgeBaseError("Índice de trigramas pré-compilado é somente leitura; recompile o índice")
+
+    def similar_tokens(self, keyword: str, min_similarity: float = 0.3,
+                       rerank: bool = True) -> Dict[str, float]:
+        if not self._vocabulary_loaded:
+            self._load_vocabulary()
+        return super().similar_tokens(keyword, min_similarity, rerank)
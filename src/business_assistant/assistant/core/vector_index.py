@@ -0,0 +1,174 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Busca exata (força bruta) por produto interno
+
+    Returns:
+        Tupla (posições, scores) dos k vetores mais próximos, do maior ao menor score
+    """
+    scores = vectors @ query
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    order = np.argsort(-scores[top])
+    return top[order], scores[top[order]]
+
+
+class IVFIndex:
+    """
+    Índice vetorial aproximado do tipo IVF (inverted file)
+
+    Os vetores são agrupados por k-means esférico em `n_lists` listas; uma
+    consulta só compara os vetores das `n_probe` listas de centróides mais
+    próximos. Aumentar n_probe melhora o recall e aumenta a latência.
+    Espera vetores normalizados (produto interno = cosseno).
+    """
+
+    def __init__(self, dimensions: int, n_lists: Optional[int] = None, n_probe: int = 8,
+                 kmeans_iterations: int = 10, seed: int = 0):
+        """
+        Args:
+            dimensions: Dimensão dos vetores
+            n_lists: Número de listas (padrão: raiz do número de vetores no build)
+            n_probe: Listas visitadas por consulta (compromisso recall/velocidade)
+            kmeans_iterations: Iterações do k-means no build
+            seed: Semente para reprodutibilidade
+        """
+        self.dimensions = dimensions
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids = np.zeros((0, dimensions), dtype=np.float32)
+        self._list_vectors: List[np.ndarray] = []
+        self._list_ids: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._list_ids)
+
+    def _train(self, vectors: np.ndarray, n_lists: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        # Treina em uma amostra para o build não crescer com o tamanho da base
+        sample_size = min(len(vectors), 256 * n_lists)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+                else:
+                    centroids[cluster] = sample[rng.integers(len(sample))]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+
+        return centroids
+
+    def build(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """
+        Treina os centróides e indexa os vetores, substituindo o conteúdo atual
+
+        Args:
+            vectors: Matriz (n, dimensions)
+            ids: Identificadores dos vetores (padrão: 0..n-1)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+
+        self.centroids = (self._train(vectors, n_lists) if len(vectors)
+                          else np.zeros((0, self.dimensions), dtype=np.float32))
+        self._list_vectors = [np.zeros((0, self.dimensions), dtype=np.float32) for _ in range(len(self.centroids))]
+        self._list_ids = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self.add(vectors, ids)
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
+        """
+        Adiciona vetores incrementalmente (sem retreinar os centróides)
+
+        Args:
+            vectors: Matriz (n, dimensions)
+            ids: Identificadores dos vetores (padrão: continua a numeração atual)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        if not len(self.centroids):
+            self.build(vectors, ids)
+            return
+
+        if ids is None:
+            ids = np.arange(len(self), len(self) + len(vectors), dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int64)
+
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        for cluster in np.unique(assignments):
+            mask = assignments == cluster
+            self._list_vectors[cluster] = np.concatenate([self._list_vectors[cluster], vectors[mask]])
+            self._list_ids[cluster] = np.concatenate([self._list_ids[cluster], ids[mask]])
+
+    def ids(self) -> np.ndarray:
+        """Identificadores de todos os vetores do índice, em ordem crescente."""
+        if not self._list_ids:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(self._list_ids))
+
+    def search(self, query: np.ndarray, k: int = 10,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca os k vetores mais próximos da consulta
+
+        Args:
+            query: Vetor (dimensions,)
+            k: Número de resultados
+            n_probe: Sobrescreve o n_probe do índice nesta consulta
+
+        Returns:
+            Tupla (ids, scores), do maior ao menor score
+        """
+        if not len(self.centroids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32)
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        candidate_vectors = np.concatenate([self._list_vectors[probe] for probe in probes])
+        candidate_ids = np.concatenate([self._list_ids[probe] for probe in probes])
+        positions, scores = exact_search(candidate_vectors, query, k)
+        return candidate_ids[positions], scores
+
+    def save(self, path: str) -> None:
+        """Grava o índice em um arquivo .npz."""
+        list_sizes = np.array([len(ids) for ids in self._list_ids], dtype=np.int64)
+        np.savez(
+            path,
+            config=np.array([self.dimensions, self.n_lists or 0, self.n_probe,
+                             self.kmeans_iterations, self.seed], dtype=np.int64),
+            centroids=self.centroids,
+            list_sizes=list_sizes,
+            vectors=(np.concatenate(self._list_vectors) if self._list_vectors
+                     else np.zeros((0, self.dimensions), dtype=np.float32)),
+            ids=(np.concatenate(self._list_ids) if self._list_ids else np.zeros(0, dtype=np.int64))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        """Carrega um índice gravado com `save`."""
+        with np.load(path) as data:
+            dimensions, n_lists, n_probe, iterations, seed = (int(v) for v in data["config"])
+            index = cls(dimensions, n_lists or None, n_probe, iterations, seed)
+            index.centroids = data["centroids"]
+            if len(index.centroids):
+                boundaries = np.cumsum(data["list_sizes"])[:-1]
+                index._list_vectors = list(np.split(data["vectors"], boundaries))
+                index._list_ids = list(np.split(data["ids"], boundaries))
+        return index
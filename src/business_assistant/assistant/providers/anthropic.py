@@ -1,45 +1,116 @@
-from typing import Dict, Any, Optional
-import anthropic
+from typing import Dict, Any, AsyncIterator, Optional
 from .base import BaseAssistantProvider
 from ..core.hydbrid_knowledge import HybridKnowledgeBase
+from ..core.prompt_builder import PromptBuilder
+from ..utils.clients import ClientRegistry, get_client_registry
 from ..utils.context import ContextManager
+from ..utils.exceptions import ProviderError
+from ..utils.scheduler import RequestScheduler
+from ..utils.single_flight import SingleFlight
+from ..utils.streaming import anthropic_text_deltas
+from ..utils.tokens import estimate_tokens
 
 
 class AnthropicAssistant(BaseAssistantProvider):
     """Implementação do assistente usando Claude (Anthropic)."""
 
+    provider_name = "anthropic"
+
     def __init__(self,
                  knowledge_base: HybridKnowledgeBase,
                  api_key: str,
-                 model: str = "claude-3-opus-20240229"):
+                 model: str = "claude-3-opus-20240229",
+                 base_url: Optional[str] = None,
+                 client_registry: Optional[ClientRegistry] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 priority: str = "interactive",
+                 context_manager: Optional[ContextManager] = None,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 max_history_turns: int = 50,
+                 single_flight: Optional[SingleFlight] = None):
         super().__init__(knowledge_base, {
             "model": model,
             "api_key": api_key
-        })
-        self.client = anthropic.Client(api_key=api_key)
-        self.context_manager = ContextManager()
+        }, scheduler, priority, prompt_builder, max_history_turns, single_flight)
+        registry = client_registry or get_client_registry()
+        self.client = registry.get_client("anthropic", api_key, base_url, asynchronous=False)
+        self.async_client = registry.get_client("anthropic", api_key, base_url)
+        self.context_manager = context_manager or ContextManager()
 
     async def prepare_prompt(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
-        context_info = ""
-        if context:
-            context_info = f"Previous context: {context}\n\n"
+        prompt, _ = await self._prepare(message, context)
+        return prompt
 
-        kb_info = self.knowledge_base.get_info(message)
+    async def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None):
+        """Retorna (resultado da API ou prompt local, trechos da base usados no prompt)."""
+        kb_info = await self.knowledge_base.get_info_async(message)
 
         if kb_info["mode_used"] == 'api':
-            return kb_info["results"]
+            return kb_info["results"], {}
 
-        return f"{context_info}Knowledge base information: {kb_info}\n\nUser message: {message}"
+        snippets = PromptBuilder.snippets(kb_info["results"])
+        return self._build_prompt(message, context, snippets), snippets
 
     async def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
-        prompt = await self.prepare_prompt(message, context)
-        return prompt['response']
-        # response = await self.client.messages.create(
-        #     model=self.model_config["model"],
-        #     messages=[{"role": "user", "content": prompt}]
-        # )
-        #
-        # return response.content[0].text
+        return await self._coalesce(message, context, lambda: self._chat(message, context))
+
+    async def _chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        prompt, snippets = await self._prepare(message, context)
+
+        if isinstance(prompt, dict):
+            # A base de conhecimento já respondeu pela API
+            if 'error' in prompt:
+                raise ProviderError(f"Erro na API da base de conhecimento: {prompt['error']}")
+            answer = prompt.get('response', '')
+        else:
+            async with self._slot(estimate_tokens(prompt) + 1000):
+                response = await self.async_client.messages.create(
+                    model=self.model_config["model"],
+                    max_tokens=1000,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            answer = response.content[0].text
+
+        self._remember(message, snippets, answer)
+        return answer
+
+    async def _stream_response(self, message: str,
+                               context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Produz a resposta em streaming
+
+        Se a busca local não for suficiente, a resposta vem do streaming da
+        API da base de conhecimento; caso contrário o modelo do assistente
+        responde a partir do prompt com os resultados locais.
+        """
+        kb_info = await self.knowledge_base.get_info_async(message, force_mode='local')
+        parts = []
+
+        if self.knowledge_base.needs_api(kb_info["results"]):
+            snippets = {}
+            deltas = self.knowledge_base.stream_api_search(message)
+            try:
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield delta
+            finally:
+                await deltas.aclose()
+        else:
+            snippets = PromptBuilder.snippets(kb_info["results"])
+            prompt = self._build_prompt(message, context, snippets)
+            async with self._slot(estimate_tokens(prompt) + 1000):
+                events = await self.async_client.messages.create(
+                    model=self.model_config["model"],
+                    max_tokens=1000,
+                    messages=[{"role": "user", "content": prompt}],
+                    stream=True
+                )
+                async with events:
+                    async for delta in anthropic_text_deltas(events):
+                        parts.append(delta)
+                        yield delta
+
+        self._remember(message, snippets, "".join(parts))
 
     async def load_context(self, context_id: str) -> Dict[str, Any]:
         """Carrega o contexto da conversa."""
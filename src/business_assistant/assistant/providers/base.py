@@ -1,20 +1,81 @@
 from abc import abstractmethod
-from typing import Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
+import json
 from ..core.base import AssistantBase
 from ..core.hydbrid_knowledge import HybridKnowledgeBase
+from ..core.prompt_builder import PromptBuilder
+from ..utils.scheduler import RequestScheduler, get_scheduler
+from ..utils.single_flight import SingleFlight, get_single_flight, request_key
 
 
 class BaseAssistantProvider(AssistantBase):
     """Classe base para providers específicos."""
 
+    # Nome do provider no agendador de chamadas
+    provider_name = ""
+
     def __init__(self,
                  knowledge_base: HybridKnowledgeBase,
-                 model_config: Dict[str, Any]):
+                 model_config: Dict[str, Any],
+                 scheduler: Optional[RequestScheduler] = None,
+                 priority: str = "interactive",
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 max_history_turns: int = 50,
+                 single_flight: Optional[SingleFlight] = None):
         super().__init__(knowledge_base)
         self.model_config = model_config
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.max_history_turns = max_history_turns
         self.conversation_history = []
+        # Tokens por seção do último prompt montado
+        self.last_prompt_stats: Optional[Dict[str, Any]] = None
+        # Perguntas idênticas simultâneas, inclusive de outras instâncias com o
+        # mesmo provider, modelo e histórico, compartilham uma única chamada
+        self.single_flight = single_flight or get_single_flight()
 
     @abstractmethod
     async def prepare_prompt(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Prepara o prompt com base na mensagem e contexto."""
-        pass
\ No newline at end of file
+        pass
+
+    async def _coalesce(self, message: str, context: Optional[Dict[str, Any]],
+                        func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executa func() via single-flight
+
+        A chave combina provider, configuração do modelo, mensagem normalizada,
+        contexto e histórico. Quem recebe a resposta de outra instância também
+        registra o turno no próprio histórico.
+        """
+        history = [(turn["role"], turn["content"]) for turn in self.conversation_history]
+        key = (self.provider_name,
+               json.dumps(self.model_config, sort_keys=True, default=str),
+               request_key(message, context, history))
+
+        async def run():
+            return await func(), self
+
+        answer, owner = await self.single_flight.do(key, run)
+        if owner is not self:
+            self._remember(message, {}, answer)
+        return answer
+
+    def _slot(self, tokens: int):
+        """Vaga no agendador para uma chamada ao modelo do assistente."""
+        return self.scheduler.acquire(self.provider_name, self.model_config["model"], tokens, self.priority)
+
+    def _build_prompt(self, message: str, context: Optional[Dict[str, Any]],
+                      snippets: Dict[str, str]) -> str:
+        """Monta o prompt dentro do orçamento de tokens, usando o histórico da conversa."""
+        prompt, self.last_prompt_stats = self.prompt_builder.build(
+            message, context, snippets, self.conversation_history
+        )
+        return prompt
+
+    def _remember(self, message: str, snippets: Dict[str, str], response: str) -> None:
+        """Registra o turno no histórico, mantendo no máximo max_history_turns mensagens."""
+        self.conversation_history.append({"role": "user", "content": message, "snippets": snippets})
+        self.conversation_history.append({"role": "assistant", "content": response})
+        del self.conversation_history[:-self.max_history_turns]
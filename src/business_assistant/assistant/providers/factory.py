@@ -1,25 +1,61 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Type
 from .base import BaseAssistantProvider
 from .anthropic import AnthropicAssistant
+from .failover import FailoverAssistant
+from .mock import MockAssistant
 from .openai import OpenAIAssistant
 from ..core.knowledge import KnowledgeBase
+from ..utils.clients import ClientRegistry, get_client_registry
 
 
 class AssistantFactory:
 
-    @staticmethod
+    _providers: Dict[str, Type[BaseAssistantProvider]] = {
+        "anthropic": AnthropicAssistant,
+        "openai": OpenAIAssistant,
+        "mock": MockAssistant
+    }
+
+    @classmethod
     def create_assistant(
+            cls,
             provider: str,
             knowledge_base: KnowledgeBase,
-            config: Dict[str, Any]
+            config: Dict[str, Any],
+            client_registry: Optional[ClientRegistry] = None
     ) -> BaseAssistantProvider:
-        providers = {
-            "anthropic": AnthropicAssistant,
-            "openai": OpenAIAssistant
-        }
-
-        if provider not in providers:
+        if provider not in cls._providers:
             raise ValueError(f"Provider não suportado: {provider}")
 
-        assistant_class = providers[provider]
-        return assistant_class(knowledge_base=knowledge_base, **config)
\ No newline at end of file
+        assistant_class = cls._providers[provider]
+        # Assistentes com o mesmo provider, chave e URL compartilham o pool de conexões
+        return assistant_class(knowledge_base=knowledge_base,
+                               client_registry=client_registry or get_client_registry(),
+                               **config)
+
+    @classmethod
+    def register_provider(cls, name: str, assistant_class: Type[BaseAssistantProvider]):
+        """Registra um novo provider de assistente"""
+        cls._providers[name] = assistant_class
+
+    @staticmethod
+    def create_failover_assistant(
+            providers: List[Dict[str, Any]],
+            client_registry: Optional[ClientRegistry] = None,
+            **failover_options
+    ) -> FailoverAssistant:
+        """
+        Cria um assistente com failover entre vários providers
+
+        Args:
+            providers: Em ordem de preferência, dicts com 'provider',
+                'knowledge_base' e 'config' (os argumentos de create_assistant)
+            client_registry: Registro de clientes compartilhado
+            **failover_options: Opções de FailoverAssistant (latency_sla, hedge_percentile, ...)
+        """
+        assistants = [
+            AssistantFactory.create_assistant(spec["provider"], spec["knowledge_base"],
+                                              spec.get("config", {}), client_registry)
+            for spec in providers
+        ]
+        return FailoverAssistant(assistants, **failover_options)
@@ -0,0 +1,220 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+import asyncio
+import time
+
+import numpy as np
+
+from .base import BaseAssistantProvider
+from ..core.base import AssistantBase
+from ..utils.exceptions import ProviderError
+
+
+class ProviderHealth:
+    """Latências observadas e estado de saúde de um provider."""
+
+    def __init__(self, window: int = 100, failure_threshold: int = 3, cooldown: float = 30.0):
+        """
+        Args:
+            window: Quantas latências recentes entram nos percentis
+            failure_threshold: Falhas (ou lentidões) seguidas até marcar como degradado
+            cooldown: Segundos em que um provider degradado é evitado
+        """
+        self.latencies = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.degraded_until = 0.0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def degraded(self) -> bool:
+        return time.monotonic() < self.degraded_until
+
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        """
+        Registra uma falha; `latency` é o tempo gasto até ela, que entra nos
+        percentis (falhas lentas, como timeouts, também atrasam o usuário)
+        """
+        if latency is not None:
+            self.latencies.append(latency)
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.degraded_until = time.monotonic() + self.cooldown
+            self.consecutive_failures = 0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, percentile))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "degraded": self.degraded,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95)
+        }
+
+
+class FailoverAssistant(AssistantBase):
+    """
+    Assistente composto com failover e requisições de hedge
+
+    Os providers são tentados em ordem de preferência, pulando os
+    degradados. Se o provider atual não responder dentro do atraso de hedge
+    (percentil `hedge_percentile` das suas latências observadas, limitado ao
+    SLA), uma requisição de reserva é disparada no próximo; uma falha também
+    dispara o próximo. Vale a primeira resposta bem-sucedida e as demais são
+    canceladas, inclusive a chamada ao provider quando nenhum outro chamador
+    coalescido a aguarda. Falhas e respostas acima do SLA contam para a saúde
+    do provider, assim como perder uma corrida de hedge depois de ter
+    estourado o próprio atraso.
+    """
+
+    def __init__(self, providers: List[BaseAssistantProvider], latency_sla: float = 10.0,
+                 hedge_percentile: float = 95.0, default_hedge_delay: float = 2.0,
+                 min_hedge_delay: float = 0.05, min_samples: int = 10,
+                 failure_threshold: int = 3, degraded_cooldown: float = 30.0, window: int = 100):
+        """
+        Args:
+            providers: Providers em ordem de preferência
+            latency_sla: Latência alvo em segundos; respostas mais lentas contam como lentidão
+            hedge_percentile: Percentil das latências do provider usado como atraso de hedge
+            default_hedge_delay: Atraso de hedge enquanto não há amostras suficientes
+            min_hedge_delay: Menor atraso de hedge permitido
+            min_samples: Amostras necessárias para usar o percentil observado
+            failure_threshold: Falhas seguidas até o provider ser evitado
+            degraded_cooldown: Segundos em que um provider degradado é evitado
+            window: Latências recentes consideradas por provider
+        """
+        if not providers:
+            raise ValueError("FailoverAssistant requer ao menos um provider")
+
+        super().__init__(providers[0].knowledge_base)
+        self.providers = providers
+        self.latency_sla = latency_sla
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.health = [ProviderHealth(window, failure_threshold, degraded_cooldown) for _ in providers]
+        self.hedges = 0
+        self.failovers = 0
+        self.backup_wins = 0
+
+    def hedge_delay(self, index: int) -> float:
+        """Tempo de espera pelo provider antes de disparar a requisição de reserva."""
+        health = self.health[index]
+        if len(health.latencies) < self.min_samples:
+            delay = self.default_hedge_delay
+        else:
+            delay = health.percentile(self.hedge_percentile)
+        return max(self.min_hedge_delay, min(delay, self.latency_sla))
+
+    def _candidates(self) -> List[int]:
+        healthy = [i for i, health in enumerate(self.health) if not health.degraded]
+        # Com todos degradados, tenta mesmo assim na ordem original
+        return healthy or list(range(len(self.providers)))
+
+    async def _call(self, index: int, message: str, context: Optional[Dict[str, Any]]) -> str:
+        health = self.health[index]
+        health.requests += 1
+        start = time.monotonic()
+        try:
+            response = await self.providers[index].chat(message, context)
+        except asyncio.CancelledError:
+            # Perdeu a corrida depois do próprio atraso de hedge: conta como lentidão
+            elapsed = time.monotonic() - start
+            if elapsed >= self.hedge_delay(index):
+                health.record_failure(elapsed)
+            raise
+        except Exception:
+            health.record_failure(time.monotonic() - start)
+            raise
+
+        latency = time.monotonic() - start
+        health.record_success(latency)
+        if latency > self.latency_sla:
+            health.record_failure()
+        return response
+
+    async def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        candidates = self._candidates()
+        running: Dict[asyncio.Task, int] = {}
+        errors: List[str] = []
+
+        def launch() -> Optional[int]:
+            if not candidates:
+                return None
+            index = candidates.pop(0)
+            running[asyncio.ensure_future(self._call(index, message, context))] = index
+            return index
+
+        current = first = launch()
+        try:
+            while running:
+                timeout = self.hedge_delay(current) if candidates else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Sem resposta dentro do atraso de hedge: dispara a reserva
+                    self.hedges += 1
+                    current = launch()
+                    continue
+
+                # Uma resposta no mesmo lote que uma falha vence: sem failover desnecessário
+                succeeded = [task for task in running if task in done and task.exception() is None]
+                if succeeded:
+                    index = running.pop(succeeded[0])
+                    if index != first:
+                        self.backup_wins += 1
+                    return succeeded[0].result()
+
+                for task in done:
+                    index = running.pop(task)
+                    errors.append(f"{type(self.providers[index]).__name__}: {task.exception()}")
+
+                    if candidates:
+                        # Cada falha passa ao próximo, mesmo com outra requisição em andamento
+                        self.failovers += 1
+                        current = launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise ProviderError(f"Todos os providers falharam: {'; '.join(errors)}")
+
+    async def load_context(self, context_id: str) -> Dict[str, Any]:
+        """Carrega o contexto da conversa pelo provider principal."""
+        return await self.providers[0].load_context(context_id)
+
+    async def save_context(self, context_id: str, context: Dict[str, Any]) -> None:
+        """Salva o contexto da conversa pelo provider principal."""
+        await self.providers[0].save_context(context_id, context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna saúde e latências por provider e os contadores de hedges
+        (reservas por atraso), failovers (reservas por falha) e respostas
+        vindas de um provider que não era o primeiro da tentativa
+        """
+        return {
+            "providers": {
+                f"{i}:{type(provider).__name__}": {**self.health[i].as_dict(), "hedge_delay": self.hedge_delay(i)}
+                for i, provider in enumerate(self.providers)
+            },
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "backup_wins": self.backup_wins
+        }
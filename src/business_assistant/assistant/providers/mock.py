@@ -0,0 +1,101 @@
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
+from .base import BaseAssistantProvider
+from ..core.hydbrid_knowledge import HybridKnowledgeBase
+from ..core.knowledge import KnowledgeBase
+from ..core.prompt_builder import PromptBuilder
+from ..utils.context import ContextManager
+from ..utils.mock_llm import MockLLM
+from ..utils.scheduler import RequestScheduler
+from ..utils.single_flight import SingleFlight
+from ..utils.tokens import estimate_tokens
+
+
+class MockAssistant(BaseAssistantProvider):
+    """
+    Assistente com modelo simulado (MockLLM), para benchmarks offline
+
+    Faz a busca local, a montagem do prompt, o agendamento e o histórico como
+    os assistentes reais; só a chamada ao modelo é simulada. A base de
+    conhecimento é consultada apenas em modo local, sem chamadas à API.
+    """
+
+    provider_name = "mock"
+
+    def __init__(self,
+                 knowledge_base: Union[HybridKnowledgeBase, KnowledgeBase],
+                 model: str = "mock-model",
+                 llm: Optional[MockLLM] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 priority: str = "interactive",
+                 context_manager: Optional[ContextManager] = None,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 max_history_turns: int = 50,
+                 single_flight: Optional[SingleFlight] = None,
+                 **mock_options):
+        """
+        Args:
+            llm: Modelo simulado; se omitido, é criado com `mock_options`
+                (distribution, ttft, tokens_per_second, error_rate, ...)
+        """
+        super().__init__(knowledge_base, {
+            "model": model
+        }, scheduler, priority, prompt_builder, max_history_turns, single_flight)
+        # Aceita e ignora as opções de conexão dos assistentes reais
+        for option in ("api_key", "base_url", "client_registry"):
+            mock_options.pop(option, None)
+        self.llm = llm or MockLLM(**mock_options)
+        self.context_manager = context_manager or ContextManager()
+        # Uso de tokens da última resposta simulada
+        self.last_usage: Dict[str, int] = {}
+
+    async def _local_results(self, message: str) -> List[Dict[str, Any]]:
+        if isinstance(self.knowledge_base, KnowledgeBase):
+            return await self.knowledge_base.search_async(message)
+        kb_info = await self.knowledge_base.get_info_async(message, force_mode='local')
+        return kb_info["results"]
+
+    async def prepare_prompt(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        prompt, _ = await self._prepare(message, context)
+        return prompt
+
+    async def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None):
+        """Retorna (prompt, trechos da base usados no prompt)."""
+        snippets = PromptBuilder.snippets(await self._local_results(message))
+        return self._build_prompt(message, context, snippets), snippets
+
+    async def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        return await self._coalesce(message, context, lambda: self._chat(message, context))
+
+    async def _chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        prompt, snippets = await self._prepare(message, context)
+
+        usage: Dict[str, int] = {}
+        async with self._slot(estimate_tokens(prompt)):
+            answer = await self.llm.complete_async(prompt, usage)
+        self.last_usage = usage
+
+        self._remember(message, snippets, answer)
+        return answer
+
+    async def _stream_response(self, message: str,
+                               context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        prompt, snippets = await self._prepare(message, context)
+        parts = []
+        usage: Dict[str, int] = {}
+
+        async with self._slot(estimate_tokens(prompt)):
+            async for delta in self.llm.stream_async(prompt, usage):
+                parts.append(delta)
+                yield delta
+        self.last_usage = usage
+
+        self._remember(message, snippets, "".join(parts))
+
+    async def load_context(self, context_id: str) -> Dict[str, Any]:
+        """Carrega o contexto da conversa."""
+        context = await self.context_manager.load(context_id)
+        return context if context else {}
+
+    async def save_context(self, context_id: str, context: Dict[str, Any]) -> None:
+        """Salva o contexto da conversa."""
+        await self.context_manager.save(context_id, context)
@@ -1,41 +1,86 @@
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
+from typing import Dict, Any, AsyncIterator, Optional
 from .base import BaseAssistantProvider
 from ..core.knowledge import KnowledgeBase
+from ..core.prompt_builder import PromptBuilder
+from ..utils.clients import ClientRegistry, get_client_registry
 from ..utils.context import ContextManager
+from ..utils.scheduler import RequestScheduler
+from ..utils.single_flight import SingleFlight
+from ..utils.streaming import openai_text_deltas
+from ..utils.tokens import estimate_tokens
 
 
 class OpenAIAssistant(BaseAssistantProvider):
     """Implementação do assistente usando GPT (OpenAI)."""
 
+    provider_name = "openai"
+
     def __init__(self,
                  knowledge_base: KnowledgeBase,
                  api_key: str,
-                 model: str = "gpt-4-turbo-preview"):
+                 model: str = "gpt-4-turbo-preview",
+                 base_url: Optional[str] = None,
+                 client_registry: Optional[ClientRegistry] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 priority: str = "interactive",
+                 context_manager: Optional[ContextManager] = None,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 max_history_turns: int = 50,
+                 max_tokens: int = 1000,
+                 single_flight: Optional[SingleFlight] = None):
         super().__init__(knowledge_base, {
             "model": model,
-            "api_key": api_key
-        })
-        self.client = AsyncOpenAI(api_key=api_key)
-        self.context_manager = ContextManager()
+            "api_key": api_key,
+            "max_tokens": max_tokens
+        }, scheduler, priority, prompt_builder, max_history_turns, single_flight)
+        self.client = (client_registry or get_client_registry()).get_client("openai", api_key, base_url)
+        self.context_manager = context_manager or ContextManager()
 
     async def prepare_prompt(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
-        context_info = ""
-        if context:
-            context_info = f"Previous context: {context}\n\n"
+        prompt, _ = await self._prepare(message, context)
+        return prompt
 
-        kb_info = self.knowledge_base.get_relevant_info(message)
-        return f"{context_info}Knowledge base information: {kb_info}\n\nUser message: {message}"
+    async def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None):
+        """Retorna (prompt, trechos da base usados no prompt)."""
+        snippets = PromptBuilder.snippets(await self.knowledge_base.search_async(message))
+        return self._build_prompt(message, context, snippets), snippets
 
     async def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
-        prompt = await self.prepare_prompt(message, context)
+        return await self._coalesce(message, context, lambda: self._chat(message, context))
+
+    async def _chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        prompt, snippets = await self._prepare(message, context)
+
+        # A reserva de tokens inclui a saída máxima, como nos limites da API
+        async with self._slot(estimate_tokens(prompt) + self.model_config["max_tokens"]):
+            response = await self.client.chat.completions.create(
+                model=self.model_config["model"],
+                max_tokens=self.model_config["max_tokens"],
+                messages=[{"role": "user", "content": prompt}]
+            )
+
+        answer = response.choices[0].message.content
+        self._remember(message, snippets, answer)
+        return answer
+
+    async def _stream_response(self, message: str,
+                               context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        prompt, snippets = await self._prepare(message, context)
+        parts = []
 
-        response = await self.client.chat.completions.create(
-            model=self.model_config["model"],
-            messages=[{"role": "user", "content": prompt}]
-        )
+        async with self._slot(estimate_tokens(prompt) + self.model_config["max_tokens"]):
+            stream = await self.client.chat.completions.create(
+                model=self.model_config["model"],
+                max_tokens=self.model_config["max_tokens"],
+                messages=[{"role": "user", "content": prompt}],
+                stream=True
+            )
+            async with stream:
+                async for delta in openai_text_deltas(stream):
+                    parts.append(delta)
+                    yield delta
 
-        return response.choices[0].message.content
+        self._remember(message, snippets, "".join(parts))
 
     async def load_context(self, context_id: str) -> Dict[str, Any]:
         """Carrega o contexto da conversa."""
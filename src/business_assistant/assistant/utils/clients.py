@@ -0,0 +1,241 @@
+"""
+Registro de clientes HTTP compartilhados entre assistentes e bases de conhecimento
+
+Clientes são identificados por (provider, api_key, base_url) e reaproveitam o
+mesmo pool de conexões httpx, evitando um handshake TLS e um conjunto de
+sockets por instância. Os limites do pool, keep-alive e HTTP/2 são
+configurados no registro; HTTP/2 requer o pacote `h2` (httpx[http2]).
+"""
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import importlib
+import threading
+
+import httpx
+
+# Provider e modo (assíncrono?) -> (módulo, classe) do SDK
+_CLIENT_CLASSES = {
+    ("anthropic", False): ("anthropic", "Anthropic"),
+    ("anthropic", True): ("anthropic", "AsyncAnthropic"),
+    ("openai", False): ("openai", "OpenAI"),
+    ("openai", True): ("openai", "AsyncOpenAI"),
+}
+
+
+class _PoolStats:
+    """Contadores de uso de um pool de conexões."""
+
+    def __init__(self, max_connections: Optional[int]):
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.waits = 0
+        self._lock = threading.Lock()
+
+    def begin(self) -> None:
+        with self._lock:
+            # Sem conexão livre no pool, a requisição espera por uma
+            if self.max_connections is not None and self.in_flight >= self.max_connections:
+                self.waits += 1
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _open_connections(transport: Any) -> int:
+    pool = getattr(transport, "_pool", None)
+    return len(getattr(pool, "connections", ()) or ())
+
+
+class _CountingMixin:
+    """Conta as requisições em andamento no transporte síncrono."""
+
+    def __init__(self, stats: _PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: Any) -> Any:
+        self.stats.begin()
+        try:
+            return super().handle_request(request)
+        finally:
+            self.stats.end()
+
+
+class _AsyncCountingMixin:
+    """Conta as requisições em andamento no transporte assíncrono."""
+
+    def __init__(self, stats: _PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: Any) -> Any:
+        self.stats.begin()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.stats.end()
+
+
+# (módulo httpx, assíncrono?) -> transporte com contagem
+_TRANSPORT_CLASSES: Dict[Tuple[str, bool], type] = {}
+
+
+def _http_client_class(sdk: Any, asynchronous: bool) -> Tuple[type, Any]:
+    """
+    Classe de cliente HTTP que o SDK aceita e o módulo httpx em que ela se baseia
+
+    Os SDKs recusam clientes de outro pacote httpx (ex.: SDKs baseados em um
+    fork como o httpx2), então o cliente é criado pela fábrica do próprio SDK
+    (DefaultHttpxClient/DefaultAsyncHttpxClient) e o transporte vem do mesmo
+    módulo. SDKs sem essa fábrica usam o httpx diretamente.
+    """
+    client_class = getattr(sdk, "DefaultAsyncHttpxClient" if asynchronous else "DefaultHttpxClient", None)
+    if client_class is None:
+        return (httpx.AsyncClient if asynchronous else httpx.Client), httpx
+
+    sdk_root = sdk.__name__.split(".")[0]
+    for base in client_class.__mro__[1:]:
+        root = base.__module__.split(".")[0]
+        if root not in (sdk_root, "builtins"):
+            return client_class, importlib.import_module(root)
+    return client_class, httpx
+
+
+def _transport_class(http_module: Any, asynchronous: bool) -> type:
+    key = (http_module.__name__, asynchronous)
+    if key not in _TRANSPORT_CLASSES:
+        if asynchronous:
+            bases = (_AsyncCountingMixin, http_module.AsyncHTTPTransport)
+        else:
+            bases = (_CountingMixin, http_module.HTTPTransport)
+        _TRANSPORT_CLASSES[key] = type("_CountingTransport", bases, {})
+    return _TRANSPORT_CLASSES[key]
+
+
+class ClientRegistry:
+    """Entrega clientes de SDK compartilhados, um pool de conexões por chave."""
+
+    def __init__(self, max_connections: Optional[int] = 100, max_keepalive_connections: Optional[int] = 20,
+                 keepalive_expiry: Optional[float] = 30.0, http2: bool = False, timeout: float = 60.0):
+        """
+        Args:
+            max_connections: Conexões simultâneas por pool (None para ilimitado)
+            max_keepalive_connections: Conexões ociosas mantidas abertas por pool
+            keepalive_expiry: Segundos até fechar uma conexão ociosa
+            http2: Habilita HTTP/2 (multiplexa requisições na mesma conexão)
+            timeout: Timeout padrão das requisições em segundos
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+        self._clients: Dict[Tuple[str, Optional[str], Optional[str], bool], Any] = {}
+        # Chave -> (cliente httpx, transporte, estatísticas)
+        self._pools: Dict[Tuple[str, Optional[str], Optional[str], bool], Tuple[Any, Any, _PoolStats]] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, provider: str, api_key: Optional[str] = None,
+                   base_url: Optional[str] = None, asynchronous: bool = True) -> Any:
+        """
+        Retorna o cliente compartilhado do provider, criando-o no primeiro uso
+
+        Args:
+            provider: 'anthropic' ou 'openai'
+            api_key: Chave da API
+            base_url: URL base alternativa (padrão: a do SDK)
+            asynchronous: Cliente assíncrono (AsyncAnthropic/AsyncOpenAI) ou síncrono
+        """
+        if (provider, asynchronous) not in _CLIENT_CLASSES:
+            raise ValueError(f"Provider não suportado: {provider}")
+
+        key = (provider, api_key, base_url, asynchronous)
+        with self._lock:
+            if key not in self._clients:
+                module_name, class_name = _CLIENT_CLASSES[(provider, asynchronous)]
+                sdk = importlib.import_module(module_name)
+                client_class = getattr(sdk, class_name)
+                http_client_class, http_module = _http_client_class(sdk, asynchronous)
+
+                stats = _PoolStats(self.max_connections)
+                limits = http_module.Limits(max_connections=self.max_connections,
+                                            max_keepalive_connections=self.max_keepalive_connections,
+                                            keepalive_expiry=self.keepalive_expiry)
+                transport = _transport_class(http_module, asynchronous)(stats, limits=limits, http2=self.http2)
+                http_client = http_client_class(transport=transport, timeout=self.timeout)
+
+                kwargs = {"api_key": api_key, "http_client": http_client}
+                if base_url is not None:
+                    kwargs["base_url"] = base_url
+
+                self._clients[key] = client_class(**kwargs)
+                self._pools[key] = (http_client, transport, stats)
+            return self._clients[key]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna estatísticas de cada pool
+
+        A chave de cada entrada é "provider[-async]@base_url#hash-da-chave", sem
+        expor a chave da API. 'waits' conta requisições que encontraram o pool
+        cheio e precisaram esperar por uma conexão.
+        """
+        stats = {}
+        with self._lock:
+            for key, (_, transport, pool_stats) in self._pools.items():
+                provider, api_key, base_url, asynchronous = key
+                key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:8]
+                name = f"{provider}{'-async' if asynchronous else ''}@{base_url or 'default'}#{key_hash}"
+                stats[name] = {
+                    "open_connections": _open_connections(transport),
+                    "in_flight": pool_stats.in_flight,
+                    "peak_in_flight": pool_stats.peak_in_flight,
+                    "requests": pool_stats.requests,
+                    "waits": pool_stats.waits,
+                    "max_connections": pool_stats.max_connections
+                }
+        return stats
+
+    def close(self) -> None:
+        """Fecha os pools síncronos e descarta todos os clientes."""
+        with self._lock:
+            for key, (http_client, _, _) in self._pools.items():
+                if not key[3]:
+                    http_client.close()
+            self._clients.clear()
+            self._pools.clear()
+
+    async def aclose(self) -> None:
+        """Fecha todos os pools (síncronos e assíncronos) e descarta os clientes."""
+        with self._lock:
+            pools = list(self._pools.items())
+            self._clients.clear()
+            self._pools.clear()
+        for key, (http_client, _, _) in pools:
+            if key[3]:
+                await http_client.aclose()
+            else:
+                http_client.close()
+
+
+_default_registry: Optional[ClientRegistry] = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """Retorna o registro padrão do processo, compartilhado por assistentes e bases."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ClientRegistry()
+    return _default_registry
+
+
+def set_client_registry(registry: ClientRegistry) -> None:
+    """Substitui o registro padrão (ex.: para ajustar limites do pool ou habilitar HTTP/2)."""
+    global _default_registry
+    _default_registry = registry
@@ -1,21 +1,324 @@
-from typing import Dict, Any, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import json
+import sqlite3
+import time
+
+
+def _context_size(context: Dict[str, Any]) -> int:
+    """Tamanho aproximado do contexto em bytes (JSON serializado)."""
+    return len(json.dumps(context, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class ContextBackend(ABC):
+    """Interface de armazenamento dos contextos de conversa."""
+
+    @abstractmethod
+    async def load(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o contexto ou None."""
+        pass
+
+    @abstractmethod
+    async def save(self, context_id: str, context: Dict[str, Any]) -> None:
+        """Grava o contexto."""
+        pass
+
+    @abstractmethod
+    async def delete(self, context_id: str) -> None:
+        """Remove o contexto, se existir."""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas de tamanho e uso."""
+        pass
+
+
+class MemoryContextBackend(ContextBackend):
+    """
+    Contextos em memória com descarte LRU
+
+    Limita o número de contextos e o total de bytes (tamanho do JSON de cada
+    contexto) e expira contextos sem acesso há mais de `ttl` segundos.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 ttl: Optional[float] = 3600.0):
+        """
+        Args:
+            max_entries: Número máximo de contextos (None para não limitar)
+            max_bytes: Orçamento total em bytes (None para não limitar)
+            ttl: Segundos sem acesso até o contexto expirar (None para não expirar)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, Optional[float]]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Versão síncrona de `load`."""
+        entry = self._entries.get(context_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        context, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(context_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries[context_id] = (context, size, self._expires_at())
+        self._entries.move_to_end(context_id)
+        return context
+
+    def put(self, context_id: str, context: Dict[str, Any]) -> None:
+        """Versão síncrona de `save`."""
+        self._remove(context_id)
+        size = _context_size(context)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Nunca caberia no orçamento: não é guardado em memória
+            self.evictions += 1
+            return
+
+        self._entries[context_id] = (context, size, self._expires_at())
+        self.total_bytes += size
+        while ((self.max_entries is not None and len(self._entries) > self.max_entries) or
+               (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def discard(self, context_id: str) -> None:
+        """Versão síncrona de `delete`."""
+        self._remove(context_id)
+
+    async def load(self, context_id: str) -> Optional[Dict[str, Any]]:
+        return self.get(context_id)
+
+    async def save(self, context_id: str, context: Dict[str, Any]) -> None:
+        self.put(context_id, context)
+
+    async def delete(self, context_id: str) -> None:
+        self.discard(context_id)
+
+    def _expires_at(self) -> Optional[float]:
+        return time.monotonic() + self.ttl if self.ttl is not None else None
+
+    def _remove(self, context_id: str) -> None:
+        entry = self._entries.pop(context_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class SQLiteContextBackend(ContextBackend):
+    """
+    Contextos persistidos em SQLite, compartilháveis entre processos
+
+    Todo acesso ao banco roda em uma thread dedicada, fora do event loop. As
+    gravações são acumuladas e enviadas em lote (uma transação) depois de
+    `flush_interval` segundos ou ao atingir `batch_size`; um cache em memória
+    (MemoryContextBackend) atende as leituras repetidas sem ir ao banco.
+    Chame `close()` ao encerrar para gravar o que estiver pendente.
+    """
+
+    def __init__(self, path: str, cache: Optional[MemoryContextBackend] = None,
+                 flush_interval: float = 0.05, batch_size: int = 100,
+                 ttl: Optional[float] = None):
+        """
+        Args:
+            path: Arquivo do banco SQLite
+            cache: Cache em memória (padrão: MemoryContextBackend com os limites padrão)
+            flush_interval: Segundos que uma gravação pode esperar para ir ao banco
+            batch_size: Gravações pendentes que disparam o envio imediato do lote
+            ttl: Segundos desde a última gravação até o contexto expirar no banco
+        """
+        self.path = path
+        self.cache = cache if cache is not None else MemoryContextBackend()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+        # context_id -> JSON serializado, ou None para remoção
+        self._pending: Dict[str, Optional[str]] = {}
+        # Lotes já enviados à thread do banco e ainda não gravados, do mais antigo ao mais novo
+        self._writing: List[Dict[str, Optional[str]]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.db_reads = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS contexts ("
+                "context_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _read(self, context_id: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT data, updated_at FROM contexts WHERE context_id = ?", (context_id,)
+        ).fetchone()
+        if row is None or (self.ttl is not None and row[1] + self.ttl <= time.time()):
+            return None
+        return row[0]
+
+    def _write(self, batch: Dict[str, Optional[str]]) -> None:
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO contexts (context_id, data, updated_at) VALUES (?, ?, ?)",
+                [(context_id, data, now) for context_id, data in batch.items() if data is not None]
+            )
+            connection.executemany(
+                "DELETE FROM contexts WHERE context_id = ?",
+                [(context_id,) for context_id, data in batch.items() if data is None]
+            )
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def load(self, context_id: str) -> Optional[Dict[str, Any]]:
+        context = self.cache.get(context_id)
+        if context is not None:
+            return context
+
+        found, data = self._unwritten(context_id)
+        if not found:
+            self.db_reads += 1
+            data = await self._run(self._read, context_id)
+            # Um save/delete durante a leitura vale mais que a linha lida do banco
+            found, newer = self._unwritten(context_id)
+            if found:
+                data = newer
+        if data is None:
+            return None
+
+        context = json.loads(data)
+        self.cache.put(context_id, context)
+        return context
+
+    def _unwritten(self, context_id: str) -> Tuple[bool, Optional[str]]:
+        """Procura a última alteração ainda não gravada no banco: (encontrada, JSON ou None)."""
+        for batch in [self._pending] + self._writing[::-1]:
+            if context_id in batch:
+                return True, batch[context_id]
+        return False, None
+
+    async def save(self, context_id: str, context: Dict[str, Any]) -> None:
+        self.cache.put(context_id, context)
+        self._pending[context_id] = json.dumps(context, ensure_ascii=False, default=str)
+        self._schedule_flush()
+
+    async def delete(self, context_id: str) -> None:
+        self.cache.discard(context_id)
+        self._pending[context_id] = None
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            delay = 0.0
+        elif self._flush_task is None or self._flush_task.done():
+            delay = self.flush_interval
+        else:
+            return
+        self._flush_task = asyncio.ensure_future(self._delayed_flush(delay))
+
+    async def _delayed_flush(self, delay: float) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Grava imediatamente as alterações pendentes em uma única transação."""
+        if not self._pending:
+            return
+        # O lote continua visível para `load` até a transação terminar
+        batch, self._pending = self._pending, {}
+        self._writing.append(batch)
+        try:
+            await self._run(self._write, batch)
+        except BaseException:
+            # Não perde as alterações: voltam para o próximo lote, salvo as já substituídas
+            self._pending = {**batch, **self._pending}
+            raise
+        finally:
+            self._writing.remove(batch)
+        self.flushes += 1
+        self.rows_written += len(batch)
+
+    async def close(self) -> None:
+        """Grava o que estiver pendente e fecha o banco."""
+        await self.flush()
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cache": self.cache.get_stats(),
+            "pending_writes": len(self._pending),
+            "db_reads": self.db_reads,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written
+        }
 
 
 class ContextManager:
     """Gerencia o contexto das conversas do assistente."""
 
-    def __init__(self):
-        self.contexts = {}
+    def __init__(self, backend: Optional[ContextBackend] = None):
+        """
+        Args:
+            backend: Armazenamento dos contextos (padrão: em memória, sem limites
+                nem expiração, durante toda a vida do processo; para descarte
+                LRU/TTL passe um MemoryContextBackend configurado)
+        """
+        self.backend = backend if backend is not None else MemoryContextBackend(max_entries=None, max_bytes=None, ttl=None)
 
     async def load(self, context_id: str) -> Optional[Dict[str, Any]]:
         """Carrega um contexto específico."""
-        return self.contexts.get(context_id)
+        return await self.backend.load(context_id)
 
     async def save(self, context_id: str, context: Dict[str, Any]) -> None:
         """Salva um contexto específico."""
-        self.contexts[context_id] = context
+        await self.backend.save(context_id, context)
 
     async def clear(self, context_id: str) -> None:
         """Limpa um contexto específico."""
-        if context_id in self.contexts:
-            del self.contexts[context_id]
\ No newline at end of file
+        await self.backend.delete(context_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna as métricas do armazenamento (tamanho, acertos, descartes)."""
+        return self.backend.get_stats()
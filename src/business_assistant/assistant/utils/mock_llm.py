@@ -0,0 +1,423 @@
+"""
+LLM simulado para benchmarks determinísticos e offline
+
+`MockLLM` gera respostas com latência, TTFT, ritmo de streaming, erros, 429 e
+contagem de tokens configuráveis, sem rede. A latência amostrada
+(fixa, lognormal ou reproduzida de um arquivo) é o tempo até o primeiro
+token; com `tokens_per_second` a geração dos tokens de saída soma tempo.
+`MockLLMServer` expõe o mesmo comportamento em um servidor HTTP local que fala
+os formatos da Messages API (/v1/messages) e da Chat Completions
+(/v1/chat/completions), inclusive SSE, para apontar os SDKs reais para ele:
+
+    Anthropic(api_key="mock", base_url=server.url, max_retries=0)
+    OpenAI(api_key="mock", base_url=server.url + "/v1", max_retries=0)
+
+Também pode rodar isolado:
+    python -m business_assistant.assistant.utils.mock_llm --port 8080 --ttft 0.3
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import threading
+import time
+
+from .exceptions import ProviderError
+from .tokens import estimate_tokens
+
+# Palavras curtas (cerca de um token cada) usadas no texto das respostas
+_WORDS = ("o ", "imposto ", "de ", "nota ", "fiscal ", "que ", "ICMS ", "para ", "um ", "valor ")
+
+
+class MockLLMError(ProviderError):
+    """Erro simulado do servidor (HTTP 500)."""
+
+    status = 500
+    error_type = "api_error"
+
+
+class MockRateLimitError(MockLLMError):
+    """Limite de taxa simulado (HTTP 429)."""
+
+    status = 429
+    error_type = "rate_limit_error"
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def load_replay(path: str) -> List[float]:
+    """
+    Lê latências (segundos) para reprodução
+
+    Aceita um valor por linha, uma lista JSON ou o JSON de
+    LatencyTester.export_results no modo exato (chave 'raw_latencies').
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return [float(line) for line in content.split() if line]
+    if isinstance(data, dict):
+        data = data.get("raw_latencies", [])
+    return [float(value) for value in data]
+
+
+class MockReply:
+    """Plano de uma resposta simulada: erro ou trechos, tempos e tokens."""
+
+    def __init__(self, ttft: float, chunks: List[str], gap: float, input_tokens: int,
+                 error: Optional[MockLLMError] = None):
+        self.ttft = ttft
+        self.chunks = chunks
+        self.gap = gap
+        self.input_tokens = input_tokens
+        self.output_tokens = len(chunks)
+        self.error = error
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        return {"input_tokens": self.input_tokens, "output_tokens": self.output_tokens}
+
+
+class MockLLM:
+    """Gera respostas simuladas com distribuição de latência configurável."""
+
+    def __init__(self, distribution: str = "fixed", ttft: float = 0.2, sigma: float = 0.5,
+                 replay_file: Optional[str] = None, tokens_per_second: Optional[float] = None,
+                 output_tokens: Union[int, Tuple[int, int]] = 50, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 response_text: Optional[str] = None, seed: Optional[int] = None):
+        """
+        Args:
+            distribution: 'fixed', 'lognormal' ou 'replay'
+            ttft: Tempo até o primeiro token em segundos (mediana no lognormal)
+            sigma: Desvio padrão do log da latência no lognormal
+            replay_file: Arquivo de latências reproduzidas em ordem, em ciclo (ver load_replay)
+            tokens_per_second: Ritmo do streaming (None: todos os tokens de uma vez)
+            output_tokens: Tokens de saída, fixo ou faixa (mínimo, máximo)
+            error_rate: Fração de respostas com erro 500 (após o TTFT)
+            rate_limit_rate: Fração de respostas 429 (imediatas)
+            retry_after: Valor do cabeçalho retry-after das respostas 429
+            response_text: Texto fixo da resposta (padrão: palavras geradas)
+            seed: Semente para sequências reprodutíveis
+        """
+        if distribution not in ("fixed", "lognormal", "replay"):
+            raise ValueError(f"Distribuição não suportada: {distribution}")
+        if distribution == "replay" and not replay_file:
+            raise ValueError("A distribuição 'replay' requer replay_file")
+
+        self.distribution = distribution
+        self.ttft = ttft
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.response_text = response_text
+        self._replay = itertools.cycle(load_replay(replay_file)) if replay_file else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def _sample_ttft(self) -> float:
+        if self.distribution == "replay":
+            return next(self._replay)
+        if self.distribution == "lognormal":
+            return self._rng.lognormvariate(math.log(self.ttft), self.sigma)
+        return self.ttft
+
+    def _chunks(self) -> List[str]:
+        if self.response_text is not None:
+            # Trechos de ~4 caracteres (cerca de um token cada)
+            return [self.response_text[i:i + 4] for i in range(0, len(self.response_text), 4)]
+        if isinstance(self.output_tokens, int):
+            count = self.output_tokens
+        else:
+            count = self._rng.randint(*self.output_tokens)
+        return [_WORDS[i % len(_WORDS)] for i in range(count)]
+
+    def plan(self, prompt: str) -> MockReply:
+        """Sorteia o resultado de uma requisição."""
+        with self._lock:
+            self.requests += 1
+            draw = self._rng.random()
+            input_tokens = estimate_tokens(prompt)
+            if draw < self.rate_limit_rate:
+                error = MockRateLimitError("Limite de taxa simulado", self.retry_after)
+                return MockReply(0.0, [], 0.0, input_tokens, error)
+
+            ttft = self._sample_ttft()
+            if draw < self.rate_limit_rate + self.error_rate:
+                return MockReply(ttft, [], 0.0, input_tokens, MockLLMError("Erro simulado do servidor"))
+
+            chunks = self._chunks()
+        gap = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return MockReply(ttft, chunks, gap, input_tokens)
+
+    def stream(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """Produz os trechos no ritmo simulado (bloqueante)."""
+        reply = self.plan(prompt)
+        time.sleep(reply.ttft)
+        if reply.error is not None:
+            raise reply.error
+        for position, chunk in enumerate(reply.chunks):
+            if position and reply.gap:
+                time.sleep(reply.gap)
+            yield chunk
+        if usage is not None:
+            usage.update(reply.usage)
+
+    async def stream_async(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        """Versão assíncrona de `stream`."""
+        reply = self.plan(prompt)
+        await asyncio.sleep(reply.ttft)
+        if reply.error is not None:
+            raise reply.error
+        for position, chunk in enumerate(reply.chunks):
+            if position and reply.gap:
+                await asyncio.sleep(reply.gap)
+            yield chunk
+        if usage is not None:
+            usage.update(reply.usage)
+
+    def complete(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> str:
+        """Resposta completa, após o tempo total simulado."""
+        return "".join(self.stream(prompt, usage))
+
+    async def complete_async(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> str:
+        return "".join([chunk async for chunk in self.stream_async(prompt, usage)])
+
+
+def _content_text(content: Any) -> str:
+    """Texto de um conteúdo em string ou em blocos."""
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return str(content)
+
+
+def _prompt_text(messages: List[Dict[str, Any]], system: Any = None) -> str:
+    """Texto do prompt: `system` de nível superior (Anthropic) seguido das mensagens."""
+    parts = [_content_text(system)] if system else []
+    parts.extend(_content_text(message.get("content", "")) for message in messages)
+    return "\n".join(parts)
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    server: "_MockHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") == "/v1/messages":
+            api = "anthropic"
+        elif self.path.rstrip("/") == "/v1/chat/completions":
+            api = "openai"
+        else:
+            self._send_json(404, {"error": {"message": f"Rota desconhecida: {self.path}"}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = body.get("model", "mock-model")
+        reply = self.server.llm.plan(_prompt_text(body.get("messages", []), body.get("system")))
+
+        time.sleep(reply.ttft)
+        if reply.error is not None:
+            self._send_error(api, reply.error)
+        elif api == "anthropic":
+            if body.get("stream"):
+                self._stream_anthropic(reply, model)
+            else:
+                self._send_json(200, self._anthropic_message(reply, model, reply.text, reply.output_tokens))
+        elif body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream_openai(reply, model, include_usage)
+        else:
+            self._send_json(200, {
+                **self._openai_base(model, "chat.completion"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply.text},
+                             "finish_reason": "stop"}],
+                "usage": self._openai_usage(reply)
+            })
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, api: str, error: MockLLMError) -> None:
+        headers = {"retry-after": str(error.retry_after)} if isinstance(error, MockRateLimitError) else {}
+        if api == "anthropic":
+            payload = {"type": "error", "error": {"type": error.error_type, "message": str(error)}}
+        else:
+            payload = {"error": {"message": str(error), "type": error.error_type, "code": None}}
+        self._send_json(error.status, payload, headers)
+
+    def _start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _sse(self, payload: Any, event: Optional[str] = None) -> None:
+        data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+        line = (f"event: {event}\n" if event else "") + f"data: {data}\n\n"
+        self.wfile.write(line.encode("utf-8"))
+        self.wfile.flush()
+
+    def _chunks(self, reply: MockReply) -> Iterator[str]:
+        for position, chunk in enumerate(reply.chunks):
+            if position and reply.gap:
+                time.sleep(reply.gap)
+            yield chunk
+
+    def _anthropic_message(self, reply: MockReply, model: str, text: str, output_tokens: int) -> Dict[str, Any]:
+        return {
+            "id": f"msg_mock_{self.server.next_id()}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}] if text else [],
+            "stop_reason": "end_turn" if text else None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": reply.input_tokens, "output_tokens": output_tokens}
+        }
+
+    def _stream_anthropic(self, reply: MockReply, model: str) -> None:
+        self._start_stream()
+        self._sse({"type": "message_start", "message": self._anthropic_message(reply, model, "", 1)},
+                  "message_start")
+        self._sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                  "content_block_start")
+        for chunk in self._chunks(reply):
+            self._sse({"type": "content_block_delta", "index": 0,
+                       "delta": {"type": "text_delta", "text": chunk}}, "content_block_delta")
+        self._sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        self._sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                   "usage": {"output_tokens": reply.output_tokens}}, "message_delta")
+        self._sse({"type": "message_stop"}, "message_stop")
+
+    def _openai_base(self, model: str, kind: str) -> Dict[str, Any]:
+        return {"id": f"chatcmpl-mock-{self.server.next_id()}", "object": kind,
+                "created": int(time.time()), "model": model}
+
+    @staticmethod
+    def _openai_usage(reply: MockReply) -> Dict[str, int]:
+        return {"prompt_tokens": reply.input_tokens, "completion_tokens": reply.output_tokens,
+                "total_tokens": reply.input_tokens + reply.output_tokens}
+
+    def _stream_openai(self, reply: MockReply, model: str, include_usage: bool) -> None:
+        base = self._openai_base(model, "chat.completion.chunk")
+        self._start_stream()
+        self._sse({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                        "finish_reason": None}]})
+        for chunk in self._chunks(reply):
+            self._sse({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+        self._sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if include_usage:
+            self._sse({**base, "choices": [], "usage": self._openai_usage(reply)})
+        self._sse("[DONE]")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], llm: MockLLM):
+        super().__init__(address, _MockHandler)
+        self.llm = llm
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+
+class MockLLMServer:
+    """
+    Servidor HTTP local com as rotas /v1/messages e /v1/chat/completions
+
+    Cada requisição roda em sua própria thread. Use como context manager ou
+    chame `start()` e `stop()`.
+    """
+
+    def __init__(self, llm: Optional[MockLLM] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            llm: Comportamento simulado (padrão: MockLLM com os valores padrão)
+            host: Endereço de escuta
+            port: Porta (0 escolhe uma porta livre)
+        """
+        self.llm = llm or MockLLM()
+        self._server = _MockHTTPServer((host, port), self.llm)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Roda o servidor simulado até Ctrl+C."""
+    parser = argparse.ArgumentParser(description="Servidor local de LLM simulado")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--distribution", choices=["fixed", "lognormal", "replay"], default="fixed")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Tempo até o primeiro token (s)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Desvio do log no lognormal")
+    parser.add_argument("--replay-file", default=None, help="Arquivo de latências para 'replay'")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--output-tokens", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    llm = MockLLM(args.distribution, args.ttft, args.sigma, args.replay_file, args.tokens_per_second,
+                  args.output_tokens, args.error_rate, args.rate_limit_rate, seed=args.seed)
+    server = MockLLMServer(llm, args.host, args.port).start()
+    print(f"LLM simulado em {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from typing import Any, Dict
+from .tokens import estimate_tokens
+
+# Bloco de controle que marca o prefixo do prompt como cacheável na Anthropic
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+# Menor prefixo que a Anthropic grava em cache (Sonnet/Opus; Haiku exige 2048).
+# Abaixo disso o cache_control é ignorado e a marcação só confunde as métricas
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def text_block(text: str, cacheable: bool = False) -> Dict[str, Any]:
+    """Cria um bloco de texto da Messages API, opcionalmente marcado para cache."""
+    block = {"type": "text", "text": text}
+    if cacheable:
+        block["cache_control"] = dict(EPHEMERAL_CACHE_CONTROL)
+    return block
+
+
+def is_cacheable_prefix(*texts: str, min_tokens: int = MIN_CACHEABLE_TOKENS) -> bool:
+    """Indica se o prefixo formado pelos textos atinge o tamanho mínimo do cache."""
+    return sum(estimate_tokens(text) for text in texts) >= min_tokens
+
+
+def cache_usage(response: Any) -> Dict[str, Any]:
+    """
+    Extrai do `usage` da resposta as contagens de tokens e o uso do cache
+
+    Returns:
+        Dict com tokens de entrada/saída, tokens lidos e gravados no cache
+        e 'cache_hit' indicando se parte do prompt veio do cache
+    """
+    usage = getattr(response, "usage", None)
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or 0,
+        "cache_read_input_tokens": cache_read,
+        "cache_creation_input_tokens": cache_creation,
+        "cache_hit": cache_read > 0
+    }
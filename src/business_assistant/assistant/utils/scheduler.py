@@ -0,0 +1,324 @@
+"""
+Agendador das chamadas aos providers de LLM
+
+Toda chamada reserva antes requisição e tokens nos token buckets de
+requisições e de tokens por minuto, configuráveis por provider e por
+provider:modelo, e só então ocupa uma vaga no semáforo de concorrência; assim
+a espera pelo limite de taxa não prende vagas. As reservas de um provider e
+as vagas são atendidas por prioridade (chamadas interativas antes das de
+lote). Funciona tanto em código assíncrono (`async with`) quanto síncrono
+(`with`, fora do event loop), e mede o tempo de espera na fila por classe de
+prioridade.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Classe de prioridade -> ordem de atendimento (menor primeiro)
+PRIORITIES = {
+    'interactive': 0,
+    'batch': 1
+}
+
+
+class TokenBucket:
+    """Token bucket com reserva antecipada: quem reserva recebe o tempo de espera."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: Reposição de tokens por minuto
+            capacity: Tamanho máximo da rajada (padrão: rate_per_minute)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Consome `amount` tokens e retorna quantos segundos esperar até eles existirem."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate) if self.rate > 0 else 0.0
+
+
+class _Waiter:
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+class _PriorityGate:
+    """Semáforo de concorrência que libera as vagas por ordem de prioridade."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._waiters: List[Tuple[int, int, _Waiter]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.cancelled)
+
+    def _try_acquire(self, priority: int, wake) -> Optional[_Waiter]:
+        """Ocupa uma vaga livre (retorna None) ou entra na fila (retorna o waiter)."""
+        with self._lock:
+            if self.active < self.max_concurrency and not self.queued:
+                self.active += 1
+                return None
+            waiter = _Waiter(wake)
+            heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            waiter.cancelled = True
+            granted = waiter.granted
+        if granted:
+            self.release()
+
+    async def acquire_async(self, priority: int) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._try_acquire(priority, wake)
+        if waiter is None:
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def acquire(self, priority: int) -> None:
+        event = threading.Event()
+        waiter = self._try_acquire(priority, event.set)
+        if waiter is not None:
+            event.wait()
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.cancelled:
+                    # A vaga passa direto para o próximo da fila
+                    waiter.granted = True
+                    waiter.wake()
+                    return
+            self.active -= 1
+
+
+class _PriorityStats:
+    def __init__(self):
+        self.requests = 0
+        self.queued_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limit_wait = 0.0
+
+    def record(self, wait: float, rate_limit_wait: float) -> None:
+        self.requests += 1
+        if wait > 0.001:
+            self.queued_requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.rate_limit_wait += rate_limit_wait
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'queued_requests': self.queued_requests,
+            'avg_queue_wait': self.total_wait / self.requests if self.requests else 0.0,
+            'max_queue_wait': self.max_wait,
+            'rate_limit_wait': self.rate_limit_wait
+        }
+
+
+class _Slot:
+    """Vaga de execução; use com `async with` ou `with`."""
+
+    def __init__(self, scheduler: 'RequestScheduler', provider: str, model: Optional[str],
+                 tokens: int, priority: str):
+        self.scheduler = scheduler
+        self.provider = provider
+        self.model = model
+        self.tokens = tokens
+        self.priority = priority
+        self.queue_wait = 0.0
+
+    async def __aenter__(self) -> '_Slot':
+        start = time.monotonic()
+        priority = PRIORITIES[self.priority]
+        rate_wait = await self.scheduler._reserve_async(self.provider, self.model, self.tokens, priority)
+        await self.scheduler._gate.acquire_async(priority)
+        self.queue_wait = time.monotonic() - start
+        self.scheduler._stats[self.priority].record(self.queue_wait, rate_wait)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.scheduler._gate.release()
+
+    def __enter__(self) -> '_Slot':
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Esperar com time.sleep/Event.wait travaria o event loop inteiro
+            raise RuntimeError("Use 'async with scheduler.acquire(...)' dentro do event loop")
+
+        start = time.monotonic()
+        priority = PRIORITIES[self.priority]
+        rate_wait = self.scheduler._reserve_sync(self.provider, self.model, self.tokens, priority)
+        self.scheduler._gate.acquire(priority)
+        self.queue_wait = time.monotonic() - start
+        self.scheduler._stats[self.priority].record(self.queue_wait, rate_wait)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.scheduler._gate.release()
+
+
+class RequestScheduler:
+    """
+    Controla concorrência, taxa e prioridade das chamadas aos providers
+
+    Exemplo de limites:
+        {
+            'anthropic': {'requests_per_minute': 50, 'tokens_per_minute': 40000},
+            'anthropic:claude-3-opus-20240229': {'requests_per_minute': 20}
+        }
+    """
+
+    def __init__(self, max_concurrency: int = 16, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Args:
+            max_concurrency: Chamadas simultâneas permitidas
+            limits: Limites por 'provider' ou 'provider:modelo' com as chaves
+                'requests_per_minute' e/ou 'tokens_per_minute'
+        """
+        self.max_concurrency = max_concurrency
+        self.limits = limits or {}
+        self._gate = _PriorityGate(max_concurrency)
+        # Provider -> fila de reservas nos buckets, uma por vez e por prioridade
+        self._rate_gates: Dict[str, _PriorityGate] = {}
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._stats = {priority: _PriorityStats() for priority in PRIORITIES}
+
+    def acquire(self, provider: str, model: Optional[str] = None, tokens: int = 0,
+                priority: str = 'interactive') -> _Slot:
+        """
+        Reserva uma vaga para uma chamada
+
+        Args:
+            provider: Nome do provider ('anthropic', 'openai', ...)
+            model: Modelo chamado (para limites por modelo)
+            tokens: Estimativa de tokens da chamada (entrada + saída máxima)
+            priority: 'interactive' ou 'batch'
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridade não suportada: {priority}")
+        return _Slot(self, provider, model, tokens, priority)
+
+    def _bucket(self, scope: str, kind: str) -> Optional[TokenBucket]:
+        rate = self.limits.get(scope, {}).get(kind)
+        if rate is None:
+            return None
+        with self._buckets_lock:
+            if (scope, kind) not in self._buckets:
+                self._buckets[(scope, kind)] = TokenBucket(rate)
+            return self._buckets[(scope, kind)]
+
+    def _reserve(self, provider: str, model: Optional[str], tokens: int) -> float:
+        """Reserva requisição e tokens em todos os buckets aplicáveis; retorna a maior espera."""
+        wait = 0.0
+        scopes = [provider] + ([f"{provider}:{model}"] if model else [])
+        for scope in scopes:
+            for kind, amount in (('requests_per_minute', 1), ('tokens_per_minute', tokens)):
+                bucket = self._bucket(scope, kind)
+                if bucket is not None and amount:
+                    wait = max(wait, bucket.reserve(amount))
+        return wait
+
+    def _rate_gate(self, provider: str) -> Optional[_PriorityGate]:
+        """Fila de reservas do provider; None se não há limites de taxa para ele."""
+        if not any(scope == provider or scope.startswith(f"{provider}:") for scope in self.limits):
+            return None
+        with self._buckets_lock:
+            if provider not in self._rate_gates:
+                self._rate_gates[provider] = _PriorityGate(1)
+            return self._rate_gates[provider]
+
+    async def _reserve_async(self, provider: str, model: Optional[str], tokens: int, priority: int) -> float:
+        """
+        Reserva nos buckets e espera os tokens existirem; retorna a espera
+
+        A fila de reservas fica ocupada durante a espera, de forma que a
+        próxima reserva vá para a chamada de maior prioridade que chegou
+        nesse meio tempo, e não para a que reservou primeiro.
+        """
+        gate = self._rate_gate(provider)
+        if gate is None:
+            return 0.0
+        await gate.acquire_async(priority)
+        try:
+            wait = self._reserve(provider, model, tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        finally:
+            gate.release()
+        return wait
+
+    def _reserve_sync(self, provider: str, model: Optional[str], tokens: int, priority: int) -> float:
+        """Versão bloqueante de `_reserve_async`."""
+        gate = self._rate_gate(provider)
+        if gate is None:
+            return 0.0
+        gate.acquire(priority)
+        try:
+            wait = self._reserve(provider, model, tokens)
+            if wait > 0:
+                time.sleep(wait)
+        finally:
+            gate.release()
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna vagas em uso, fila atual e tempos de espera por prioridade."""
+        return {
+            'active': self._gate.active,
+            'queued': self._gate.queued,
+            'max_concurrency': self.max_concurrency,
+            'priorities': {priority: stats.as_dict() for priority, stats in self._stats.items()}
+        }
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+
+
+def get_scheduler() -> RequestScheduler:
+    """Retorna o agendador padrão do processo, sem limites de taxa configurados."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = RequestScheduler()
+    return _default_scheduler
+
+
+def set_scheduler(scheduler: RequestScheduler) -> None:
+    """Substitui o agendador padrão (ex.: para configurar limites por provider)."""
+    global _default_scheduler
+    _default_scheduler = scheduler
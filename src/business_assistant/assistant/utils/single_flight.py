@@ -0,0 +1,101 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+
+from ..core.query_cache import normalize_query
+
+
+def request_key(message: str, context: Optional[Dict[str, Any]] = None,
+                history: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, str]:
+    """
+    Chave de coalescência: mensagem normalizada + impressão digital do contexto
+
+    O contexto (e o histórico da conversa, quando informado) é serializado com
+    chaves ordenadas, de forma que dicionários iguais gerem a mesma impressão
+    digital.
+    """
+    fingerprint = {"context": context or {}, "history": history or []}
+    serialized = json.dumps(fingerprint, sort_keys=True, ensure_ascii=False, default=str)
+    return normalize_query(message), hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas concorrentes idênticas em uma única requisição
+
+    Enquanto uma chamada com a mesma chave está em andamento, as demais
+    aguardam o mesmo resultado (ou a mesma exceção) em vez de disparar outra
+    requisição. O cancelamento de um chamador não afeta os demais; quando o
+    último chamador desiste, a requisição compartilhada é cancelada.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # Requisição compartilhada -> chamadores ainda aguardando
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa func() ou aguarda a execução em andamento com a mesma chave."""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            # Sobra de um event loop já encerrado (instância compartilhada no processo)
+            task = None
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters.pop(task) - 1
+            if remaining:
+                self._waiters[task] = remaining
+            elif not task.done():
+                # Ninguém mais espera o resultado: cancela a chamada ao provider
+                self._forget(key, task)
+                task.cancel()
+                self.cancelled += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de chamadas, chamadas coalescidas, requisições em
+        andamento e requisições canceladas por falta de chamadores
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "upstream_requests": self.calls - self.coalesced,
+            "in_flight": len(self._in_flight),
+            "cancelled": self.cancelled,
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0
+        }
+
+
+_default_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Retorna o SingleFlight padrão do processo, compartilhado entre os assistentes."""
+    global _default_single_flight
+    if _default_single_flight is None:
+        _default_single_flight = SingleFlight()
+    return _default_single_flight
+
+
+def set_single_flight(single_flight: SingleFlight) -> None:
+    """Substitui o SingleFlight padrão (ex.: para isolar um grupo de assistentes)."""
+    global _default_single_flight
+    _default_single_flight = single_flight
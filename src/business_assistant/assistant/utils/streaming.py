@@ -0,0 +1,67 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import time
+
+from .prompt_cache import cache_usage
+
+
+class StreamTimer:
+    """Mede o tempo até o primeiro token (TTFT) e a duração total de um streaming."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+        self.chars = 0
+
+    def record(self, delta: str) -> None:
+        """Registra um trecho de texto recebido."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+        self.chars += len(delta)
+
+    def finish(self) -> Dict[str, Any]:
+        """Encerra a medição e retorna as métricas (tempos em segundos)."""
+        return {
+            "ttft": self.first_token_at - self.start if self.first_token_at is not None else None,
+            "duration": time.perf_counter() - self.start,
+            "chunks": self.chunks,
+            "chars": self.chars
+        }
+
+
+# Os geradores abaixo não fecham o stream: quem chama o envolve em `async with`,
+# que libera a conexão mesmo se o consumidor parar antes do fim.
+
+
+async def anthropic_text_deltas(events: AsyncIterator[Any],
+                                usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """
+    Extrai os trechos de texto dos eventos de `messages.create(stream=True)` da Anthropic
+
+    Args:
+        events: Eventos do streaming
+        usage: Dict preenchido com o uso de tokens (formato de `cache_usage`)
+    """
+    async for event in events:
+        event_type = getattr(event, "type", None)
+        if event_type == "content_block_delta":
+            text = getattr(event.delta, "text", None)
+            if text:
+                yield text
+        elif usage is not None and event_type == "message_start":
+            usage.update(cache_usage(event.message))
+        elif usage is not None and event_type == "message_delta":
+            output_tokens = getattr(getattr(event, "usage", None), "output_tokens", None)
+            if output_tokens is not None:
+                usage["output_tokens"] = output_tokens
+
+
+async def openai_text_deltas(chunks: AsyncIterator[Any]) -> AsyncIterator[str]:
+    """Extrai os trechos de texto dos chunks de `chat.completions.create(stream=True)` da OpenAI."""
+    async for chunk in chunks:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            yield text
@@ -0,0 +1,11 @@
+import math
+
+# Média aproximada de caracteres por token nos modelos usados
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima localmente o número de tokens de um texto, sem chamar a API."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,392 @@
+"""
+Benchmark da busca local da base de conhecimento em documentação sintética
+
+Gera documentação fiscal sintética em português (1k a 1M entradas) e
+conjuntos de consultas realistas, e mede para cada scorer e variante de
+índice de KnowledgeBase.get_relevant_info e HybridKnowledgeBase._local_search
+o tempo de construção, os percentis de latência por consulta, consultas por
+segundo e o pico de memória (tracemalloc, em uma segunda construção para não
+distorcer os tempos). Roda sem rede; os resultados vão para um JSON,
+regravado a cada variante medida. Uma variante que falha registra o erro na
+sua linha e não interrompe as demais.
+
+Uso:
+    python -m business_assistant.benchmarks.knowledge_search_benchmark --output kb_search.json
+    python -m business_assistant.benchmarks.knowledge_search_benchmark --sizes 1000,10000 --queries 50
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from ..assistant.core.knowledge import KnowledgeBase
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# (slug, sigla, nome)
+_DOCUMENTOS = [
+    ("nfe", "NF-e", "Nota Fiscal Eletrônica"),
+    ("nfse", "NFS-e", "Nota Fiscal de Serviço Eletrônica"),
+    ("nfce", "NFC-e", "Nota Fiscal de Consumidor Eletrônica"),
+    ("cte", "CT-e", "Conhecimento de Transporte Eletrônico"),
+    ("mdfe", "MDF-e", "Manifesto Eletrônico de Documentos Fiscais"),
+    ("sped", "SPED Fiscal", "Escrituração Fiscal Digital"),
+    ("reinf", "EFD-Reinf", "Escrituração Fiscal Digital de Retenções"),
+    ("dctf", "DCTFWeb", "Declaração de Débitos e Créditos Tributários"),
+    ("gnre", "GNRE", "Guia Nacional de Recolhimento de Tributos Estaduais")
+]
+# (slug, nome, verbo)
+_ACOES = [
+    ("emissao", "emissão", "emitir"),
+    ("cancelamento", "cancelamento", "cancelar"),
+    ("carta_correcao", "carta de correção", "corrigir"),
+    ("inutilizacao", "inutilização de numeração", "inutilizar"),
+    ("contingencia", "emissão em contingência", "emitir em contingência"),
+    ("consulta", "consulta de situação", "consultar"),
+    ("download", "download do XML", "baixar o XML"),
+    ("escrituracao", "escrituração", "escriturar"),
+    ("apuracao", "apuração", "apurar"),
+    ("transmissao", "transmissão", "transmitir")
+]
+_TRIBUTOS = ["ICMS", "ICMS-ST", "IPI", "PIS", "COFINS", "ISS", "DIFAL", "IRRF", "CSLL", "FCP"]
+_REGIMES = ["Simples Nacional", "Lucro Presumido", "Lucro Real", "MEI"]
+_UFS = ["AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA", "PB",
+        "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO"]
+_MENUS = ["Fiscal", "Faturamento", "Contabilidade", "Financeiro", "Estoque"]
+_ERROS = [
+    "Certificado Digital vencido", "Cliente sem inscrição estadual", "Rejeição por duplicidade",
+    "CFOP incompatível com a operação", "NCM inexistente", "Prazo de cancelamento expirado",
+    "Schema XML inválido", "Serviço da SEFAZ indisponível", "Base de cálculo divergente",
+    "Chave de acesso inválida"
+]
+# Palavras fora do domínio, para consultas sem resposta na base
+_FORA_DO_DOMINIO = ["férias", "rescisão", "aluguel", "viagem", "treinamento", "uniforme", "cardápio",
+                    "estacionamento", "reembolso", "currículo", "ginástica", "jardinagem"]
+
+QUERY_SETS = ("topico", "codigo", "erro", "typo", "sem_resultado")
+
+
+def synthetic_documentation(count: int, seed: int = 0) -> Dict[str, str]:
+    """
+    Gera `count` entradas de documentação fiscal no formato chave -> texto
+
+    Cada entrada descreve uma ação sobre um documento fiscal em um regime e
+    UF, com tributos, prazo, um erro comum e um código de procedimento único
+    (PRC + número da entrada).
+    """
+    rng = random.Random(seed)
+    documentation = {}
+    for i in range(count):
+        doc_slug, sigla, nome = rng.choice(_DOCUMENTOS)
+        acao_slug, acao, verbo = rng.choice(_ACOES)
+        uf = rng.choice(_UFS)
+        tributo, outro_tributo = rng.sample(_TRIBUTOS, 2)
+        code = 100 * rng.randint(1, 9) + rng.randint(1, 99)
+        documentation[f"{doc_slug}.{acao_slug}.{uf.lower()}.{i:07d}"] = (
+            f"{acao.capitalize()} de {sigla} ({nome}) para empresas do {rng.choice(_REGIMES)} em {uf}: "
+            f"acesse {rng.choice(_MENUS)} > {sigla} > {acao.capitalize()}, confira os dados e clique em "
+            f"'{verbo.capitalize()}'. Tributos envolvidos: {tributo} e {outro_tributo}. "
+            f"Prazo de {rng.randint(1, 30)} dias. Erro comum {code}: {rng.choice(_ERROS)}. "
+            f"Código do procedimento: PRC{i:07d}"
+        )
+    return documentation
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    """Troca duas letras vizinhas de palavras com mais de 4 letras."""
+    if len(word) <= 4:
+        return word
+    position = rng.randrange(1, len(word) - 2)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def synthetic_queries(documentation: Dict[str, str], count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Gera consultas divididas igualmente entre os conjuntos de QUERY_SETS
+
+    Returns:
+        Lista de dicts com 'set', 'query' e 'expected' (chave que deve ser
+        encontrada, só nas consultas por código de procedimento)
+    """
+    rng = random.Random(seed + 1)
+    keys = list(documentation)
+    queries = []
+    for position in range(count):
+        query_set = QUERY_SETS[position % len(QUERY_SETS)]
+        key = rng.choice(keys)
+        doc_slug, acao_slug = key.split(".")[:2]
+        sigla = next(d[1] for d in _DOCUMENTOS if d[0] == doc_slug)
+        verbo = next(a[2] for a in _ACOES if a[0] == acao_slug)
+        expected = None
+
+        if query_set == "topico":
+            query = f"como {verbo} {sigla} com {rng.choice(_TRIBUTOS)} no {rng.choice(_REGIMES)}"
+        elif query_set == "codigo":
+            query = f"procedimento PRC{int(key.rsplit('.', 1)[1]):07d}"
+            expected = key
+        elif query_set == "erro":
+            query = f"erro {100 * rng.randint(1, 9) + rng.randint(1, 99)} na {sigla}"
+        elif query_set == "typo":
+            words = f"como {verbo} {sigla} {rng.choice(_TRIBUTOS)} {rng.choice(_ERROS).lower()}".split()
+            query = " ".join(_typo(word, rng) for word in words)
+        else:
+            query = " ".join(rng.sample(_FORA_DO_DOMINIO, 3))
+        queries.append({"set": query_set, "query": query, "expected": expected})
+    return queries
+
+
+def variants(size: int, max_scan_size: int) -> List[Dict[str, Any]]:
+    """Combinações de base, scorer e índice medidas para um tamanho de documentação."""
+    rows = []
+    for scorer in ("trigram", "overlap", "bm25", "sequence"):
+        for index in ("memory", "mmap"):
+            if scorer == "sequence" and index == "mmap":
+                continue
+            rows.append({"kb": "knowledge", "scorer": scorer, "index": index,
+                         "scan": scorer == "sequence"})
+    for scorer in ("overlap", "bm25"):
+        for index in ("memory", "mmap"):
+            rows.append({"kb": "hybrid", "scorer": scorer, "index": index, "strategy": "index", "scan": False})
+    rows.append({"kb": "hybrid", "scorer": "overlap", "index": "memory", "strategy": "scan", "scan": True})
+    rows.append({"kb": "hybrid", "scorer": "overlap", "index": "vector", "strategy": "index", "scan": False})
+
+    for row in rows:
+        if row.pop("scan") and size > max_scan_size:
+            # Varreduras completas por consulta são lentas demais nesses tamanhos
+            row["skipped"] = f"varredura completa acima de {max_scan_size} entradas"
+    return rows
+
+
+def _hybrid(variant: Dict[str, Any], documentation_path: Optional[str],
+            index_path: Optional[str] = None) -> HybridKnowledgeBase:
+    return HybridKnowledgeBase(documentation_path, api_key=None, search_strategy=variant["strategy"],
+                               scorer=variant["scorer"], local_cache_size=0, api_cache_size=0,
+                               index_path=index_path)
+
+
+def _prepare(variant: Dict[str, Any], documentation: Dict[str, str], documentation_path: str,
+             workdir: str) -> Tuple[Callable[[], Any], float]:
+    """
+    Deixa pronto o que a construção medida precisa (ex.: compilar o índice mmap)
+
+    Returns:
+        Tupla (função que constrói a base, tempo de compilação em segundos)
+    """
+    index_path = os.path.join(workdir, f"{variant['kb']}-{variant['scorer']}.idx")
+    compile_time = 0.0
+    if variant["index"] == "mmap":
+        start = time.perf_counter()
+        if variant["kb"] == "knowledge":
+            KnowledgeBase(documentation, scorer=variant["scorer"]).compile_index(index_path)
+        else:
+            HybridKnowledgeBase.compile_index(documentation_path, index_path, scorer=variant["scorer"])
+        compile_time = time.perf_counter() - start
+        gc.collect()
+
+    def build() -> Any:
+        if variant["kb"] == "knowledge":
+            if variant["index"] == "mmap":
+                return KnowledgeBase(None, scorer=variant["scorer"], index_path=index_path)
+            return KnowledgeBase(documentation, scorer=variant["scorer"])
+        if variant["index"] == "mmap":
+            return _hybrid(variant, None, index_path)
+        kb = _hybrid(variant, documentation_path)
+        if variant["index"] == "vector":
+            kb.build_vector_index()
+        return kb
+
+    return build, compile_time
+
+
+def _search(variant: Dict[str, Any], kb: Any) -> Callable[[str], List[str]]:
+    """Função de busca medida; retorna as chaves encontradas."""
+    if variant["kb"] == "knowledge":
+        def search(query: str) -> List[str]:
+            info = kb.get_relevant_info(query)
+            return [line[1:line.index("]")] for line in info.split("\n") if line.startswith("[")]
+    elif variant["index"] == "vector":
+        def search(query: str) -> List[str]:
+            return [r["key"] for r in kb._vector_search(query)]
+    else:
+        def search(query: str) -> List[str]:
+            return [r["key"] for r in kb._local_search(query)]
+    return search
+
+
+def _percentile_ms(latencies: List[float], percentile: float) -> float:
+    return float(np.percentile(latencies, percentile) * 1000) if latencies else 0.0
+
+
+def _measure_queries(search: Callable[[str], List[str]], queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies, by_set = [], {query_set: [] for query_set in QUERY_SETS}
+    for query in queries:
+        start = time.perf_counter()
+        keys = search(query["query"])
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        by_set[query["set"]].append((latency, keys, query["expected"]))
+
+    total = sum(latencies)
+    query_sets = {}
+    for query_set, rows in by_set.items():
+        set_latencies = [latency for latency, _, _ in rows]
+        expected = [(keys, key) for _, keys, key in rows if key is not None]
+        query_sets[query_set] = {
+            "queries": len(rows),
+            "p50_ms": _percentile_ms(set_latencies, 50),
+            "p99_ms": _percentile_ms(set_latencies, 99),
+            "hit_rate": sum(1 for _, keys, _ in rows if keys) / len(rows) if rows else 0.0,
+            "recall": (sum(1 for keys, key in expected if key in keys) / len(expected)) if expected else None
+        }
+    return {
+        "queries": len(queries),
+        "qps": len(queries) / total if total else 0.0,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p90_ms": _percentile_ms(latencies, 90),
+        "p99_ms": _percentile_ms(latencies, 99),
+        "query_sets": query_sets
+    }
+
+
+def _measure_memory(build: Callable[[], Any]) -> Dict[str, float]:
+    """Pico e memória retida (MB, alocações Python) de uma nova construção da base."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kb = build()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kb
+    return {"peak_memory_mb": peak / 2 ** 20, "retained_memory_mb": retained / 2 ** 20}
+
+
+def _write_results(report: Dict[str, Any], output: str) -> None:
+    """Grava o JSON de forma atômica (arquivo temporário + rename)."""
+    partial = f"{output}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(partial, output)
+
+
+def _measure_variant(row: Dict[str, Any], variant: Dict[str, Any], documentation: Dict[str, str],
+                     documentation_path: str, workdir: str, query_set: List[Dict[str, Any]],
+                     measure_memory: bool) -> None:
+    build, compile_time = _prepare(variant, documentation, documentation_path, workdir)
+    start = time.perf_counter()
+    kb = build()
+    row["build_time_s"] = time.perf_counter() - start
+    if variant["index"] == "mmap":
+        row["compile_time_s"] = compile_time
+    row.update(_measure_queries(_search(variant, kb), query_set))
+    del kb
+    if measure_memory:
+        row.update(_measure_memory(build))
+
+
+def run_benchmark(sizes: List[int] = DEFAULT_SIZES, queries: int = 100, seed: int = 0,
+                  max_scan_size: int = 1000, measure_memory: bool = True,
+                  progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Mede todas as variantes em cada tamanho de documentação
+
+    Args:
+        sizes: Números de entradas da documentação sintética
+        queries: Consultas por variante (divididas entre os conjuntos)
+        seed: Semente da documentação e das consultas
+        max_scan_size: Maior tamanho em que variantes de varredura completa rodam
+        measure_memory: Faz a construção extra com tracemalloc para o pico de memória
+        progress: Chamada com cada linha de resultado assim que fica pronta
+        output: Arquivo JSON regravado após cada linha, para não perder o que
+            já foi medido se a execução for interrompida
+
+    Returns:
+        Dict com a configuração e uma linha por (tamanho, variante); linhas
+        de variantes que falharam trazem 'error' no lugar das medidas
+    """
+    results = []
+    report = {
+        "config": {
+            "sizes": list(sizes),
+            "queries": queries,
+            "seed": seed,
+            "max_scan_size": max_scan_size,
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": results
+    }
+    for size in sizes:
+        start = time.perf_counter()
+        documentation = synthetic_documentation(size, seed)
+        query_set = synthetic_queries(documentation, queries, seed)
+        generation_time = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory(prefix="kb-bench-") as workdir:
+            documentation_path = os.path.join(workdir, "documentacao.json")
+            with open(documentation_path, "w", encoding="utf-8") as f:
+                json.dump(documentation, f, ensure_ascii=False)
+
+            for variant in variants(size, max_scan_size):
+                row = {"size": size, "generation_time_s": generation_time, **variant}
+                if "skipped" not in row:
+                    try:
+                        _measure_variant(row, variant, documentation, documentation_path, workdir,
+                                         query_set, measure_memory)
+                    except Exception as e:
+                        row["error"] = f"{type(e).__name__}: {e}"
+                    gc.collect()
+
+                results.append(row)
+                if output is not None:
+                    _write_results(report, output)
+                if progress is not None:
+                    progress(row)
+
+    return report
+
+
+def _print_row(row: Dict[str, Any]) -> None:
+    name = f"{row['size']:>8} {row['kb']:<9} {row['scorer']:<8} {row['index']:<6} {row.get('strategy', ''):<5}"
+    if "skipped" in row:
+        print(f"{name} pulado: {row['skipped']}")
+        return
+    if "error" in row:
+        print(f"{name} erro: {row['error']}")
+        return
+    memory = f" | pico {row['peak_memory_mb']:.1f}MB" if "peak_memory_mb" in row else ""
+    print(f"{name} build {row['build_time_s']:.2f}s | {row['qps']:.1f} q/s | "
+          f"p50 {row['p50_ms']:.3f}ms | p99 {row['p99_ms']:.3f}ms{memory}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da busca local em documentação sintética")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Tamanhos da documentação separados por vírgula")
+    parser.add_argument("--queries", type=int, default=100, help="Consultas por variante")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-scan-size", type=int, default=1000,
+                        help="Maior tamanho para variantes de varredura completa")
+    parser.add_argument("--no-memory", action="store_true", help="Não mede o pico de memória")
+    parser.add_argument("--output", default="knowledge_search_benchmark.json",
+                        help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    run_benchmark(sizes, args.queries, args.seed, args.max_scan_size,
+                  not args.no_memory, progress=_print_row, output=args.output)
+    print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
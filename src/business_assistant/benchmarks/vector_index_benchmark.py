@@ -0,0 +1,107 @@
+"""
+Benchmark de recall x latência do IVFIndex contra a busca exata
+
+Uso:
+    python -m business_assistant.benchmarks.vector_index_benchmark --vectors 50000 --output ivf.json
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+import numpy as np
+
+from ..assistant.core.vector_index import IVFIndex, exact_search
+
+
+def synthetic_vectors(count: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Gera vetores normalizados agrupados em torno de centros aleatórios."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=count)]
+    vectors += 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentile_ms(latencies: List[float], percentile: float) -> float:
+    return float(np.percentile(latencies, percentile) * 1000)
+
+
+def run_benchmark(count: int = 50000, dimensions: int = 256, queries: int = 200, k: int = 10,
+                  n_probes: List[int] = (1, 2, 4, 8, 16, 32), seed: int = 0) -> Dict:
+    """
+    Mede recall@k e latência do IVFIndex para vários n_probe
+
+    Returns:
+        Dict com o tempo de build, a latência da busca exata e uma linha por n_probe
+    """
+    # Consultas vêm da mesma distribuição, mas ficam fora do índice
+    all_vectors = synthetic_vectors(count + queries, dimensions, clusters=max(1, count // 500), seed=seed)
+    vectors, query_vectors = all_vectors[:count], all_vectors[count:]
+
+    exact_latencies, ground_truth = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        positions, _ = exact_search(vectors, query, k)
+        exact_latencies.append(time.perf_counter() - start)
+        ground_truth.append(set(positions.tolist()))
+
+    start = time.perf_counter()
+    index = IVFIndex(dimensions, seed=seed)
+    index.build(vectors)
+    build_time = time.perf_counter() - start
+
+    rows = []
+    for n_probe in n_probes:
+        latencies, recalls = [], []
+        for query, expected in zip(query_vectors, ground_truth):
+            start = time.perf_counter()
+            ids, _ = index.search(query, k, n_probe=n_probe)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len(expected.intersection(ids.tolist())) / k)
+
+        rows.append({
+            "n_probe": n_probe,
+            "recall": float(np.mean(recalls)),
+            "p50_ms": _percentile_ms(latencies, 50),
+            "p99_ms": _percentile_ms(latencies, 99)
+        })
+
+    return {
+        "vectors": count,
+        "dimensions": dimensions,
+        "queries": queries,
+        "k": k,
+        "n_lists": len(index.centroids),
+        "build_time_s": build_time,
+        "exact": {
+            "p50_ms": _percentile_ms(exact_latencies, 50),
+            "p99_ms": _percentile_ms(exact_latencies, 99)
+        },
+        "ivf": rows
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de recall x latência do índice vetorial")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.vectors, args.dimensions, args.queries, args.k)
+
+    print(f"{results['vectors']} vetores, {results['n_lists']} listas, build em {results['build_time_s']:.2f}s")
+    print(f"Exata: p50 {results['exact']['p50_ms']:.3f}ms | p99 {results['exact']['p99_ms']:.3f}ms")
+    for row in results["ivf"]:
+        print(f"n_probe={row['n_probe']:>3}: recall@{args.k} {row['recall']:.3f} | "
+              f"p50 {row['p50_ms']:.3f}ms | p99 {row['p99_ms']:.3f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
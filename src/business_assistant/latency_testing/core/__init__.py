@@ -1,7 +1,9 @@
 from .tester import LatencyTester
 from .metrics import LatencyMetrics
+from .histogram import LatencyHistogram
 
 __all__ = [
     "LatencyTester",
-    "LatencyMetrics"
+    "LatencyMetrics",
+    "LatencyHistogram"
 ]
\ No newline at end of file
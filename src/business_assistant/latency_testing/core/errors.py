@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict
+
+
+class ErrorSummary:
+    """Erros agregados por tipo, guardando só as primeiras amostras de cada um."""
+
+    def __init__(self, max_samples: int = 10):
+        """
+        Args:
+            max_samples: Amostras (mensagem, prompt, horário) guardadas por tipo de erro
+        """
+        self.max_samples = max_samples
+        self.by_type: Dict[str, Dict[str, Any]] = {}
+        self.total = 0
+
+    def record(self, error: Exception, prompt: str) -> Dict[str, Any]:
+        """Conta o erro e retorna a amostra correspondente."""
+        now = datetime.now().isoformat()
+        sample = {
+            "timestamp": now,
+            "error": str(error),
+            "prompt": prompt
+        }
+        entry = self.by_type.setdefault(type(error).__name__, {
+            "count": 0,
+            "first_seen": now,
+            "last_seen": now,
+            "samples": []
+        })
+        entry["count"] += 1
+        entry["last_seen"] = now
+        if len(entry["samples"]) < self.max_samples:
+            entry["samples"].append(sample)
+        self.total += 1
+        return sample
+
+    def counts(self) -> Dict[str, int]:
+        """Quantidade de erros por tipo."""
+        return {error_type: entry["count"] for error_type, entry in self.by_type.items()}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "by_type": self.by_type
+        }
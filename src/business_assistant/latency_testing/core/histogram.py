@@ -0,0 +1,144 @@
+"""
+Histograma de latências com memória constante
+
+Os valores são agrupados em buckets de largura logarítmica (estilo HDR): o
+bucket i cobre (min_value * γ^(i-1), min_value * γ^i], com
+γ = (1 + erro) / (1 - erro), e é representado por um valor a no máximo
+`relative_error` de qualquer valor do intervalo. Registrar é O(1), a memória
+depende só da faixa de valores (alguns milhares de buckets para microssegundos
+a horas) e histogramas com os mesmos parâmetros podem ser somados (merge) ou
+subtraídos (percentis de uma janela a partir de dois snapshots).
+"""
+from typing import Any, Dict, List
+import math
+
+
+class LatencyHistogram:
+    """Histograma log-bucketed com erro relativo limitado."""
+
+    def __init__(self, relative_error: float = 0.01, min_value: float = 1e-6):
+        """
+        Args:
+            relative_error: Erro relativo máximo dos percentis (0.01 = 1%)
+            min_value: Menor valor distinguível; valores abaixo caem no primeiro bucket
+        """
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error deve estar entre 0 e 1")
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return math.ceil(math.log(value / self.min_value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        """Valor representativo do bucket (erro relativo <= relative_error)."""
+        if index == 0:
+            return self.min_value
+        return self.min_value * 2 * self._gamma ** index / (self._gamma + 1)
+
+    def record(self, value: float, count: int = 1) -> None:
+        """Registra um valor (count vezes)."""
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def _check_compatible(self, other: 'LatencyHistogram') -> None:
+        if (other.relative_error, other.min_value) != (self.relative_error, self.min_value):
+            raise ValueError("Histogramas com parâmetros diferentes não podem ser combinados")
+
+    def copy(self) -> 'LatencyHistogram':
+        """Snapshot independente do histograma."""
+        snapshot = LatencyHistogram(self.relative_error, self.min_value)
+        snapshot.counts = dict(self.counts)
+        snapshot.count = self.count
+        snapshot.total = self.total
+        snapshot.minimum = self.minimum
+        snapshot.maximum = self.maximum
+        return snapshot
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Soma os valores de outro histograma a este (ex.: de vários workers)."""
+        self._check_compatible(other)
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def subtract(self, earlier: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        Histograma dos valores registrados desde o snapshot `earlier`
+
+        Mínimo e máximo da janela são aproximados pelos buckets extremos.
+        """
+        self._check_compatible(earlier)
+        window = LatencyHistogram(self.relative_error, self.min_value)
+        for index, count in self.counts.items():
+            remaining = count - earlier.counts.get(index, 0)
+            if remaining > 0:
+                window.counts[index] = remaining
+        window.count = sum(window.counts.values())
+        window.total = self.total - earlier.total
+        if window.counts:
+            window.minimum = max(self.minimum, self._value(min(window.counts)))
+            window.maximum = min(self.maximum, self._value(max(window.counts)))
+        return window
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Percentil (0 a 100) pelo rank mais próximo; 0.0 se vazio."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.minimum), self.maximum)
+        return self.maximum
+
+    def as_dict(self) -> Dict[str, float]:
+        """Resumo com contagem, média, extremos e percentis usuais."""
+        if not self.count:
+            return {}
+        return {
+            "count": self.count,
+            "average": self.mean,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+    def buckets(self) -> List[List[float]]:
+        """Buckets não vazios como [limite superior, contagem], em ordem crescente."""
+        return [[self.min_value * self._gamma ** index, self.counts[index]] for index in sorted(self.counts)]
+
+    def export(self) -> Dict[str, Any]:
+        """Representação serializável em JSON."""
+        return {
+            "relative_error": self.relative_error,
+            "min_value": self.min_value,
+            "count": self.count,
+            "total": self.total,
+            "buckets": self.buckets()
+        }
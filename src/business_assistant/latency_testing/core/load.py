@@ -0,0 +1,217 @@
+"""
+Geração de carga para o LatencyTester
+
+Perfis de carga têm três fases: subida (ramp-up), regime (steady) e descida
+(ramp-down). No modo aberto (open-loop) a taxa de chegada sobe linearmente de
+0 até `rate`, fica constante e desce até 0; os instantes de envio são
+calculados de antemão (intervalos fixos ou processo de Poisson) e a latência
+é medida a partir do instante agendado, sem omissão coordenada. No modo
+fechado (closed-loop) o número de workers ativos segue o mesmo perfil.
+"""
+from typing import Any, Dict, Iterator, Optional
+import math
+import random
+
+from .histogram import LatencyHistogram
+
+PHASES = ('ramp_up', 'steady', 'ramp_down')
+
+
+class LoadProfile:
+    """Perfil trapezoidal de carga ao longo do tempo."""
+
+    def __init__(self, duration: float, ramp_up: float = 0.0, ramp_down: float = 0.0):
+        """
+        Args:
+            duration: Duração total do teste em segundos (inclui subida e descida)
+            ramp_up: Duração da subida em segundos
+            ramp_down: Duração da descida em segundos
+        """
+        if ramp_up + ramp_down > duration:
+            raise ValueError("ramp_up + ramp_down não pode exceder a duração do teste")
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.ramp_down = ramp_down
+        self.steady_end = duration - ramp_down
+
+    def phase(self, t: float) -> str:
+        """Fase do teste no instante t (segundos desde o início)."""
+        if t < self.ramp_up:
+            return 'ramp_up'
+        if t < self.steady_end:
+            return 'steady'
+        return 'ramp_down'
+
+    def level(self, t: float) -> float:
+        """Fração da carga máxima no instante t (0 a 1)."""
+        if t < 0 or t >= self.duration:
+            return 0.0
+        if t < self.ramp_up:
+            return t / self.ramp_up
+        if t < self.steady_end:
+            return 1.0
+        return (self.duration - t) / self.ramp_down
+
+    def phase_duration(self, phase: str) -> float:
+        return {
+            'ramp_up': self.ramp_up,
+            'steady': self.steady_end - self.ramp_up,
+            'ramp_down': self.ramp_down
+        }[phase]
+
+    def _inverse_load(self, area: float) -> Optional[float]:
+        """
+        Instante em que a carga acumulada (integral de `level`) atinge `area`
+
+        Usado para mapear chegadas de um processo de taxa 1 no perfil
+        (teorema da mudança de escala de tempo). Retorna None após o fim.
+        """
+        up_area = self.ramp_up / 2
+        steady_area = self.steady_end - self.ramp_up
+        if area < up_area:
+            return math.sqrt(2 * area * self.ramp_up)
+        area -= up_area
+        if area < steady_area:
+            return self.ramp_up + area
+        area -= steady_area
+        if area < self.ramp_down / 2:
+            # level decresce de 1 a 0: área = x - x²/(2D)  =>  x = D - sqrt(D² - 2 D área)
+            down = self.ramp_down
+            return self.steady_end + down - math.sqrt(max(0.0, down * down - 2 * down * area))
+        return None
+
+    def arrival_times(self, rate: float, arrival: str = 'fixed', seed: Optional[int] = None) -> Iterator[float]:
+        """
+        Gera os instantes de envio do modo aberto
+
+        Args:
+            rate: Taxa de chegada no regime (requisições por segundo)
+            arrival: 'fixed' (intervalos regulares) ou 'poisson' (intervalos exponenciais)
+            seed: Semente do gerador para chegadas Poisson reprodutíveis
+        """
+        if arrival not in ('fixed', 'poisson'):
+            raise ValueError(f"Tipo de chegada não suportado: {arrival}")
+        if rate <= 0:
+            raise ValueError("A taxa de chegada deve ser maior que zero")
+        rng = random.Random(seed)
+        area = 0.0
+        while True:
+            area += rng.expovariate(1.0) if arrival == 'poisson' else 1.0
+            t = self._inverse_load(area / rate)
+            if t is None:
+                return
+            yield t
+
+
+class LoadRecorder:
+    """
+    Acumula os resultados de um teste de carga em memória constante
+
+    Latências vão para um LatencyHistogram por fase e as janelas da linha do
+    tempo guardam só contadores, de forma que testes longos não crescem com
+    o número de requisições. Latências e erros contam na fase do envio; a
+    vazão (RPS) conta as respostas pelo instante em que terminaram, inclusive
+    as que chegam depois do fim do perfil.
+    """
+
+    def __init__(self, profile: LoadProfile, interval: float = 1.0, relative_error: float = 0.01):
+        """
+        Args:
+            profile: Perfil usado no teste
+            interval: Largura das janelas da linha do tempo em segundos
+            relative_error: Erro relativo dos percentis
+        """
+        self.profile = profile
+        self.interval = interval
+        self.histograms = {phase: LatencyHistogram(relative_error) for phase in PHASES}
+        self.phase_errors = {phase: 0 for phase in PHASES}
+        self.phase_completions = {phase: 0 for phase in PHASES}
+        windows = max(1, math.ceil(profile.duration / interval))
+        self.window_requests = [0] * windows
+        self.window_errors = [0] * windows
+        self.window_completions = [0] * windows
+        self.first_sent: Optional[float] = None
+        self.last_completed: Optional[float] = None
+
+    def record(self, scheduled: float, latency: Optional[float], error: Optional[str] = None,
+               completed: Optional[float] = None) -> None:
+        """
+        Args:
+            scheduled: Instante agendado do envio (segundos desde o início)
+            latency: Latência em segundos, medida a partir de `scheduled`
+            error: Tipo do erro, ou None em caso de sucesso
+            completed: Instante em que a resposta terminou (padrão: scheduled + latency)
+        """
+        if completed is None:
+            completed = scheduled + (latency or 0.0)
+        phase = self.profile.phase(scheduled)
+        window = min(int(scheduled // self.interval), len(self.window_requests) - 1)
+        self.window_requests[window] += 1
+        self.first_sent = scheduled if self.first_sent is None else min(self.first_sent, scheduled)
+        self.last_completed = completed if self.last_completed is None else max(self.last_completed, completed)
+        if error is None:
+            self.histograms[phase].record(latency)
+            self.phase_completions[self.profile.phase(completed)] += 1
+            completed_window = int(completed // self.interval)
+            while completed_window >= len(self.window_completions):
+                self.window_completions.append(0)
+            self.window_completions[completed_window] += 1
+        else:
+            self.phase_errors[phase] += 1
+            self.window_errors[window] += 1
+
+    def _phase_window(self, phase: str) -> float:
+        """Duração da fase; a última vai até a resposta mais tardia."""
+        if phase == 'ramp_down' and self.last_completed is not None:
+            return max(self.profile.duration, self.last_completed) - self.profile.steady_end
+        return self.profile.phase_duration(phase)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict com 'achieved_rps' (respostas bem-sucedidas por segundo entre o
+            primeiro envio e a última resposta), 'elapsed', 'error_rate',
+            'phases' (percentis por fase) e 'timeline' (requisições, erros e
+            respostas concluídas por janela)
+        """
+        phases = {}
+        for phase in PHASES:
+            histogram = self.histograms[phase]
+            errors = self.phase_errors[phase]
+            requests = histogram.count + errors
+            duration = self._phase_window(phase)
+            phases[phase] = {
+                'requests': requests,
+                'errors': errors,
+                'error_rate': errors / requests if requests else 0.0,
+                'achieved_rps': self.phase_completions[phase] / duration if duration else 0.0,
+                'average': histogram.mean,
+                'p50': histogram.percentile(50),
+                'p90': histogram.percentile(90),
+                'p95': histogram.percentile(95),
+                'p99': histogram.percentile(99)
+            }
+
+        timeline = []
+        windows = max(len(self.window_requests), len(self.window_completions))
+        for window in range(windows):
+            requests = self.window_requests[window] if window < len(self.window_requests) else 0
+            errors = self.window_errors[window] if window < len(self.window_errors) else 0
+            timeline.append({
+                'start': window * self.interval,
+                'requests': requests,
+                'errors': errors,
+                'error_rate': errors / requests if requests else 0.0,
+                'rps': self.window_completions[window] / self.interval
+            })
+
+        requests = sum(self.window_requests)
+        errors = sum(self.window_errors)
+        elapsed = self.last_completed - self.first_sent if requests else 0.0
+        return {
+            'achieved_rps': (requests - errors) / elapsed if elapsed > 0 else 0.0,
+            'elapsed': elapsed,
+            'error_rate': errors / requests if requests else 0.0,
+            'phases': phases,
+            'timeline': timeline
+        }
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
 from datetime import datetime
 
 @dataclass
@@ -16,6 +16,22 @@ class LatencyMetrics:
     failed_requests: int
     timestamp: str
     model_info: Dict[str, Any]
+    # Campos dos testes de carga (run_load_test)
+    mode: str = "sequential"
+    concurrency: int = 1
+    target_rps: float = 0.0
+    achieved_rps: float = 0.0
+    error_rate: float = 0.0
+    phases: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    timeline: List[Dict[str, Any]] = field(default_factory=list)
+    errors_by_type: Dict[str, int] = field(default_factory=dict)
+    # Campos das requisições em streaming (make_stream_request)
+    stream_requests: int = 0
+    ttft: Dict[str, float] = field(default_factory=dict)
+    inter_token_latency: Dict[str, float] = field(default_factory=dict)
+    output_tokens_per_second: Dict[str, float] = field(default_factory=dict)
+    input_tokens: int = 0
+    output_tokens: int = 0
 
     @classmethod
     def create_empty(cls) -> 'LatencyMetrics':
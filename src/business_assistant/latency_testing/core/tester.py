@@ -1,23 +1,45 @@
+import asyncio
 import time
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Optional, Set
 import statistics
 from datetime import datetime
 import json
 import numpy as np
 from ..providers import LLMProvider
+from .errors import ErrorSummary
+from .histogram import LatencyHistogram
+from .load import LoadProfile, LoadRecorder
 from .metrics import LatencyMetrics
+from ...assistant.utils.scheduler import RequestScheduler
+from ...assistant.utils.tokens import estimate_tokens
 
 class LatencyTester:
-    def __init__(self, provider: LLMProvider):
+    def __init__(self, provider: LLMProvider, scheduler: Optional[RequestScheduler] = None,
+                 priority: str = 'batch', exact: bool = False, relative_error: float = 0.01,
+                 max_error_samples: int = 10):
         """
         Inicializa o testador de latência
 
         Args:
             provider (LLMProvider): Instância do provedor de LLM
+            scheduler (RequestScheduler): Agendador compartilhado com os assistentes (opcional);
+                a latência medida exclui a espera na fila
+            priority (str): Classe de prioridade das requisições no agendador
+            exact (bool): Guarda também cada latência, erro e requisição em streaming
+                em listas (percentis exatos, memória crescente); por padrão só os
+                histogramas e o resumo de erros, em memória constante
+            relative_error (float): Erro relativo máximo dos percentis dos histogramas
+            max_error_samples (int): Amostras guardadas por tipo de erro
         """
         self.provider = provider
-        self.latencies: List[float] = []
-        self.errors: List[Dict] = []
+        self.scheduler = scheduler
+        self.priority = priority
+        self.exact = exact
+        self.relative_error = relative_error
+        self.max_error_samples = max_error_samples
+        self.clear_history()
 
     def make_test_request(self, prompt: str, **kwargs) -> float:
         """
@@ -30,27 +52,109 @@ class LatencyTester:
         Returns:
             float: Tempo de latência em segundos
         """
-        start_time = time.time()
         try:
-            self.provider.generate_response(prompt, **kwargs)
-            latency = time.time() - start_time
-            self.latencies.append(latency)
+            with self._slot(prompt, **kwargs):
+                start_time = time.perf_counter()
+                self.provider.generate_response(prompt, **kwargs)
+                latency = time.perf_counter() - start_time
+            self._record_latency(latency)
             return latency
 
         except Exception as e:
-            error_info = {
-                "timestamp": datetime.now().isoformat(),
-                "error": str(e),
-                "prompt": prompt
-            }
-            self.errors.append(error_info)
+            self._record_error(e, prompt)
+            raise
+
+    def make_stream_request(self, prompt: str, **kwargs) -> Dict:
+        """
+        Faz uma requisição em streaming e mede TTFT e vazão de tokens
+
+        Cada trecho recebido conta como um token para o intervalo entre
+        tokens. As contagens de tokens vêm da API quando o provedor as
+        informa; senão são estimadas a partir do texto.
+
+        Args:
+            prompt (str): Texto para enviar na requisição
+            **kwargs: Argumentos adicionais para passar ao provedor
+
+        Returns:
+            Dict: latency, ttft, inter_token (intervalos em segundos),
+            input_tokens, output_tokens e output_tokens_per_second
+        """
+        usage: Dict[str, int] = {}
+        chunks: List[str] = []
+        arrivals: List[float] = []
+        try:
+            with self._slot(prompt, **kwargs):
+                start_time = time.perf_counter()
+                for chunk in self.provider.generate_stream(prompt, usage=usage, **kwargs):
+                    arrivals.append(time.perf_counter())
+                    chunks.append(chunk)
+                latency = time.perf_counter() - start_time
+
+        except Exception as e:
+            self._record_error(e, prompt)
             raise
 
+        ttft = arrivals[0] - start_time if arrivals else latency
+        output_tokens = usage.get('output_tokens') or estimate_tokens("".join(chunks))
+        # Vazão da geração depois do primeiro token; sem streaming real, da requisição inteira
+        generation_time = latency - ttft if len(arrivals) > 1 else latency
+        record = {
+            "latency": latency,
+            "ttft": ttft,
+            "inter_token": [b - a for a, b in zip(arrivals, arrivals[1:])],
+            "input_tokens": usage.get('input_tokens') or estimate_tokens(prompt),
+            "output_tokens": output_tokens,
+            "output_tokens_per_second": output_tokens / generation_time if generation_time > 0 else 0.0
+        }
+        self._record_latency(latency)
+        self.ttft_histogram.record(ttft)
+        for gap in record["inter_token"]:
+            self.inter_token_histogram.record(gap)
+        self.tokens_per_second_histogram.record(record["output_tokens_per_second"])
+        self.input_tokens += record["input_tokens"]
+        self.output_tokens += record["output_tokens"]
+        if self.exact:
+            self.stream_records.append(record)
+        return record
+
+    def _record_latency(self, latency: float) -> None:
+        self.histogram.record(latency)
+        if self.exact:
+            self.latencies.append(latency)
+
+    def _record_error(self, error: Exception, prompt: str) -> None:
+        sample = self.error_summary.record(error, prompt)
+        if self.exact:
+            self.errors.append(sample)
+
+    def interval_histogram(self) -> LatencyHistogram:
+        """
+        Histograma das latências registradas desde a chamada anterior
+
+        Útil em testes longos para acompanhar percentis por janela sem
+        reiniciar o histograma acumulado.
+        """
+        current = self.histogram.copy()
+        window = current.subtract(self._interval_snapshot)
+        self._interval_snapshot = current
+        return window
+
+    def _slot(self, prompt: str, **kwargs):
+        """Vaga no agendador para a requisição, se houver agendador."""
+        if self.scheduler is None:
+            return nullcontext()
+        model_info = self.provider.get_model_info()
+        tokens = estimate_tokens(prompt) + kwargs.get('max_tokens', 1024)
+        return self.scheduler.acquire(str(model_info.get('provider', '')).lower(), model_info.get('model'),
+                                      tokens, self.priority)
+
     def run_batch_test(
             self,
             prompt: str,
             num_requests: int = 10,
             delay: float = 1.0,
+            stream: bool = False,
             **kwargs
     ) -> LatencyMetrics:
         """
@@ -60,6 +164,7 @@ class LatencyTester:
             prompt (str): Texto para enviar nas requisições
             num_requests (int): Número de requisições para fazer
             delay (float): Delay entre requisições em segundos
+            stream (bool): Usa streaming e mede também TTFT e tokens/s
             **kwargs: Argumentos adicionais para passar ao provedor
 
         Returns:
@@ -69,8 +174,13 @@ class LatencyTester:
 
         for i in range(num_requests):
             try:
-                latency = self.make_test_request(prompt, **kwargs)
-                print(f"Requisição {i + 1}/{num_requests}: {latency:.2f}s")
+                if stream:
+                    record = self.make_stream_request(prompt, **kwargs)
+                    print(f"Requisição {i + 1}/{num_requests}: {record['latency']:.2f}s "
+                          f"(TTFT {record['ttft']:.2f}s, {record['output_tokens_per_second']:.1f} tokens/s)")
+                else:
+                    latency = self.make_test_request(prompt, **kwargs)
+                    print(f"Requisição {i + 1}/{num_requests}: {latency:.2f}s")
                 if i < num_requests - 1:
                     time.sleep(delay)
             except Exception as e:
@@ -78,37 +188,269 @@ class LatencyTester:
 
         return self.calculate_metrics()
 
+    def run_load_test(
+            self,
+            prompt: str,
+            mode: str = 'closed',
+            concurrency: int = 10,
+            rate: float = 10.0,
+            arrival: str = 'fixed',
+            duration: float = 60.0,
+            ramp_up: float = 0.0,
+            ramp_down: float = 0.0,
+            interval: float = 1.0,
+            seed: Optional[int] = None,
+            max_consecutive_errors: Optional[int] = 10,
+            error_backoff: float = 0.1,
+            max_threads: int = 256,
+            **kwargs
+    ) -> LatencyMetrics:
+        """
+        Executa um teste de carga concorrente (ver run_load_test_async)
+
+        Args:
+            max_threads: Threads disponíveis para provedores síncronos, que
+                rodam generate_response em threads; limita as requisições simultâneas
+        """
+        async def run() -> LatencyMetrics:
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_threads))
+            return await self.run_load_test_async(prompt, mode, concurrency, rate, arrival, duration,
+                                                  ramp_up, ramp_down, interval, seed, max_consecutive_errors,
+                                                  error_backoff, **kwargs)
+
+        return asyncio.run(run())
+
+    async def run_load_test_async(
+            self,
+            prompt: str,
+            mode: str = 'closed',
+            concurrency: int = 10,
+            rate: float = 10.0,
+            arrival: str = 'fixed',
+            duration: float = 60.0,
+            ramp_up: float = 0.0,
+            ramp_down: float = 0.0,
+            interval: float = 1.0,
+            seed: Optional[int] = None,
+            max_consecutive_errors: Optional[int] = 10,
+            error_backoff: float = 0.1,
+            **kwargs
+    ) -> LatencyMetrics:
+        """
+        Executa um teste de carga concorrente
+
+        Args:
+            prompt (str): Texto para enviar nas requisições
+            mode (str): 'closed' (N workers, cada um envia ao receber a resposta
+                anterior) ou 'open' (chegadas em taxa fixa, independentes das respostas)
+            concurrency (int): Número de workers no modo fechado
+            rate (float): Requisições por segundo no regime do modo aberto
+            arrival (str): 'fixed' ou 'poisson' (modo aberto)
+            duration (float): Duração total em segundos, incluindo subida e descida
+            ramp_up (float): Segundos de subida linear da carga
+            ramp_down (float): Segundos de descida linear da carga
+            interval (float): Largura das janelas da linha do tempo em segundos
+            seed (int): Semente das chegadas Poisson
+            max_consecutive_errors (int): No modo fechado, erros seguidos após os
+                quais um worker para (None para nunca parar)
+            error_backoff (float): Espera inicial, em segundos, de um worker após
+                um erro no modo fechado; dobra a cada erro seguido (até 5s)
+            **kwargs: Argumentos adicionais para passar ao provedor
+
+        No modo aberto a latência é medida a partir do instante agendado de
+        envio, de forma que atrasos do próprio gerador ou filas também contem.
+
+        Returns:
+            LatencyMetrics: Métricas com RPS alcançado, taxa de erro, percentis
+            por fase e linha do tempo
+        """
+        if mode not in ('closed', 'open'):
+            raise ValueError(f"Modo de carga não suportado: {mode}")
+        if mode == 'open' and rate <= 0:
+            raise ValueError("rate deve ser maior que zero no modo aberto")
+        if mode == 'closed' and concurrency < 1:
+            raise ValueError("concurrency deve ser ao menos 1 no modo fechado")
+
+        profile = LoadProfile(duration, ramp_up, ramp_down)
+        recorder = LoadRecorder(profile, interval, self.relative_error)
+        print(f"Iniciando teste de carga ({mode}) por {duration:.0f}s...")
+        start = time.perf_counter()
+
+        async def send(scheduled: float) -> bool:
+            error = None
+            try:
+                async with self._slot(prompt, **kwargs):
+                    await self.provider.generate_response_async(prompt, **kwargs)
+            except Exception as e:
+                error = type(e).__name__
+                self._record_error(e, prompt)
+            latency = time.perf_counter() - (start + scheduled)
+            if error is None:
+                self._record_latency(latency)
+            recorder.record(scheduled, latency, error)
+            return error is None
+
+        if mode == 'open':
+            pending: Set[asyncio.Future] = set()
+            for scheduled in profile.arrival_times(rate, arrival, seed):
+                delay = start + scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = asyncio.ensure_future(send(scheduled))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        else:
+            stopped_workers = 0
+
+            async def worker(number: int) -> None:
+                nonlocal stopped_workers
+                # O worker entra e sai conforme o perfil de carga
+                start_at = profile.ramp_up * number / concurrency
+                stop_at = profile.steady_end + profile.ramp_down * (1 - number / concurrency)
+                await asyncio.sleep(start_at)
+                failures = 0
+                while time.perf_counter() - start < stop_at:
+                    if await send(time.perf_counter() - start):
+                        failures = 0
+                        continue
+                    failures += 1
+                    if max_consecutive_errors is not None and failures >= max_consecutive_errors:
+                        # Provedor falhando seguidamente: para em vez de repetir sem pausa
+                        stopped_workers += 1
+                        return
+                    remaining = stop_at - (time.perf_counter() - start)
+                    await asyncio.sleep(max(0.0, min(error_backoff * 2 ** (failures - 1), 5.0, remaining)))
+
+            await asyncio.gather(*(worker(number) for number in range(concurrency)))
+            if stopped_workers:
+                print(f"{stopped_workers} worker(s) parados após {max_consecutive_errors} erros seguidos")
+
+        summary = recorder.summary()
+        metrics = self.calculate_metrics() if self.histogram.count else LatencyMetrics.create_empty()
+        metrics.failed_requests = self.error_summary.total
+        metrics.errors_by_type = self.error_summary.counts()
+        metrics.model_info = self.provider.get_model_info()
+        metrics.mode = mode
+        metrics.concurrency = concurrency if mode == 'closed' else 0
+        metrics.target_rps = rate if mode == 'open' else 0.0
+        metrics.achieved_rps = summary["achieved_rps"]
+        metrics.error_rate = summary["error_rate"]
+        metrics.phases = summary["phases"]
+        metrics.timeline = summary["timeline"]
+
+        print(f"Teste de carga concluído: {sum(recorder.window_requests)} requisições, "
+              f"{metrics.achieved_rps:.1f} req/s, erros {metrics.error_rate:.1%}")
+        return metrics
+
     def calculate_metrics(self) -> LatencyMetrics:
-        """Calcula métricas estatísticas das latências registradas"""
-        if not self.latencies:
+        """
+        Calcula métricas estatísticas das latências registradas
+
+        Usa as listas no modo exato; senão, os histogramas (percentis com
+        erro relativo limitado, sem percorrer as latências).
+        """
+        if not self.histogram.count:
             raise ValueError("Nenhum dado de latência disponível")
 
-        return LatencyMetrics(
-            average=statistics.mean(self.latencies),
-            minimum=min(self.latencies),
-            maximum=max(self.latencies),
-            p50=np.percentile(self.latencies, 50),
-            p90=np.percentile(self.latencies, 90),
-            p95=np.percentile(self.latencies, 95),
-            p99=np.percentile(self.latencies, 99),
-            total_requests=len(self.latencies),
-            failed_requests=len(self.errors),
-            timestamp=datetime.now().isoformat(),
-            model_info=self.provider.get_model_info()
-        )
+        if self.exact:
+            metrics = LatencyMetrics(
+                average=statistics.mean(self.latencies),
+                minimum=min(self.latencies),
+                maximum=max(self.latencies),
+                p50=np.percentile(self.latencies, 50),
+                p90=np.percentile(self.latencies, 90),
+                p95=np.percentile(self.latencies, 95),
+                p99=np.percentile(self.latencies, 99),
+                total_requests=len(self.latencies),
+                failed_requests=len(self.errors),
+                timestamp=datetime.now().isoformat(),
+                model_info=self.provider.get_model_info()
+            )
+        else:
+            metrics = LatencyMetrics(
+                average=self.histogram.mean,
+                minimum=self.histogram.minimum,
+                maximum=self.histogram.maximum,
+                p50=self.histogram.percentile(50),
+                p90=self.histogram.percentile(90),
+                p95=self.histogram.percentile(95),
+                p99=self.histogram.percentile(99),
+                total_requests=self.histogram.count,
+                failed_requests=self.error_summary.total,
+                timestamp=datetime.now().isoformat(),
+                model_info=self.provider.get_model_info()
+            )
+        metrics.errors_by_type = self.error_summary.counts()
+
+        if self.exact and self.stream_records:
+            metrics.stream_requests = len(self.stream_records)
+            metrics.ttft = self._distribution([r['ttft'] for r in self.stream_records])
+            metrics.inter_token_latency = self._distribution(
+                [gap for r in self.stream_records for gap in r['inter_token']])
+            metrics.output_tokens_per_second = self._distribution(
+                [r['output_tokens_per_second'] for r in self.stream_records])
+        elif self.ttft_histogram.count:
+            metrics.stream_requests = self.ttft_histogram.count
+            metrics.ttft = self._histogram_distribution(self.ttft_histogram)
+            metrics.inter_token_latency = self._histogram_distribution(self.inter_token_histogram)
+            metrics.output_tokens_per_second = self._histogram_distribution(self.tokens_per_second_histogram)
+        metrics.input_tokens = self.input_tokens
+        metrics.output_tokens = self.output_tokens
+        return metrics
+
+    @staticmethod
+    def _distribution(values: List[float]) -> Dict[str, float]:
+        """Média e percentis de uma lista de valores (vazio se não houver valores)."""
+        if not values:
+            return {}
+        return {
+            "average": statistics.mean(values),
+            "p50": float(np.percentile(values, 50)),
+            "p90": float(np.percentile(values, 90)),
+            "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99))
+        }
+
+    @staticmethod
+    def _histogram_distribution(histogram: LatencyHistogram) -> Dict[str, float]:
+        """Média e percentis de um histograma (vazio se não houver valores)."""
+        if not histogram.count:
+            return {}
+        return {
+            "average": histogram.mean,
+            "p50": histogram.percentile(50),
+            "p90": histogram.percentile(90),
+            "p95": histogram.percentile(95),
+            "p99": histogram.percentile(99)
+        }
 
     def export_results(self, filename: str):
         """Exporta os resultados dos testes para um arquivo JSON"""
         results = {
             "metrics": self.calculate_metrics().__dict__,
-            "raw_latencies": self.latencies,
-            "errors": self.errors
+            "histogram": self.histogram.export(),
+            "errors": self.error_summary.as_dict()
         }
+        if self.exact:
+            results["raw_latencies"] = self.latencies
+            results["raw_errors"] = self.errors
+            results["stream_requests"] = self.stream_records
 
         with open(filename, 'w') as f:
             json.dump(results, f, indent=2)
 
     def clear_history(self):
         """Limpa o histórico de latências e erros"""
-        self.latencies = []
-        self.errors = []
\ No newline at end of file
+        self.latencies: List[float] = []
+        self.errors: List[Dict] = []
+        self.stream_records: List[Dict] = []
+        self.histogram = LatencyHistogram(self.relative_error)
+        self.ttft_histogram = LatencyHistogram(self.relative_error)
+        self.inter_token_histogram = LatencyHistogram(self.relative_error)
+        self.tokens_per_second_histogram = LatencyHistogram(self.relative_error)
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.error_summary = ErrorSummary(self.max_error_samples)
+        self._interval_snapshot = self.histogram.copy()
@@ -1,11 +1,15 @@
 from .base import LLMProvider
 from .anthropic import AnthropicProvider
 from .openai import OpenAIProvider
+from .mock import MockProvider
 from .factory import ProviderFactory
 
+ProviderFactory.register_provider('mock', MockProvider)
+
 __all__ = [
     "LLMProvider",
     "AnthropicProvider",
     "OpenAIProvider",
+    "MockProvider",
     "ProviderFactory"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
 from .base import LLMProvider
 from anthropic import Anthropic
 
@@ -7,7 +7,8 @@ class AnthropicProvider(LLMProvider):
     def initialize(self, **kwargs) -> None:
         self.api_key = kwargs.get('api_key')
         self.model = kwargs.get('model', 'claude-3-sonnet-20240229')
-        self.client = Anthropic(api_key=self.api_key)
+        # base_url permite apontar para um servidor compatível (ex.: MockLLMServer)
+        self.client = Anthropic(api_key=self.api_key, base_url=kwargs.get('base_url'))
 
     def generate_response(self, prompt: str, **kwargs) -> str:
         response = self.client.messages.create(
@@ -17,6 +18,18 @@ class AnthropicProvider(LLMProvider):
         )
         return response.content[0].text
 
+    def generate_stream(self, prompt: str, usage: Optional[Dict[str, int]] = None, **kwargs) -> Iterator[str]:
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=kwargs.get('max_tokens', 1024),
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            if usage is not None:
+                final = stream.get_final_message().usage
+                usage.update(input_tokens=final.input_tokens, output_tokens=final.output_tokens)
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             "provider": "Anthropic",
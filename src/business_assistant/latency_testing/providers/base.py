@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
+import asyncio
 
 
 class LLMProvider(ABC):
@@ -18,4 +19,26 @@ class LLMProvider(ABC):
     @abstractmethod
     def get_model_info(self) -> Dict[str, Any]:
         """Retorna informações sobre o modelo sendo usado"""
-        pass
\ No newline at end of file
+        pass
+
+    async def generate_response_async(self, prompt: str, **kwargs) -> str:
+        """
+        Versão assíncrona de generate_response usada nos testes de carga
+
+        Por padrão executa generate_response em uma thread; provedores com
+        cliente assíncrono podem sobrescrever.
+        """
+        return await asyncio.to_thread(self.generate_response, prompt, **kwargs)
+
+    def generate_stream(self, prompt: str, usage: Optional[Dict[str, int]] = None, **kwargs) -> Iterator[str]:
+        """
+        Gera a resposta em streaming, trecho a trecho
+
+        Args:
+            prompt: Texto para enviar
+            usage: Dict preenchido com 'input_tokens' e 'output_tokens' informados pela API
+
+        Por padrão entrega a resposta completa como um único trecho (sem
+        streaming real); provedores com streaming devem sobrescrever.
+        """
+        yield self.generate_response(prompt, **kwargs)
@@ -0,0 +1,26 @@
+from typing import Dict, Any, Iterator, Optional
+from .base import LLMProvider
+from ...assistant.utils.mock_llm import MockLLM
+
+
+class MockProvider(LLMProvider):
+    """Provedor simulado e local (ver MockLLM), para testes sem rede e reprodutíveis."""
+
+    def initialize(self, **kwargs) -> None:
+        self.model = kwargs.pop('model', 'mock-model')
+        self.llm = kwargs.pop('llm', None) or MockLLM(**kwargs)
+
+    def generate_response(self, prompt: str, **kwargs) -> str:
+        return self.llm.complete(prompt)
+
+    async def generate_response_async(self, prompt: str, **kwargs) -> str:
+        return await self.llm.complete_async(prompt)
+
+    def generate_stream(self, prompt: str, usage: Optional[Dict[str, int]] = None, **kwargs) -> Iterator[str]:
+        return self.llm.stream(prompt, usage)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "Mock",
+            "model": self.model
+        }
@@ -1,5 +1,5 @@
-from models_tests.utils.latency_checker import LLMProvider
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
+from .base import LLMProvider
 from openai import OpenAI
 
 class OpenAIProvider(LLMProvider):
@@ -7,7 +7,8 @@ class OpenAIProvider(LLMProvider):
     def initialize(self, **kwargs):
         self.api_key = kwargs.get('api_key')
         self.model = kwargs.get('model', 'gpt-4')
-        self.client = OpenAI(api_key=self.api_key)
+        # base_url permite apontar para um servidor compatível (ex.: MockLLMServer)
+        self.client = OpenAI(api_key=self.api_key, base_url=kwargs.get('base_url'))
 
     def generate_response(self, prompt: str, **kwargs) -> str:
         response = self.client.chat.completions.create(
@@ -17,6 +18,20 @@ class OpenAIProvider(LLMProvider):
         )
         return response.choices[0].message.content
 
+    def generate_stream(self, prompt: str, usage: Optional[Dict[str, int]] = None, **kwargs) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=kwargs.get('max_tokens', 1024),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if usage is not None and chunk.usage is not None:
+                usage.update(input_tokens=chunk.usage.prompt_tokens, output_tokens=chunk.usage.completion_tokens)
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             "provider": "OpenAI",
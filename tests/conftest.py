@@ -0,0 +1,8 @@
+import os
+import sys
+
+# O pacote fica em src/ e alguns módulos antigos importam models_tests a partir da raiz
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "src"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
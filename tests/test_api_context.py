@@ -0,0 +1,50 @@
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+DOCUMENTATION = {
+    "nfe": {"emissao": "Para emitir uma NF-e acesse o menu Fiscal", "cancelamento": "Cancele a NF-e em 24 horas"},
+    "sped": {"prazo": "O prazo de entrega do SPED fiscal e mensal"},
+    "folha": {"ferias": "As ferias sao calculadas no modulo de folha"}
+}
+
+
+def make_kb(**kwargs):
+    return HybridKnowledgeBase(None, api_key="chave", client_registry=ClientRegistry(),
+                               documentation=DOCUMENTATION, **kwargs)
+
+
+def test_retrieval_context_sends_only_relevant_sections():
+    kb = make_kb(context_mode='retrieval', context_max_sections=2)
+    context, info = kb._build_api_context("prazo do SPED")
+    full_context, full_info = make_kb()._build_api_context("prazo do SPED")
+
+    assert "[sped.prazo]" in context and "ferias" not in context
+    assert info['mode'] == 'retrieval' and 1 <= info['sections'] <= 2
+    assert info['tokens'] < full_info['tokens']
+    assert full_info['mode'] == 'full' and "ferias" in full_context
+
+
+def test_retrieval_context_respects_token_budget():
+    documentation = {"grande": "SPED " * 400, "pequena": "prazo do SPED fiscal"}
+    kb = HybridKnowledgeBase(None, api_key="chave", client_registry=ClientRegistry(),
+                             documentation=documentation, context_mode='retrieval', context_token_budget=50)
+    context, info = kb._build_api_context("SPED")
+
+    assert info['sections'] == 1 and "[pequena]" in context and "[grande]" not in context
+
+
+def test_get_info_reports_context_sent_to_api():
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as server:
+        kb = make_kb(context_mode='retrieval', api_base_url=server.url)
+        info = kb.get_info("prazo do SPED", force_mode="api")
+
+    assert info['mode_used'] == 'api' and 'response' in info['results']
+    assert info['context']['mode'] == 'retrieval' and info['context']['sections'] >= 1
+
+
+def test_invalid_context_mode_is_rejected():
+    with pytest.raises(ValueError):
+        make_kb(context_mode='tudo')
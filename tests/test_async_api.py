@@ -0,0 +1,68 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+
+def make_kb(tmp_path, server, **kwargs):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    return HybridKnowledgeBase(str(path), api_key="chave", client_registry=ClientRegistry(),
+                               api_base_url=server.url, **kwargs)
+
+
+def test_async_api_call_does_not_block_event_loop(tmp_path):
+    with MockLLMServer(MockLLM(ttft=0.3, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server)
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.02)
+                    ticks += 1
+
+            ticking = asyncio.ensure_future(ticker())
+            info = await kb.get_info_async("Qual o prazo do SPED?", force_mode="api")
+            ticking.cancel()
+            return info, ticks
+
+        info, ticks = asyncio.run(run())
+
+    assert 'response' in info['results']
+    # O event loop seguiu rodando enquanto a API respondia
+    assert ticks >= 5
+
+
+def test_async_api_timeout_returns_error(tmp_path):
+    with MockLLMServer(MockLLM(ttft=1.0, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server)
+        started = time.perf_counter()
+        info = asyncio.run(kb.get_info_async("Qual o prazo do SPED?", force_mode="api", timeout=0.1))
+        elapsed = time.perf_counter() - started
+
+    assert "Tempo limite" in info['results']['error']
+    assert elapsed < 0.8
+
+
+def test_cancelling_caller_cancels_api_request(tmp_path):
+    with MockLLMServer(MockLLM(ttft=1.0, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server)
+
+        async def run():
+            task = asyncio.ensure_future(kb.get_info_async("Qual o prazo do SPED?", force_mode="api"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            started = time.perf_counter()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return time.perf_counter() - started
+
+        assert asyncio.run(run()) < 0.5
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.providers.anthropic import AnthropicAssistant
+from business_assistant.assistant.providers.openai import OpenAIAssistant
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as running:
+        yield running
+
+
+@pytest.fixture
+def documentation(tmp_path):
+    path = tmp_path / "documentacao.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("provider", ["anthropic", "openai"])
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_registry_builds_sdk_clients(provider, asynchronous):
+    registry = ClientRegistry(max_connections=4)
+    client = registry.get_client(provider, "chave", asynchronous=asynchronous)
+
+    assert registry.get_client(provider, "chave", asynchronous=asynchronous) is client
+    assert registry.get_client(provider, "outra", asynchronous=asynchronous) is not client
+    stats = next(iter(registry.get_stats().values()))
+    assert stats["max_connections"] == 4
+
+
+def test_pooled_clients_reach_server(server):
+    registry = ClientRegistry()
+    anthropic_client = registry.get_client("anthropic", "chave", server.url, asynchronous=False)
+    openai_client = registry.get_client("openai", "chave", server.url + "/v1", asynchronous=False)
+
+    message = anthropic_client.messages.create(model="m", max_tokens=10,
+                                               messages=[{"role": "user", "content": "oi"}])
+    completion = openai_client.chat.completions.create(model="m", messages=[{"role": "user", "content": "oi"}])
+
+    assert message.content[0].text == completion.choices[0].message.content
+    assert all(stats["requests"] == 1 for stats in registry.get_stats().values())
+
+
+def test_providers_construct_through_registry(server, documentation):
+    registry = ClientRegistry()
+    kb = HybridKnowledgeBase(documentation, api_key="chave", client_registry=registry, api_base_url=server.url)
+    anthropic_assistant = AnthropicAssistant(kb, api_key="chave", base_url=server.url, client_registry=registry)
+    openai_assistant = OpenAIAssistant(kb, api_key="chave", base_url=server.url + "/v1", client_registry=registry)
+
+    # A base e o assistente Anthropic com a mesma chave e URL compartilham o cliente
+    assert kb.async_client._client is anthropic_assistant.async_client._client
+    assert openai_assistant.client is registry.get_client("openai", "chave", server.url + "/v1")
+
+    async def ask():
+        return await anthropic_assistant.async_client.messages.create(
+            model="m", max_tokens=10, messages=[{"role": "user", "content": "oi"}])
+
+    assert asyncio.run(ask()).usage.output_tokens == 3
+    asyncio.run(registry.aclose())
+
+
+@pytest.mark.parametrize("system", ["Você é um assistente fiscal. " * 20,
+                                    [{"type": "text", "text": "Você é um assistente fiscal. " * 20}]])
+def test_mock_server_counts_system_prompt_tokens(server, system):
+    client = ClientRegistry().get_client("anthropic", "chave", server.url, asynchronous=False)
+    messages = [{"role": "user", "content": "oi"}]
+
+    without_system = client.messages.create(model="m", max_tokens=10, messages=messages)
+    with_system = client.messages.create(model="m", max_tokens=10, system=system, messages=messages)
+
+    assert with_system.usage.input_tokens > without_system.usage.input_tokens + 100
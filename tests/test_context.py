@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from business_assistant.assistant.utils.context import ContextManager, MemoryContextBackend, SQLiteContextBackend
+
+
+def test_flushing_context_stays_visible_until_written(tmp_path):
+    # Sem cache em memória: a leitura depende das alterações pendentes ou do banco
+    backend = SQLiteContextBackend(str(tmp_path / "contexts.db"), cache=MemoryContextBackend(max_entries=0),
+                                   flush_interval=60)
+    write = backend._write
+
+    def slow_write(batch):
+        time.sleep(0.2)
+        write(batch)
+
+    backend._write = slow_write
+
+    async def run():
+        await backend.save("conversa", {"turns": 1})
+        flush = asyncio.ensure_future(backend.flush())
+        await asyncio.sleep(0.05)
+        during = await backend.load("conversa")
+        # Lida do lote em gravação, sem ir ao banco nem esperar a transação
+        reads_during = backend.db_reads
+        await flush
+        after = await backend.load("conversa")
+        await backend.close()
+        return during, reads_during, after
+
+    during, reads_during, after = asyncio.run(run())
+    assert during == {"turns": 1}
+    assert reads_during == 0
+    assert after == {"turns": 1}
+
+
+def test_failed_flush_keeps_changes_pending(tmp_path):
+    backend = SQLiteContextBackend(str(tmp_path / "contexts.db"), flush_interval=60)
+    write = backend._write
+
+    def failing_write(batch):
+        raise OSError("disco cheio")
+
+    async def run():
+        await backend.save("conversa", {"turns": 1})
+        backend._write = failing_write
+        try:
+            await backend.flush()
+        except OSError:
+            pass
+        pending = backend.get_stats()["pending_writes"]
+        backend._write = write
+        await backend.close()
+        return pending
+
+    assert asyncio.run(run()) == 1
+    reopened = SQLiteContextBackend(str(tmp_path / "contexts.db"))
+    assert asyncio.run(reopened.load("conversa")) == {"turns": 1}
+    asyncio.run(reopened.close())
+
+
+def test_save_during_database_read_wins(tmp_path):
+    path = str(tmp_path / "contexts.db")
+    writer = SQLiteContextBackend(path)
+
+    async def seed():
+        await writer.save("conversa", {"v": 1})
+        await writer.close()
+
+    asyncio.run(seed())
+
+    backend = SQLiteContextBackend(path)
+    read = backend._read
+
+    def slow_read(context_id):
+        time.sleep(0.1)
+        return read(context_id)
+
+    backend._read = slow_read
+
+    async def run():
+        loading = asyncio.ensure_future(backend.load("conversa"))
+        await asyncio.sleep(0.02)
+        await backend.save("conversa", {"v": 2})
+        first = await loading
+        second = await backend.load("conversa")
+        await backend.close()
+        return first, second
+
+    assert asyncio.run(run()) == ({"v": 2}, {"v": 2})
+
+
+def test_default_context_manager_keeps_contexts_for_the_process():
+    manager = ContextManager()
+
+    async def run():
+        for i in range(20000):
+            await manager.save(f"conversa-{i}", {"turn": i})
+        return await manager.load("conversa-0")
+
+    assert asyncio.run(run()) == {"turn": 0}
+    stats = manager.get_stats()
+    assert stats["entries"] == 20000 and stats["evictions"] == 0
+    assert manager.backend.ttl is None
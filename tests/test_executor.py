@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+
+
+def write(path, documentation):
+    path.write_text(json.dumps(documentation), encoding="utf-8")
+    return str(path)
+
+
+def local_keys(kb, query):
+    async def search():
+        return await kb.get_info_async(query, force_mode="local")
+    return [result["key"] for result in asyncio.run(search())["results"]]
+
+
+def test_process_workers_search_the_loaded_documentation(tmp_path):
+    path = write(tmp_path / "doc.json", {"nfe": "Para emitir uma NF-e acesse Fiscal"})
+    kb = HybridKnowledgeBase(path, api_key=None, client_registry=ClientRegistry(),
+                             executor="process", executor_workers=1, local_cache_size=0)
+    try:
+        # O arquivo muda depois do carregamento: os processos seguem a base em memória
+        write(tmp_path / "doc.json", {"cte": "Para emitir um CT-e acesse Transporte"})
+        assert local_keys(kb, "nfe emitir") == ["nfe"]
+
+        kb.reload_documentation(write(tmp_path / "nova.json", {"mdfe": "Para emitir um MDF-e acesse Fiscal"}))
+        assert local_keys(kb, "mdfe emitir") == ["mdfe"]
+    finally:
+        kb.executor.shutdown()
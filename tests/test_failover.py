@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.providers.failover import FailoverAssistant
+from business_assistant.assistant.providers.mock import MockAssistant
+from business_assistant.assistant.utils.exceptions import ProviderError
+from business_assistant.assistant.utils.mock_llm import MockLLM
+from business_assistant.assistant.utils.scheduler import RequestScheduler
+from business_assistant.assistant.utils.single_flight import SingleFlight
+
+
+class TrackedLLM(MockLLM):
+    """MockLLM que registra chamadas iniciadas, concluídas e canceladas."""
+
+    def __init__(self, delay, fail=False):
+        super().__init__(ttft=0.0, output_tokens=3, response_text=f"resposta em {delay}s")
+        self.delay = delay
+        self.fail = fail
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+
+    async def complete_async(self, prompt, usage=None):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ProviderError("falha simulada")
+        self.finished += 1
+        return self.response_text
+
+
+def make_assistant(llm):
+    knowledge_base = KnowledgeBase({"nfe": "Para emitir uma NF-e acesse Fiscal"})
+    # SingleFlight próprio: o hedge entre providers iguais não pode ser coalescido
+    return MockAssistant(knowledge_base, llm=llm, scheduler=RequestScheduler(), single_flight=SingleFlight())
+
+
+def test_losing_hedge_cancels_upstream_call():
+    slow, fast = TrackedLLM(5.0), TrackedLLM(0.01)
+    failover = FailoverAssistant([make_assistant(slow), make_assistant(fast)], default_hedge_delay=0.05)
+
+    async def run():
+        answer = await failover.chat("Como emitir NF-e?")
+        await asyncio.sleep(0.05)
+        return answer
+
+    assert asyncio.run(run()) == fast.response_text
+    assert slow.cancelled == 1 and slow.finished == 0
+    assert failover.providers[0].single_flight.get_stats()["cancelled"] == 1
+    assert failover.backup_wins == 1
+    # Perdeu depois do próprio atraso: a lentidão entra nos percentis
+    assert len(failover.health[0].latencies) == 1
+
+
+def test_failed_backup_launches_next_while_primary_runs():
+    slow, broken, fast = TrackedLLM(5.0), TrackedLLM(0.01, fail=True), TrackedLLM(0.01)
+    failover = FailoverAssistant([make_assistant(slow), make_assistant(broken), make_assistant(fast)],
+                                 default_hedge_delay=0.05)
+
+    async def run():
+        return await asyncio.wait_for(failover.chat("Como emitir NF-e?"), timeout=1.0)
+
+    assert asyncio.run(run()) == fast.response_text
+    assert failover.failovers == 1
+    assert failover.health[1].failures == 1
+    assert failover.health[1].latencies[0] >= 0.01
+
+
+def test_all_providers_failing_raises():
+    failover = FailoverAssistant([make_assistant(TrackedLLM(0.0, fail=True)),
+                                  make_assistant(TrackedLLM(0.0, fail=True))])
+
+    with pytest.raises(ProviderError):
+        asyncio.run(failover.chat("Como emitir NF-e?"))
+
+
+def test_single_flight_keeps_call_while_a_caller_waits():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("chave", upstream))
+        second = asyncio.ensure_future(flight.do("chave", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "ok"
+    assert calls == [1]
+    assert flight.get_stats()["cancelled"] == 0
+
+
+class GatedLLM(MockLLM):
+    """Termina junto com as demais chamadas do mesmo portão (mesma volta do event loop)."""
+
+    def __init__(self, gate, fail=False, opens_gate=False):
+        super().__init__(ttft=0.0, output_tokens=3, response_text="resposta da reserva")
+        self.gate = gate
+        self.fail = fail
+        self.opens_gate = opens_gate
+
+    async def complete_async(self, prompt, usage=None):
+        if self.opens_gate:
+            self.gate.set()
+        await self.gate.wait()
+        if self.fail:
+            raise ProviderError("falha simulada")
+        return self.response_text
+
+
+def test_success_and_failure_in_same_batch_returns_success():
+    async def run():
+        gate = asyncio.Event()
+        spare = TrackedLLM(0.0)
+        failover = FailoverAssistant([make_assistant(GatedLLM(gate, fail=True)),
+                                      make_assistant(GatedLLM(gate, opens_gate=True)),
+                                      make_assistant(spare)], default_hedge_delay=0.01)
+        return await failover.chat("Como emitir NF-e?"), failover, spare
+
+    answer, failover, spare = asyncio.run(run())
+    assert answer == "resposta da reserva"
+    assert failover.failovers == 0 and failover.backup_wins == 1
+    assert spare.started == 0
@@ -0,0 +1,103 @@
+import math
+import random
+
+import pytest
+
+from business_assistant.latency_testing.core.errors import ErrorSummary
+from business_assistant.latency_testing.core.histogram import LatencyHistogram
+from business_assistant.latency_testing.core.tester import LatencyTester
+from business_assistant.latency_testing.providers.base import LLMProvider
+
+
+class FlakyProvider(LLMProvider):
+    """Falha nos prompts que contêm 'falha'."""
+
+    def initialize(self, **kwargs):
+        pass
+
+    def generate_response(self, prompt, **kwargs):
+        if "falha" in prompt:
+            raise TimeoutError(prompt)
+        return "ok"
+
+    def get_model_info(self):
+        return {"provider": "Instável", "model": "teste"}
+
+
+def exact_percentile(values, percentile):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(percentile / 100 * len(ordered))) - 1]
+
+
+def test_percentiles_stay_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-1, 1) for _ in range(20000)]
+    histogram = LatencyHistogram(relative_error=0.01)
+    for value in values:
+        histogram.record(value)
+
+    for percentile in (50, 90, 95, 99, 99.9):
+        exact = exact_percentile(values, percentile)
+        assert histogram.percentile(percentile) == pytest.approx(exact, rel=0.01)
+    assert histogram.count == len(values)
+    assert histogram.minimum == min(values) and histogram.maximum == max(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+    # Memória constante: bem menos buckets que valores
+    assert len(histogram.counts) < 1000
+
+
+def test_merge_and_subtract_snapshots():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in (0.1, 0.2, 0.3):
+        first.record(value)
+    snapshot = first.copy()
+    for value in (1.0, 2.0):
+        first.record(value)
+        second.record(value)
+
+    window = first.subtract(snapshot)
+    assert window.count == 2 and window.percentile(50) == pytest.approx(1.0, rel=0.01)
+
+    merged = snapshot.copy().merge(second)
+    assert merged.count == first.count and merged.counts == first.counts
+
+
+def test_empty_and_incompatible_histograms():
+    empty = LatencyHistogram()
+    assert empty.percentile(99) == 0.0 and empty.as_dict() == {} and empty.mean == 0.0
+
+    with pytest.raises(ValueError):
+        LatencyHistogram(relative_error=0.0)
+    with pytest.raises(ValueError):
+        empty.merge(LatencyHistogram(relative_error=0.05))
+
+
+def test_error_summary_groups_by_type_and_caps_samples():
+    summary = ErrorSummary(max_samples=2)
+    for attempt in range(5):
+        summary.record(TimeoutError(f"timeout {attempt}"), "prompt")
+    summary.record(ValueError("resposta inválida"), "outro prompt")
+
+    assert summary.total == 6
+    assert summary.counts() == {"TimeoutError": 5, "ValueError": 1}
+    timeouts = summary.as_dict()["by_type"]["TimeoutError"]
+    assert [sample["error"] for sample in timeouts["samples"]] == ["timeout 0", "timeout 1"]
+    assert timeouts["first_seen"] <= timeouts["last_seen"]
+
+
+def test_tester_keeps_only_histograms_and_error_summary_by_default():
+    tester = LatencyTester(FlakyProvider(), max_error_samples=1)
+    for prompt in ("a", "b", "falha 1", "falha 2"):
+        try:
+            tester.make_test_request(prompt)
+        except TimeoutError:
+            pass
+
+    assert tester.latencies == [] and tester.errors == []
+    assert tester.histogram.count == 2
+    assert tester.error_summary.counts() == {"TimeoutError": 2}
+    assert len(tester.error_summary.by_type["TimeoutError"]["samples"]) == 1
+
+    assert tester.interval_histogram().count == 2
+    tester.make_test_request("c")
+    assert tester.interval_histogram().count == 1
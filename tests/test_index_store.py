@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.index_store import IndexFile
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.exceptions import KnowledgeBaseError
+
+DOCUMENTATION = {"nfe": "Para emitir uma NF-e acesse Fiscal", "cte": "Para emitir um CT-e acesse Transporte"}
+
+
+def compile_hybrid(tmp_path, documentation, name="hybrid.idx"):
+    source = tmp_path / "doc.json"
+    source.write_text(json.dumps(documentation), encoding="utf-8")
+    index_path = str(tmp_path / name)
+    HybridKnowledgeBase.compile_index(str(source), index_path)
+    return index_path
+
+
+def test_index_file_closes_as_context_manager(tmp_path):
+    index_path = compile_hybrid(tmp_path, DOCUMENTATION)
+
+    with IndexFile(index_path) as index_file:
+        keys = index_file.keys
+        assert sorted(keys) == ["cte", "nfe"]
+        index_file.field("key").get_postings("nfe")
+
+    assert index_file.closed
+    with pytest.raises(ValueError):
+        list(keys)
+    index_file.close()
+
+
+def test_update_on_compiled_knowledge_base_raises(tmp_path):
+    index_path = str(tmp_path / "knowledge.idx")
+    KnowledgeBase(DOCUMENTATION, scorer="bm25").compile_index(index_path)
+    kb = KnowledgeBase(None, scorer="bm25", index_path=index_path)
+    index_file = kb._index_file
+
+    with pytest.raises(KnowledgeBaseError):
+        kb.update_knowledge({"mdfe": "Para emitir um MDF-e acesse Fiscal"})
+    assert kb.search("nfe")[0]["key"] == "nfe"
+
+    replacement = tmp_path / "nova.json"
+    replacement.write_text(json.dumps({"mdfe": "Para emitir um MDF-e acesse Fiscal"}), encoding="utf-8")
+    kb.import_knowledge(str(replacement))
+    assert index_file.closed
+    kb.update_knowledge({"gnre": "Guia de recolhimento"})
+    assert kb.search("gnre")[0]["key"] == "gnre"
+
+
+def test_reload_index_only_hybrid_base(tmp_path):
+    index_path = compile_hybrid(tmp_path, DOCUMENTATION)
+    kb = HybridKnowledgeBase(None, api_key=None, index_path=index_path, client_registry=ClientRegistry(),
+                             local_cache_size=0)
+    first_file = kb._index_file
+    assert kb._local_search("nfe")[0]["key"] == "nfe"
+
+    compile_hybrid(tmp_path, {"mdfe": "Para emitir um MDF-e acesse Fiscal"})
+    kb.reload_documentation()
+
+    assert first_file.closed
+    assert kb._local_search("mdfe")[0]["key"] == "mdfe"
+    assert kb.documentacao == {"mdfe": "Para emitir um MDF-e acesse Fiscal"}
+
+
+def test_reload_from_documentation_closes_index(tmp_path):
+    index_path = compile_hybrid(tmp_path, DOCUMENTATION)
+    kb = HybridKnowledgeBase(None, api_key=None, index_path=index_path, client_registry=ClientRegistry())
+    first_file = kb._index_file
+
+    kb.reload_documentation(str(tmp_path / "doc.json"))
+
+    assert first_file.closed and kb._index_file is None
+    assert kb._local_search("cte")[0]["key"] == "cte"
+
+
+def test_compiled_trigram_index_is_read_only(tmp_path):
+    index_path = str(tmp_path / "trigram.idx")
+    KnowledgeBase(DOCUMENTATION, scorer="trigram").compile_index(index_path)
+    kb = KnowledgeBase(None, scorer="trigram", index_path=index_path)
+
+    with pytest.raises(KnowledgeBaseError):
+        kb._trigram_index.add_document(99, ["mdfe"])
+    with pytest.raises(KnowledgeBaseError):
+        kb._trigram_index.remove_document(0, ["nfe"])
+    assert kb.search("nfe")[0]["key"] == "nfe"
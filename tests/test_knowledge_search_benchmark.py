@@ -0,0 +1,28 @@
+import json
+
+from business_assistant.benchmarks import knowledge_search_benchmark as benchmark
+
+
+def test_failing_variant_is_recorded_and_results_written_incrementally(tmp_path, monkeypatch):
+    output = tmp_path / "resultados.json"
+    prepare = benchmark._prepare
+
+    def failing_prepare(variant, *args):
+        if variant["kb"] == "hybrid":
+            raise RuntimeError("falha simulada")
+        return prepare(variant, *args)
+
+    monkeypatch.setattr(benchmark, "_prepare", failing_prepare)
+    saved_rows = []
+
+    def progress(row):
+        saved_rows.append(len(json.loads(output.read_text(encoding="utf-8"))["results"]))
+
+    report = benchmark.run_benchmark([50], queries=5, measure_memory=False, progress=progress, output=str(output))
+
+    rows = report["results"]
+    assert saved_rows == list(range(1, len(rows) + 1))
+    assert json.loads(output.read_text(encoding="utf-8")) == report
+    hybrid = [row for row in rows if row["kb"] == "hybrid"]
+    assert hybrid and all(row["error"] == "RuntimeError: falha simulada" for row in hybrid)
+    assert all("qps" in row for row in rows if row["kb"] == "knowledge")
@@ -0,0 +1,44 @@
+import pytest
+
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+
+
+def sample_data():
+    return {
+        "fiscal": {f"nota{i}": f"Emissão da nota fiscal modelo {i} no módulo Fiscal" for i in range(20)},
+        "estoque": {"inventario": "Inventário de estoque pelo menu Estoque", "saldo": "Consulta de saldo"},
+        "financeiro": {"boleto": "Emissão de boleto no Financeiro"}
+    }
+
+
+QUERIES = ["nota fiscal modelo 3", "inventário estoque", "boleto financeiro", "saldo", "cfop nota"]
+
+
+@pytest.mark.parametrize("scorer", ["trigram", "overlap", "bm25"])
+def test_update_many_matches_rebuilt_index(scorer):
+    base = KnowledgeBase(sample_data(), scorer=scorer)
+    base.update_many([
+        {"estoque": {"saldo": "Saldo por depósito no Estoque"}},
+        {"fiscal": {"nota3": "CFOP da nota fiscal modelo 3"}},
+        {"financeiro": {"pix": "Recebimento por Pix no Financeiro"}},
+        {"estoque": {"inventario": {"anual": "Inventário anual", "rotativo": "Inventário rotativo"}}}
+    ])
+    rebuilt = KnowledgeBase(base.data, scorer=scorer)
+
+    # Empates saem na ordem de inserção, que muda com as atualizações: compara os conjuntos
+    for query in QUERIES:
+        assert (sorted(base.search(query, threshold=0.1, limit=100), key=lambda r: r['key'])
+                == sorted(rebuilt.search(query, threshold=0.1, limit=100), key=lambda r: r['key']))
+
+
+def test_removed_entries_are_compacted():
+    base = KnowledgeBase(sample_data(), scorer="overlap")
+    # Substituir a categoria por um valor remove as 20 notas do índice
+    base.update_knowledge({"fiscal": "Módulo fiscal desativado"})
+
+    assert None not in base._doc_keys
+    assert len(base._doc_keys) == len(base.search_index)
+    assert base._doc_ids == {key: doc_id for doc_id, key in enumerate(base._doc_keys)}
+    assert {result["key"] for result in base.search("nota fiscal modelo 3", threshold=0.1)} <= {"fiscal"}
+    base.update_knowledge({"fiscal": {"nfe": "Emissão de NF-e"}})
+    assert base.search("emissão nfe", threshold=0.1)[0]["key"] == "fiscal.nfe"
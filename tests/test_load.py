@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+from business_assistant.latency_testing.core.load import LoadProfile
+from business_assistant.latency_testing.core.tester import LatencyTester
+from business_assistant.latency_testing.providers.anthropic import AnthropicProvider
+from business_assistant.latency_testing.providers.base import LLMProvider
+from business_assistant.latency_testing.providers.openai import OpenAIProvider
+
+
+class FailingProvider(LLMProvider):
+    def initialize(self, **kwargs):
+        self.calls = 0
+
+    def generate_response(self, prompt, **kwargs):
+        self.calls += 1
+        raise RuntimeError("indisponível")
+
+    def get_model_info(self):
+        return {"provider": "Falha", "model": "nenhum"}
+
+
+class SerialProvider(LLMProvider):
+    """Atende uma requisição por vez, cada uma em `delay` segundos."""
+
+    def initialize(self, delay=0.1, **kwargs):
+        self.delay = delay
+        self.lock = None
+
+    def generate_response(self, prompt, **kwargs):
+        raise NotImplementedError
+
+    async def generate_response_async(self, prompt, **kwargs):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            await asyncio.sleep(self.delay)
+        return "ok"
+
+    def get_model_info(self):
+        return {"provider": "Serial", "model": "lento"}
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(MockLLM(ttft=0.01, output_tokens=3)) as running:
+        yield running
+
+
+def failing_provider():
+    provider = FailingProvider()
+    provider.initialize()
+    return provider
+
+
+def make_provider(server):
+    provider = OpenAIProvider()
+    provider.initialize(api_key="chave", model="mock", base_url=server.url + "/v1")
+    provider.client = provider.client.with_options(max_retries=0)
+    return provider
+
+
+def test_openai_closed_load_test(server):
+    tester = LatencyTester(make_provider(server))
+    metrics = tester.run_load_test("Como emitir NF-e?", mode="closed", concurrency=2, duration=0.5, interval=0.25)
+
+    assert metrics.total_requests > 0
+    assert metrics.failed_requests == 0
+    assert metrics.errors_by_type == {}
+
+
+def test_openai_open_load_test(server):
+    tester = LatencyTester(make_provider(server))
+    metrics = tester.run_load_test("Como emitir NF-e?", mode="open", rate=20.0, duration=0.5, interval=0.25)
+
+    # Chegadas em 0.05, 0.10, ... dentro da janela de 0.5s
+    assert metrics.total_requests >= 9
+    assert metrics.failed_requests == 0
+
+
+def test_closed_workers_stop_after_consecutive_errors():
+    provider = failing_provider()
+    tester = LatencyTester(provider)
+    metrics = tester.run_load_test("prompt", mode="closed", concurrency=2, duration=2.0,
+                                   max_consecutive_errors=3, error_backoff=0.01)
+
+    assert provider.calls == 6
+    assert metrics.failed_requests == 6
+    assert metrics.errors_by_type == {"RuntimeError": 6}
+
+
+def test_closed_workers_back_off_between_errors():
+    provider = failing_provider()
+    tester = LatencyTester(provider)
+    tester.run_load_test("prompt", mode="closed", concurrency=1, duration=0.5,
+                         max_consecutive_errors=None, error_backoff=0.1)
+
+    # 0.1 + 0.2 (+ o restante da janela): sem backoff seriam milhares de chamadas
+    assert provider.calls <= 4
+
+
+def test_open_mode_rejects_non_positive_rate():
+    tester = LatencyTester(failing_provider())
+    with pytest.raises(ValueError):
+        tester.run_load_test("prompt", mode="open", rate=0.0, duration=1.0)
+    with pytest.raises(ValueError):
+        list(LoadProfile(duration=1.0).arrival_times(0.0))
+
+
+def test_openai_stream_request_reports_api_usage(server):
+    tester = LatencyTester(make_provider(server))
+    record = tester.make_stream_request("Como emitir NF-e?")
+
+    assert record["output_tokens"] == 3
+    assert record["ttft"] <= record["latency"]
+    assert tester.calculate_metrics().stream_requests == 1
+
+
+def test_anthropic_provider_targets_mock_server(server):
+    provider = AnthropicProvider()
+    provider.initialize(api_key="chave", model="mock", base_url=server.url)
+    provider.client = provider.client.with_options(max_retries=0)
+    tester = LatencyTester(provider)
+
+    record = tester.make_stream_request("Como emitir NF-e?")
+    assert record["output_tokens"] == 3
+    metrics = tester.run_load_test("Como emitir NF-e?", mode="closed", concurrency=2, duration=0.3, interval=0.1)
+    assert metrics.total_requests > 1
+    assert metrics.failed_requests == 0
+
+
+def test_provider_without_stream_inherits_default():
+    provider = failing_provider()
+    with pytest.raises(RuntimeError):
+        next(provider.generate_stream("prompt"))
+
+
+def test_open_mode_reports_completion_throughput_under_overload():
+    provider = SerialProvider()
+    provider.initialize(delay=0.1)
+    tester = LatencyTester(provider)
+    # Oferece 20 req/s a um provedor que atende 10 req/s
+    metrics = tester.run_load_test("Como emitir NF-e?", mode="open", rate=20.0, duration=0.5, interval=0.25)
+
+    assert metrics.failed_requests == 0
+    assert 8.0 <= metrics.achieved_rps <= 11.0
+    # Respostas atrasadas terminam depois do fim do perfil, em janelas além dos 0.5s
+    assert sum(window["rps"] for window in metrics.timeline) * 0.25 == pytest.approx(metrics.total_requests)
+    assert len(metrics.timeline) > 2
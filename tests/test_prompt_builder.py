@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.prompt_builder import PromptBuilder
+from business_assistant.assistant.providers.anthropic import AnthropicAssistant
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.exceptions import ProviderError
+
+
+def test_large_context_is_trimmed_to_budget():
+    builder = PromptBuilder(token_budget=200)
+    context = {"historico": ["pedido " * 50 for _ in range(20)]}
+
+    prompt, stats = builder.build("Como emitir NF-e?", context, {"nfe": "[nfe]: acesse Fiscal"})
+
+    assert stats["context_trimmed"]
+    assert stats["total_tokens"] <= 200
+    assert prompt.startswith("Previous context: {")
+    assert prompt.endswith("User message: Como emitir NF-e?")
+
+
+def test_small_context_is_kept_whole():
+    context = {"empresa": "ACME"}
+
+    prompt, stats = PromptBuilder().build("Como emitir NF-e?", context)
+
+    assert not stats["context_trimmed"]
+    assert json.dumps(context) in prompt
+
+
+def test_context_is_dropped_when_message_fills_budget():
+    prompt, stats = PromptBuilder(token_budget=10).build("x" * 40, {"empresa": "ACME"})
+
+    assert stats["context_trimmed"]
+    assert stats["sections"]["context"] == 0
+
+
+def test_knowledge_api_error_raises(tmp_path):
+    path = tmp_path / "documentacao.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    registry = ClientRegistry()
+    kb = HybridKnowledgeBase(str(path), api_key="chave", client_registry=registry)
+    assistant = AnthropicAssistant(kb, api_key="chave", client_registry=registry)
+
+    async def api_failure(message, force_mode=None, timeout=None):
+        return {"mode_used": "api", "results": {"error": "Tempo limite excedido"}}
+
+    kb.get_info_async = api_failure
+
+    with pytest.raises(ProviderError, match="Tempo limite excedido"):
+        asyncio.run(assistant.chat("pergunta sem resposta local"))
+    assert assistant.conversation_history == []
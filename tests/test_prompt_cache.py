@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.prompt_cache import MIN_CACHEABLE_TOKENS, cache_usage, is_cacheable_prefix
+
+
+def make_kb(context_mode):
+    return HybridKnowledgeBase(None, api_key="chave", context_mode=context_mode,
+                               client_registry=ClientRegistry(),
+                               documentation={"nfe": "Para emitir uma NF-e acesse Fiscal"})
+
+
+def cached_blocks(request):
+    return [block for block in request["system"] if "cache_control" in block]
+
+
+def test_full_mode_marks_documentation_when_prefix_is_large_enough():
+    kb = make_kb('full')
+    documentation = "Regra fiscal. " * (MIN_CACHEABLE_TOKENS * 4 // 14 + 1)
+    request = kb._build_api_request("Qual o prazo?", documentation)
+
+    assert cached_blocks(request) == [request["system"][-1]]
+    assert request["system"][-1]["text"] == documentation
+    assert request["messages"][0]["content"][-1]["text"] == "Pergunta: Qual o prazo?"
+
+
+def test_small_prefix_is_not_marked_for_cache():
+    # O system prompt sozinho fica abaixo do mínimo da API
+    assert not is_cacheable_prefix(make_kb('retrieval').system_prompt)
+
+    retrieval = make_kb('retrieval')._build_api_request("Qual o prazo?", "trecho")
+    assert cached_blocks(retrieval) == []
+    assert [block["text"] for block in retrieval["messages"][0]["content"]] == ["trecho", "Pergunta: Qual o prazo?"]
+
+    assert cached_blocks(make_kb('full')._build_api_request("Qual o prazo?", "doc curta")) == []
+
+
+def test_cache_usage_reads_usage_and_tolerates_missing_fields():
+    response = SimpleNamespace(usage=SimpleNamespace(input_tokens=12, output_tokens=30,
+                                                     cache_read_input_tokens=1500,
+                                                     cache_creation_input_tokens=None))
+    assert cache_usage(response) == {
+        "input_tokens": 12, "output_tokens": 30,
+        "cache_read_input_tokens": 1500, "cache_creation_input_tokens": 0,
+        "cache_hit": True
+    }
+    assert cache_usage(SimpleNamespace())["cache_hit"] is False
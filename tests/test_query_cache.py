@@ -0,0 +1,33 @@
+import json
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.query_cache import QueryCache
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+
+def test_cached_results_are_not_shared():
+    cache = QueryCache()
+    results = [{"key": "nfe", "value": "Fiscal", "score": 0.9}]
+    cache.set("local", "Como emitir NF-e?", results)
+    results[0]["score"] = 0.0
+
+    first = cache.get("local", "como emitir nf-e")
+    first[0]["value"] = "alterado"
+
+    assert cache.get("local", "como emitir nf-e") == [{"key": "nfe", "value": "Fiscal", "score": 0.9}]
+
+
+def test_api_cache_hit_is_marked_as_cached(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as server:
+        kb = HybridKnowledgeBase(str(path), api_key="chave", client_registry=ClientRegistry(),
+                                 api_base_url=server.url)
+        first = kb.get_info("Qual o prazo do SPED?", force_mode="api")
+        second = kb.get_info("Qual o prazo do SPED?", force_mode="api")
+
+    assert not first["cache_hit"] and first["prompt_cache"]["output_tokens"] == 3
+    assert second["cache_hit"] and second["results"]["cached"]
+    assert "usage" not in second["results"] and second["prompt_cache"] is None
+    assert second["results"]["response"] == first["results"]["response"]
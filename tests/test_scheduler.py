@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.providers.openai import OpenAIAssistant
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+from business_assistant.assistant.utils.scheduler import RequestScheduler
+
+
+def test_rate_limit_wait_does_not_hold_a_concurrency_slot():
+    # 120 tokens/min = 2 tokens/s: depois de esvaziar o bucket, 1 token espera 0.5s
+    scheduler = RequestScheduler(max_concurrency=1, limits={"limitado": {"tokens_per_minute": 120}})
+
+    async def run():
+        async with scheduler.acquire("limitado", tokens=120):
+            pass
+        limited = asyncio.ensure_future(scheduler.acquire("limitado", tokens=1).__aenter__())
+        await asyncio.sleep(0.05)
+        async with scheduler.acquire("livre") as free_slot:
+            queue_wait = free_slot.queue_wait
+        slot = await limited
+        await slot.__aexit__(None, None, None)
+        return queue_wait, slot.queue_wait
+
+    free_wait, limited_wait = asyncio.run(run())
+    assert free_wait < 0.1
+    assert limited_wait >= 0.4
+
+
+def test_interactive_reserves_before_queued_batch():
+    # 6000 tokens/min = 100 tokens/s
+    scheduler = RequestScheduler(limits={"api": {"tokens_per_minute": 6000}})
+    order = []
+
+    async def call(name, priority):
+        async with scheduler.acquire("api", tokens=10, priority=priority):
+            order.append(name)
+
+    async def run():
+        async with scheduler.acquire("api", tokens=6000):
+            pass
+        first = asyncio.ensure_future(call("lote 1", "batch"))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(call("lote 2", "batch"))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.ensure_future(call("interativa", "interactive"))
+        await asyncio.gather(first, second, interactive)
+
+    asyncio.run(run())
+    assert order == ["lote 1", "interativa", "lote 2"]
+
+
+def test_sync_acquire_inside_event_loop_raises():
+    scheduler = RequestScheduler()
+
+    async def run():
+        with scheduler.acquire("api"):
+            pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    with scheduler.acquire("api") as slot:
+        assert slot.queue_wait < 0.1
+
+
+class RecordingScheduler(RequestScheduler):
+    def __init__(self):
+        super().__init__()
+        self.reserved = []
+
+    def acquire(self, provider, model=None, tokens=0, priority="interactive"):
+        self.reserved.append(tokens)
+        return super().acquire(provider, model, tokens, priority)
+
+
+def test_openai_slot_includes_max_output_tokens():
+    scheduler = RecordingScheduler()
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as server:
+        assistant = OpenAIAssistant(KnowledgeBase({"nfe": "Para emitir uma NF-e acesse Fiscal"}), api_key="chave",
+                                    base_url=server.url + "/v1", client_registry=ClientRegistry(),
+                                    scheduler=scheduler, max_tokens=300)
+        asyncio.run(assistant.chat("Como emitir NF-e?"))
+
+    assert scheduler.reserved[0] > 300
+
+
+def test_sync_get_info_inside_event_loop_raises_instead_of_error_result(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as server:
+        kb = HybridKnowledgeBase(str(path), api_key="chave", client_registry=ClientRegistry(),
+                                 api_base_url=server.url, scheduler=RequestScheduler())
+
+        async def handler():
+            return kb.get_info("Qual o prazo do SPED?", force_mode="api")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(handler())
+        # Fora do event loop a versão síncrona chama a API normalmente
+        assert "response" in kb.get_info("Qual o prazo do SPED?", force_mode="api")["results"]
@@ -0,0 +1,65 @@
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.core.scoring import BM25Scorer, OverlapScorer, create_scorer
+from business_assistant.assistant.core.search_index import InvertedIndex
+from business_assistant.assistant.utils.clients import ClientRegistry
+
+
+def build_index(scorer, documents):
+    index = InvertedIndex()
+    for doc_id, text in enumerate(documents):
+        index.add_document(doc_id, scorer.tokenize(text))
+    return index
+
+
+def test_bm25_prefers_rare_terms_and_stays_normalized():
+    scorer = BM25Scorer()
+    index = build_index(scorer, [
+        "nota fiscal eletronica emissao",
+        "nota fiscal de servico",
+        "nota fiscal e sped contribuicoes",
+        "manual geral"
+    ])
+
+    scores = scorer.score(index, scorer.tokenize("nota sped"))
+    # 'sped' aparece em um único documento e pesa mais que 'nota'
+    assert max(scores, key=scores.get) == 2
+    assert set(scores) == {0, 1, 2}
+    assert all(0.0 < score <= 1.0 for score in scores.values())
+    assert scorer.score(index, scorer.tokenize("inexistente")) == {}
+
+
+def test_bm25_penalizes_longer_documents():
+    scorer = BM25Scorer()
+    index = build_index(scorer, ["prazo sped", "prazo sped " + "texto adicional " * 20])
+
+    scores = scorer.score(index, scorer.tokenize("sped"))
+    assert scores[0] > scores[1]
+
+
+def test_create_scorer_by_name_instance_and_invalid_name():
+    assert isinstance(create_scorer("bm25"), BM25Scorer)
+    assert isinstance(create_scorer("overlap"), OverlapScorer)
+    custom = BM25Scorer(k1=1.2, b=0.5)
+    assert create_scorer(custom) is custom
+
+    with pytest.raises(ValueError):
+        create_scorer("tfidf")
+    with pytest.raises(ValueError):
+        KnowledgeBase({"nfe": "Fiscal"}, scorer="tfidf")
+
+
+def test_both_knowledge_bases_rank_with_bm25():
+    documentation = {
+        "nfe": "Para emitir uma NF-e acesse o menu Fiscal",
+        "sped": "O prazo de entrega do SPED fiscal e mensal",
+        "nfse": "A NFS-e e emitida no portal da prefeitura"
+    }
+    kb = KnowledgeBase(documentation, scorer="bm25")
+    hybrid = HybridKnowledgeBase(None, api_key="chave", scorer="bm25", client_registry=ClientRegistry(),
+                                 documentation=documentation)
+
+    assert kb.search("prazo do SPED")[0]["key"] == "sped"
+    assert hybrid.get_info("prazo do SPED", force_mode="local")["results"][0]["key"] == "sped"
@@ -0,0 +1,66 @@
+import heapq
+import json
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.core.search_index import word_tokens
+from business_assistant.assistant.utils.clients import ClientRegistry
+
+# Muitos valores repetidos: scores empatados em vários documentos
+DOCUMENTATION = {
+    f"modulo{i}": {
+        "nfe": "Para emitir uma NF-e acesse Fiscal" if i % 3 else "Emissão de NF-e pelo menu Fiscal",
+        "cte": f"Para emitir um CT-e acesse Transporte {i % 4}",
+        "boleto": "Boleto no Financeiro"
+    }
+    for i in range(40)
+}
+
+QUERIES = ["emitir nfe fiscal", "cte transporte 2", "boleto", "emitr nf-e", "financeiro fiscal transporte"]
+
+
+def baseline(scores, threshold, limit):
+    """Busca anterior: ordena todos os candidatos por doc_id e escolhe os maiores."""
+    candidates = [(doc_id, score) for doc_id, score in sorted(scores.items()) if score >= threshold]
+    return [(doc_id, score) for doc_id, score in heapq.nlargest(limit, candidates, key=lambda c: c[1])]
+
+
+def combined_scores(scorer, key_index, value_index, query):
+    tokens = scorer.tokenize(query)
+    key_scores = scorer.score(key_index, tokens)
+    value_scores = scorer.score(value_index, tokens)
+    return {doc_id: max(key_scores.get(doc_id, 0.0), value_scores.get(doc_id, 0.0))
+            for doc_id in key_scores.keys() | value_scores.keys()}
+
+
+def trigram_scores(kb, query):
+    best = {}
+    for keyword in word_tokens(query):
+        for doc_id, similarity in kb._trigram_index.search(keyword, kb.fuzzy_min_similarity, kb.fuzzy_rerank).items():
+            best[doc_id] = max(best.get(doc_id, 0.0), similarity)
+    return best
+
+
+@pytest.mark.parametrize("scorer", ["overlap", "bm25", "trigram"])
+def test_top_k_matches_full_sort(scorer):
+    kb = KnowledgeBase(DOCUMENTATION, scorer=scorer)
+    for query in QUERIES:
+        scores = (trigram_scores(kb, query) if scorer == "trigram"
+                  else combined_scores(kb.scorer, kb._key_index, kb._value_index, query))
+        expected = [(kb._doc_keys[doc_id], score) for doc_id, score in baseline(scores, 0.1, 5)]
+        assert [(r["key"], r["score"]) for r in kb.search(query, threshold=0.1, limit=5)] == expected
+
+
+def test_hybrid_top_k_matches_full_sort(tmp_path):
+    path = tmp_path / "doc.json"
+    flat = {f"{module}.{key}": value for module, entries in DOCUMENTATION.items() for key, value in entries.items()}
+    path.write_text(json.dumps(flat), encoding="utf-8")
+    kb = HybridKnowledgeBase(str(path), api_key=None, client_registry=ClientRegistry(), max_local_results=5,
+                             similarity_threshold=0.1)
+    for query in QUERIES:
+        scores = combined_scores(kb.scorer, kb._key_index, kb._value_index, query)
+        expected = [(kb._doc_keys[doc_id], score) for doc_id, score in baseline(scores, 0.1, 5)]
+        assert expected
+        assert [(r["key"], r["score"]) for r in kb._indexed_search(query)] == expected
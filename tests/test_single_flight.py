@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.providers.mock import MockAssistant
+from business_assistant.assistant.utils.exceptions import ProviderError
+from business_assistant.assistant.utils.mock_llm import MockLLM
+from business_assistant.assistant.utils.scheduler import RequestScheduler
+from business_assistant.assistant.utils.single_flight import SingleFlight
+
+
+class CountingLLM(MockLLM):
+    def __init__(self, calls, fail=False):
+        super().__init__(ttft=0.0, output_tokens=3, response_text="Acesse Fiscal > NF-e")
+        self.calls = calls
+        self.fail = fail
+
+    async def complete_async(self, prompt, usage=None):
+        self.calls.append(prompt)
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise ProviderError("falha simulada")
+        return self.response_text
+
+
+def make_assistants(count, flight, fail=False):
+    calls = []
+    knowledge_base = KnowledgeBase({"nfe": "Para emitir uma NF-e acesse Fiscal"})
+    assistants = [MockAssistant(knowledge_base, llm=CountingLLM(calls, fail), scheduler=RequestScheduler(),
+                                single_flight=flight)
+                  for _ in range(count)]
+    return assistants, calls
+
+
+def test_identical_calls_from_different_instances_share_one_request():
+    flight = SingleFlight()
+    assistants, calls = make_assistants(5, flight)
+
+    async def run():
+        return await asyncio.gather(*(assistant.chat("Como emitir NF-e?") for assistant in assistants))
+
+    assert asyncio.run(run()) == ["Acesse Fiscal > NF-e"] * 5
+    assert len(calls) == 1
+    assert flight.get_stats()["coalesced"] == 4
+    # Todas as instâncias registram o turno no próprio histórico
+    assert all(len(assistant.conversation_history) == 2 for assistant in assistants)
+
+
+def test_different_history_is_not_coalesced():
+    flight = SingleFlight()
+    (first, second), calls = make_assistants(2, flight)
+    second.conversation_history = [{"role": "user", "content": "oi"}, {"role": "assistant", "content": "olá"}]
+
+    async def run():
+        return await asyncio.gather(first.chat("Como emitir NF-e?"), second.chat("Como emitir NF-e?"))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    assistants, calls = make_assistants(4, flight, fail=True)
+
+    async def run():
+        return await asyncio.gather(*(assistant.chat("Como emitir NF-e?") for assistant in assistants),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(result, ProviderError) for result in results)
+    assert flight.get_stats()["in_flight"] == 0
+    with pytest.raises(ProviderError):
+        asyncio.run(assistants[0].chat("Como emitir NF-e?"))
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+
+def make_kb(tmp_path, server, **kwargs):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"nfe": "emitir nfe", "sped": "prazo sped"}), encoding="utf-8")
+    return HybridKnowledgeBase(str(path), api_key="chave", client_registry=ClientRegistry(),
+                               api_base_url=server.url, speculative=True, executor="thread", **kwargs)
+
+
+def slow_local_search(kb, delay=0.05):
+    """Faz a busca local (na thread do executor) demorar mais que o hedge."""
+    local_search = kb._local_search
+
+    def delayed(query):
+        time.sleep(delay)
+        return local_search(query)
+
+    kb._local_search = delayed
+
+
+def test_confident_local_result_cancels_api_call(tmp_path):
+    with MockLLMServer(MockLLM(ttft=1.0, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server, use_api_threshold=0.1)
+        slow_local_search(kb)
+        info = asyncio.run(kb.get_info_async("emitir nfe"))
+
+    assert info['mode_used'] == 'local' and info['results'][0]['key'] == 'nfe'
+    assert info['speculative']['winner'] == 'local'
+    assert info['speculative']['api_started'] and info['speculative']['api_cancelled']
+    assert info['processing_time'] < 0.5
+
+
+def test_weak_local_result_uses_api_response_in_flight(tmp_path):
+    with MockLLMServer(MockLLM(ttft=0.05, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server, use_api_threshold=0.99)
+        slow_local_search(kb)
+        info = asyncio.run(kb.get_info_async("Qual o prazo de entrega?"))
+
+    assert info['mode_used'] == 'api' and 'response' in info['results']
+    assert info['speculative']['winner'] == 'api' and info['speculative']['api_started']
+    assert not info['speculative']['api_cancelled']
+
+
+def test_fast_local_search_within_hedge_delay_skips_api(tmp_path):
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server, use_api_threshold=0.1, hedge_delay_ms=500)
+        info = asyncio.run(kb.get_info_async("emitir nfe"))
+
+    assert info['mode_used'] == 'local'
+    assert not info['speculative']['api_started']
+
+
+def test_local_failure_cancels_api_call_and_propagates(tmp_path):
+    with MockLLMServer(MockLLM(ttft=1.0, output_tokens=3)) as server:
+        kb = make_kb(tmp_path, server)
+        api_calls = []
+        api_search = kb._api_search_async
+
+        async def tracked_api_search(*args, **kwargs):
+            task = asyncio.ensure_future(api_search(*args, **kwargs))
+            api_calls.append(task)
+            return await task
+
+        async def failing_local_search(query):
+            await asyncio.sleep(0.05)
+            raise RuntimeError("falha na busca local")
+
+        kb._api_search_async = tracked_api_search
+        kb._cached_local_search_async = failing_local_search
+
+        async def run():
+            with pytest.raises(RuntimeError, match="falha na busca local"):
+                await kb.get_info_async("Qual o prazo?")
+            await asyncio.sleep(0)
+            return api_calls
+
+        calls = asyncio.run(run())
+
+    assert len(calls) == 1 and calls[0].cancelled()
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.providers.openai import OpenAIAssistant
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.mock_llm import MockLLM, MockLLMServer
+
+
+def test_openai_stream_closed_when_consumer_stops_early():
+    with MockLLMServer(MockLLM(ttft=0.0, output_tokens=50, tokens_per_second=20)) as server:
+        assistant = OpenAIAssistant(KnowledgeBase({"nfe": "Para emitir uma NF-e acesse Fiscal"}), api_key="chave",
+                                    base_url=server.url + "/v1", client_registry=ClientRegistry())
+        closed = []
+        create = assistant.client.chat.completions.create
+
+        async def tracked_create(**kwargs):
+            stream = await create(**kwargs)
+            close = stream.close
+
+            async def tracked_close():
+                closed.append(True)
+                await close()
+
+            stream.close = tracked_close
+            return stream
+
+        assistant.client.chat.completions.create = tracked_create
+
+        async def run():
+            chunks = assistant.chat_stream("Como emitir NF-e?")
+            first = await chunks.__anext__()
+            await chunks.aclose()
+            # Ainda dentro do event loop: o fechamento não pode depender da finalização do gerador
+            return first, bool(closed)
+
+        first, closed_early = asyncio.run(run())
+        assert first
+        assert closed_early
+        assert assistant.last_stream_metrics["chunks"] == 1
+
+
+def test_cached_api_stream_sets_its_own_metrics(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"nfe": "Para emitir uma NF-e acesse Fiscal"}), encoding="utf-8")
+    with MockLLMServer(MockLLM(ttft=0.05, output_tokens=5)) as server:
+        kb = HybridKnowledgeBase(str(path), api_key="chave", client_registry=ClientRegistry(),
+                                 api_base_url=server.url)
+
+        async def stream():
+            return "".join([delta async for delta in kb.stream_api_search("Qual o prazo do SPED?")])
+
+        first = asyncio.run(stream())
+        assert not kb.last_stream_metrics["cached"] and kb.last_stream_metrics["ttft"] >= 0.05
+        assert asyncio.run(stream()) == first
+
+    assert kb.last_stream_metrics["cached"]
+    assert kb.last_stream_metrics["ttft"] == 0.0 and kb.last_stream_metrics["usage"] is None
@@ -0,0 +1,89 @@
+import random
+import string
+import time
+
+from business_assistant.assistant.core import trigram_index
+from business_assistant.assistant.core.knowledge import KnowledgeBase
+from business_assistant.assistant.core.trigram_index import TrigramIndex, edit_distance, trigrams
+
+
+def random_vocabulary(size, seed=0):
+    rng = random.Random(seed)
+    return sorted({"".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+                   for _ in range(size)})
+
+
+def brute_force(vocabulary, keyword, min_similarity):
+    similar = {}
+    for token in vocabulary:
+        if not trigrams(keyword) & trigrams(token):
+            continue
+        similarity = 1 - edit_distance(keyword, token) / max(len(keyword), len(token))
+        if similarity >= min_similarity:
+            similar[token] = similarity
+    return similar
+
+
+def test_bounded_edit_distance():
+    assert edit_distance("cofp", "cfop") == 1
+    assert edit_distance("cofp", "cfop", max_distance=1) == 1
+    assert edit_distance("documento", "departamento", max_distance=2) == 3
+    assert edit_distance("nota", "notas", max_distance=0) == 1
+
+
+def test_typos_are_found():
+    index = TrigramIndex()
+    index.add_document(0, ["cfop", "emitir", "nota", "fiscal"])
+
+    for typo, expected in [("cofp", "cfop"), ("emitr", "emitir"), ("fsical", "fiscal"), ("nto", "nota")]:
+        assert expected in index.similar_tokens(typo, min_similarity=0.5)
+
+
+def test_candidate_filter_keeps_exact_results():
+    vocabulary = random_vocabulary(3000)
+    index = TrigramIndex()
+    for doc_id, token in enumerate(vocabulary):
+        index.add_document(doc_id, [token])
+
+    rng = random.Random(1)
+    for token in rng.sample(vocabulary, 50):
+        position = rng.randrange(len(token) - 1)
+        # Transposição, a edição que mais destrói trigramas
+        typo = token[:position] + token[position + 1] + token[position] + token[position + 2:]
+        for min_similarity in (0.5, 0.7):
+            assert index.similar_tokens(typo, min_similarity) == brute_force(vocabulary, typo, min_similarity)
+
+
+def test_edit_distance_only_runs_on_plausible_candidates(monkeypatch):
+    vocabulary = random_vocabulary(5000)
+    index = TrigramIndex()
+    for doc_id, token in enumerate(vocabulary):
+        index.add_document(doc_id, [token])
+
+    calls = []
+
+    def counting_edit_distance(source, target, max_distance=None):
+        calls.append(target)
+        return edit_distance(source, target, max_distance)
+
+    monkeypatch.setattr(trigram_index, "edit_distance", counting_edit_distance)
+    keyword = next(token for token in vocabulary if len(token) >= 8)
+    candidates = {token for trigram in trigrams(keyword) for token in index.trigram_tokens.get(trigram, ())}
+
+    start = time.perf_counter()
+    index.similar_tokens(keyword, min_similarity=0.8)
+    elapsed = time.perf_counter() - start
+
+    assert keyword in calls
+    assert len(calls) < len(candidates) / 4
+    assert elapsed < 0.5
+
+
+def test_search_score_is_best_keyword_match():
+    kb = KnowledgeBase({"cfop": "Código fiscal de operações", "nfe": "Nota fiscal eletrônica"})
+
+    results = kb.search("qual o cofp da venda", threshold=0.5)
+
+    assert results[0]["key"] == "cfop"
+    # Máximo entre as palavras, como na busca original (não a média)
+    assert results[0]["score"] == 0.75
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from business_assistant.assistant.core.embeddings import HashingEmbedder
+from business_assistant.assistant.core.hydbrid_knowledge import HybridKnowledgeBase
+from business_assistant.assistant.utils.clients import ClientRegistry
+from business_assistant.assistant.utils.exceptions import KnowledgeBaseError
+from models_tests.utils import embedding_engine
+
+
+def write_documentation(path, count):
+    path.write_text(json.dumps({f"topico{i}": f"Procedimento fiscal número {i}" for i in range(count)}),
+                    encoding="utf-8")
+    return str(path)
+
+
+def make_kb(documentation_path, **options):
+    return HybridKnowledgeBase(documentation_path, api_key=None, client_registry=ClientRegistry(), **options)
+
+
+def test_loaded_index_uses_configured_n_probe(tmp_path):
+    documentation = write_documentation(tmp_path / "doc.json", 50)
+    vector_path = str(tmp_path / "vetores.npz")
+    make_kb(documentation, vector_n_probe=2).save_vector_index(vector_path)
+
+    kb = make_kb(documentation, vector_index_path=vector_path, vector_n_probe=5)
+
+    assert kb.vector_index.n_probe == 5
+    assert kb.get_info("Procedimento fiscal número 7", force_mode="vector")["results"][0]["key"] == "topico7"
+
+
+def test_index_for_other_documentation_is_rejected(tmp_path):
+    vector_path = str(tmp_path / "vetores.npz")
+    make_kb(write_documentation(tmp_path / "antiga.json", 50)).save_vector_index(vector_path)
+
+    with pytest.raises(KnowledgeBaseError):
+        make_kb(write_documentation(tmp_path / "nova.json", 40), vector_index_path=vector_path)
+
+
+def test_single_embedder_implementation():
+    assert embedding_engine.HashingEmbedder is HashingEmbedder